@@ -0,0 +1,226 @@
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import select
+
+from models import Channel, Video, db
+
+logger = logging.getLogger(__name__)
+
+ANALYTICS_CHUNK_SIZE = int(os.environ.get("ANALYTICS_CHUNK_SIZE", "50000"))
+ANALYTICS_CACHE_SECONDS = float(os.environ.get("ANALYTICS_CACHE_SECONDS", "300"))
+# Robust z-score (median/MAD of log views within the channel) marking an outlier.
+OUTLIER_THRESHOLD = 3.5
+RATE_COLUMNS = ("engagement_rate", "like_rate", "comment_rate")
+PERCENTILES = (10, 25, 50, 75, 90, 99)
+ENGAGEMENT_HISTOGRAM_EDGES = (0, 1, 2, 3, 5, 10, 20, 50, np.inf)
+# Columns loaded per video; titles are fetched for the reported outliers only.
+FRAME_COLUMNS = ("id", "channel_id", "views", "posted", *RATE_COLUMNS)
+FRAME_DTYPES = {
+    "id": "int64",
+    "channel_id": "float64",
+    "views": "float64",
+    **{column: "float64" for column in RATE_COLUMNS},
+}
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+def load_video_frame(channel_id=None, chunk_size=None):
+    """Columnar slice of ``videos`` as a DataFrame, read in ``chunk_size`` chunks.
+
+    Rows stream through ``yield_per`` partitions so no ORM objects are built;
+    each partition becomes typed NumPy columns before the chunks are joined.
+    """
+    videos = Video.__table__
+    stmt = select(*(videos.c[column] for column in FRAME_COLUMNS))
+    if channel_id is not None:
+        stmt = stmt.where(videos.c.channel_id == channel_id)
+    result = db.session.execute(
+        stmt,
+        execution_options={
+            "stream_results": True,
+            "yield_per": chunk_size or ANALYTICS_CHUNK_SIZE,
+        },
+    )
+    chunks = [
+        pd.DataFrame.from_records(
+            partition, columns=FRAME_COLUMNS, coerce_float=True
+        ).astype(FRAME_DTYPES)
+        for partition in result.partitions()
+    ]
+    if chunks:
+        frame = pd.concat(chunks, ignore_index=True)
+    else:
+        frame = pd.DataFrame(columns=FRAME_COLUMNS).astype(FRAME_DTYPES)
+    frame["posted"] = pd.to_datetime(frame["posted"], errors="coerce")
+    return frame
+
+
+def _round(value, digits=2):
+    return None if value is None or np.isnan(value) else round(float(value), digits)
+
+
+def engagement_distribution(frame):
+    """Percentiles of the stored rates and a histogram of engagement rates."""
+    distribution = {}
+    for column in RATE_COLUMNS:
+        values = frame[column].dropna().to_numpy()
+        quantiles = (
+            np.percentile(values, PERCENTILES)
+            if len(values)
+            else [np.nan] * len(PERCENTILES)
+        )
+        distribution[column] = {
+            **{f"p{p}": _round(q) for p, q in zip(PERCENTILES, quantiles)},
+            "mean": _round(values.mean()) if len(values) else None,
+        }
+    counts, _edges = np.histogram(
+        frame["engagement_rate"].dropna().to_numpy(),
+        bins=np.asarray(ENGAGEMENT_HISTOGRAM_EDGES, dtype=float),
+    )
+    distribution["histogram"] = {
+        "edges": [edge for edge in ENGAGEMENT_HISTOGRAM_EDGES if np.isfinite(edge)],
+        "counts": counts.tolist(),
+    }
+    return distribution
+
+
+def channel_view_scores(frame):
+    """Per-video view percentile and robust z-score within the video's channel."""
+    scored = frame.loc[frame["channel_id"].notna() & frame["views"].notna()].copy()
+    by_channel = scored.groupby("channel_id")["views"]
+    scored["channel_percentile"] = by_channel.rank(pct=True) * 100
+    scored["channel_median_views"] = by_channel.transform("median")
+    log_views = np.log10(scored["views"].clip(lower=0) + 1)
+    log_by_channel = log_views.groupby(scored["channel_id"])
+    deviation = log_views - log_by_channel.transform("median")
+    mad = deviation.abs().groupby(scored["channel_id"]).transform("median")
+    # 0.6745 scales the MAD to a standard deviation for normal data; channels
+    # whose videos all have the same views have no spread and no outliers.
+    scored["score"] = np.where(mad > 0, 0.6745 * deviation / mad.where(mad > 0), 0.0)
+    return scored
+
+
+def view_outliers(frame, limit=20):
+    """Videos whose views deviate most from the rest of their channel."""
+    scored = channel_view_scores(frame)
+    outliers = scored.loc[scored["score"].abs() >= OUTLIER_THRESHOLD]
+    top = outliers.reindex(
+        outliers["score"].abs().sort_values(ascending=False).index
+    ).head(limit)
+    if top.empty:
+        return []
+
+    videos = Video.__table__
+    channels = Channel.__table__
+    details = {
+        row.id: row
+        for row in db.session.execute(
+            select(
+                videos.c.id,
+                videos.c.youtube_video_id,
+                videos.c.title,
+                channels.c.channel_username,
+            )
+            .join(channels, channels.c.id == videos.c.channel_id)
+            .where(videos.c.id.in_(top["id"].tolist()))
+        )
+    }
+    return [
+        {
+            "id": int(row.id),
+            "youtube_video_id": details[row.id].youtube_video_id,
+            "title": details[row.id].title,
+            "channel_id": int(row.channel_id),
+            "channel_username": details[row.id].channel_username,
+            "views": int(row.views),
+            "channel_median_views": _round(row.channel_median_views),
+            "channel_percentile": _round(row.channel_percentile),
+            "score": _round(row.score),
+            "direction": "above" if row.score > 0 else "below",
+        }
+        for row in top.itertuples()
+        if row.id in details
+    ]
+
+
+def upload_cadence(frame, limit=20):
+    """Days between uploads overall and for the most active channels."""
+    dated = frame.loc[frame["posted"].notna() & frame["channel_id"].notna()]
+    dated = dated.sort_values(["channel_id", "posted"])
+    gaps = dated.groupby("channel_id")["posted"].diff().dt.days
+    per_channel = (
+        dated.assign(gap=gaps)
+        .groupby("channel_id")
+        .agg(
+            uploads=("id", "size"),
+            median_gap_days=("gap", "median"),
+            mean_gap_days=("gap", "mean"),
+            last_upload=("posted", "max"),
+        )
+        .sort_values(["uploads", "last_upload"], ascending=False)
+        .head(limit)
+    )
+    weekdays = dated["posted"].dt.day_name().value_counts()
+    return {
+        "median_gap_days": _round(gaps.median()) if gaps.notna().any() else None,
+        "by_weekday": {day: int(count) for day, count in weekdays.items()},
+        "channels": [
+            {
+                "channel_id": int(channel_id),
+                "uploads": int(row.uploads),
+                "median_gap_days": _round(row.median_gap_days),
+                "mean_gap_days": _round(row.mean_gap_days),
+                "last_upload": row.last_upload.date().isoformat(),
+            }
+            for channel_id, row in per_channel.iterrows()
+        ],
+    }
+
+
+def compute_analytics(channel_id=None, limit=20):
+    """Engagement distribution, per-channel view outliers and upload cadence."""
+    started = time.perf_counter()
+    frame = load_video_frame(channel_id)
+    result = {
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "channel_id": channel_id,
+        "video_count": int(len(frame)),
+        "engagement": engagement_distribution(frame),
+        "outliers": view_outliers(frame, limit=limit),
+        "upload_cadence": upload_cadence(frame, limit=limit),
+    }
+    logger.info(
+        "Computed analytics for %s videos in %.2fs",
+        len(frame),
+        time.perf_counter() - started,
+    )
+    return result
+
+
+def get_analytics(channel_id=None, limit=20):
+    """``compute_analytics`` cached per process for ``ANALYTICS_CACHE_SECONDS``."""
+    key = (channel_id, limit)
+    now = time.monotonic()
+    with _cache_lock:
+        cached = _cache.get(key)
+        if cached is not None and cached[0] > now:
+            return cached[1]
+    result = compute_analytics(channel_id, limit=limit)
+    with _cache_lock:
+        for stale in [name for name, (expires, _) in _cache.items() if expires <= now]:
+            del _cache[stale]
+        _cache[key] = (now + ANALYTICS_CACHE_SECONDS, result)
+    return result
+
+
+def clear_analytics_cache():
+    with _cache_lock:
+        _cache.clear()
@@ -1,12 +1,14 @@
 import os
 import shutil
 
+import click
 import sentry_sdk
 from flask import Flask
 from flask_migrate import Migrate
 from flask_socketio import SocketIO, join_room
 from sentry_sdk.integrations.flask import FlaskIntegration
 
+from database import configure_engines, engine_binds, engine_options
 from models import db
 
 migrate = Migrate()
@@ -53,7 +55,12 @@ def create_app():
     database_url = os.environ.get("DATABASE_URL")
     app.config["SQLALCHEMY_DATABASE_URI"] = database_url or f"sqlite:///{db_path}"
     app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = engine_options(
+        app.config["SQLALCHEMY_DATABASE_URI"]
+    )
+    app.config["SQLALCHEMY_BINDS"] = engine_binds()
     db.init_app(app)
+    configure_engines(app)
     migrate.init_app(app, db)
 
     if Limiter is not None:
@@ -71,10 +78,30 @@ def create_app():
         async_mode=SOCKETIO_ASYNC_MODE,
     )
     _register_socket_handlers(socketio)
+    _register_cli_commands(app)
 
     return app
 
 
+def _register_cli_commands(app):
+    @app.cli.command("compact-history")
+    def compact_history_command():
+        """Downsample old channel history and stats snapshots."""
+        from retention import compact_history
+
+        for table, deleted in compact_history().items():
+            click.echo(f"{table}: removed {deleted} rows")
+
+    @app.cli.command("refresh-channel-stats")
+    def refresh_channel_stats_command():
+        """Recompute every channel_stats rollup from the videos table."""
+        from crud import refresh_channel_stats
+
+        written = refresh_channel_stats()
+        db.session.commit()
+        click.echo(f"channel_stats: refreshed {written} channels")
+
+
 def _register_socket_handlers(socketio_instance):
     @socketio_instance.on("join")
     def handle_join(payload):
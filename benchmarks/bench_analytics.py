@@ -0,0 +1,81 @@
+"""Time the /api/analytics computation over a large synthetic videos table.
+
+Usage: python benchmarks/bench_analytics.py [video_count] [channel_count]
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+from flask import Flask
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analytics import compute_analytics, load_video_frame  # noqa: E402
+from models import Channel, Video, db, engagement_rates  # noqa: E402
+
+INSERT_CHUNK_SIZE = 50000
+
+
+def _fill(video_count, channel_count):
+    db.session.execute(
+        Channel.__table__.insert(),
+        [
+            {"id": idx + 1, "channel_username": f"@bench_{idx}", "subscribers": idx}
+            for idx in range(channel_count)
+        ],
+    )
+    # Seeded so runs are comparable; not used for anything security related.
+    rng = random.Random(42)  # nosec B311
+    start = date(2020, 1, 1)
+    for offset in range(0, video_count, INSERT_CHUNK_SIZE):
+        rows = []
+        for idx in range(offset, min(offset + INSERT_CHUNK_SIZE, video_count)):
+            views = int(rng.lognormvariate(8, 1.5))
+            likes = int(views * rng.uniform(0, 0.08))
+            comments = int(views * rng.uniform(0, 0.01))
+            rows.append(
+                {
+                    "youtube_video_id": f"bench_{idx}",
+                    "channel_id": rng.randint(1, channel_count),
+                    "views": views,
+                    "likes": likes,
+                    "comments": comments,
+                    "posted": start + timedelta(days=rng.randint(0, 2000)),
+                    **engagement_rates(views, likes, comments),
+                }
+            )
+        db.session.execute(Video.__table__.insert(), rows)
+    db.session.commit()
+
+
+def main():
+    video_count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    channel_count = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = (
+        f"sqlite:///{tempfile.mkdtemp()}/bench_analytics.db"
+    )
+    db.init_app(app)
+
+    with app.app_context():
+        db.create_all()
+        _fill(video_count, channel_count)
+
+        started = time.perf_counter()
+        frame = load_video_frame()
+        loaded = time.perf_counter()
+        result = compute_analytics()
+        finished = time.perf_counter()
+
+    print(f"videos={video_count} channels={channel_count}")
+    print(f"load frame: {loaded - started:.2f}s ({len(frame)} rows)")
+    print(f"full analytics (load + metrics): {finished - loaded:.2f}s")
+    print(f"outliers reported: {len(result['outliers'])}")
+
+
+if __name__ == "__main__":
+    main()
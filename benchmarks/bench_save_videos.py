@@ -0,0 +1,89 @@
+"""Compare per-video commits against batched upserts on a file-backed SQLite DB.
+
+Usage: python benchmarks/bench_save_videos.py [video_count] [batch_size]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+from flask import Flask
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from crud import save_video, save_videos_batch  # noqa: E402
+from models import db  # noqa: E402
+
+
+def _records(count, prefix):
+    return [
+        {
+            "youtube_video_id": f"{prefix}_{idx}",
+            "channel_username": f"@bench_channel_{idx % 20}",
+            "subscribers": 1000 + idx,
+            "title": f"Benchmark video {idx}",
+            "description": "description " * 20,
+            "views": idx * 10,
+            "likes": idx,
+            "comments": idx // 2,
+            "posted": "2025-01-01",
+            "video_length": "0:10:00",
+            "transcript": "transcript words " * 200,
+        }
+        for idx in range(count)
+    ]
+
+
+def _run(label, func, count):
+    started = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - started
+    print(f"{label:<28} {elapsed:8.3f}s  {count / elapsed:10.1f} videos/s")
+    return elapsed
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    batch_size = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        app = Flask(__name__)
+        app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{tmp_dir}/bench.db"
+        db.init_app(app)
+
+        with app.app_context():
+            db.create_all()
+
+            single = _records(count, "single")
+            per_row = _run(
+                "save_video (per row)",
+                lambda: [save_video(record) for record in single],
+                count,
+            )
+
+            batched = _records(count, "batch")
+            bulk = _run(
+                f"save_videos_batch ({batch_size})",
+                lambda: [
+                    save_videos_batch(batched[start : start + batch_size])
+                    for start in range(0, count, batch_size)
+                ],
+                count,
+            )
+
+            refresh = _run(
+                f"re-save batch ({batch_size})",
+                lambda: [
+                    save_videos_batch(batched[start : start + batch_size])
+                    for start in range(0, count, batch_size)
+                ],
+                count,
+            )
+
+    print(f"speedup (insert): {per_row / bulk:.1f}x")
+    print(f"speedup (refresh): {per_row / refresh:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Measure /api/data read latency on SQLite while a writer ingests videos.
+
+Usage: python benchmarks/bench_sqlite_concurrency.py [journal_mode] [seconds]
+
+Run once with ``WAL`` (the default profile) and once with ``DELETE`` to compare
+against rollback journaling.
+"""
+
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+journal_mode = sys.argv[1].upper() if len(sys.argv) > 1 else "WAL"
+duration = float(sys.argv[2]) if len(sys.argv) > 2 else 10.0
+tmp_dir = tempfile.mkdtemp()
+os.environ["SQLITE_JOURNAL_MODE"] = journal_mode
+os.environ["DATABASE_URL"] = f"sqlite:///{tmp_dir}/bench.db"
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app  # noqa: E402
+from crud import save_videos_batch  # noqa: E402
+from models import db  # noqa: E402
+
+
+def _records(start, count):
+    return [
+        {
+            "youtube_video_id": f"bench_{idx}",
+            "channel_username": f"@bench_channel_{idx % 20}",
+            "subscribers": 1000 + idx,
+            "title": f"Benchmark video {idx}",
+            "description": "description " * 20,
+            "views": idx * 10,
+            "likes": idx,
+            "comments": idx // 2,
+            "posted": "2025-01-01",
+            "video_length": "0:10:00",
+            "transcript": "transcript words " * 200,
+        }
+        for idx in range(start, start + count)
+    ]
+
+
+def main():
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        save_videos_batch(_records(0, 2000))
+
+    stop = threading.Event()
+    written = [2000]
+    write_errors = []
+
+    def ingest():
+        with app.app_context():
+            while not stop.is_set():
+                try:
+                    save_videos_batch(_records(written[0], 200))
+                    written[0] += 200
+                except Exception as e:  # noqa: BLE001
+                    write_errors.append(e)
+
+    writer = threading.Thread(target=ingest)
+    writer.start()
+    client = app.test_client()
+    latencies = []
+    read_errors = 0
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        response = client.get("/api/data?dataset=videos&pagination=cursor&limit=50")
+        latencies.append(time.perf_counter() - started)
+        read_errors += response.status_code != 200
+    stop.set()
+    writer.join()
+
+    latencies.sort()
+    print(
+        f"journal_mode={journal_mode} reads={len(latencies)} read_errors={read_errors}"
+    )
+    print(
+        f"read latency p50={statistics.median(latencies) * 1000:.1f}ms "
+        f"p95={latencies[int(len(latencies) * 0.95)] * 1000:.1f}ms "
+        f"max={latencies[-1] * 1000:.1f}ms"
+    )
+    print(f"videos written={written[0] - 2000} write_errors={len(write_errors)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,99 @@
+import os
+import hashlib
 import logging
+import time
+from collections import Counter, defaultdict
+from datetime import date, datetime, timedelta, timezone
 
-from models import Channel, ChannelHistory, ChannelVideo, Video, db
+from sqlalchemy import (
+    bindparam,
+    case,
+    func,
+    insert,
+    literal,
+    or_,
+    select,
+    text,
+    true,
+    update,
+)
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from database import single_writer
+from models import (
+    CHANNEL_VIDEOS_COUNTER_PREFIX,
+    COUNTED_MODELS,
+    COUNTER_CHANNEL_HISTORY,
+    COUNTER_CHANNELS,
+    COUNTER_DATA_VERSION,
+    COUNTER_VIDEOS,
+    Channel,
+    ChannelHistory,
+    ChannelStats,
+    ChannelVideo,
+    RowCounter,
+    Video,
+    VideoStatsSnapshot,
+    VideoTranscript,
+    VideoTrend,
+    apply_counter_deltas,
+    channel_videos_counter,
+    compress_text,
+    db,
+    duration_to_seconds,
+    engagement_rates,
+    pack_segments,
+    use_primary,
+)
+from search import SEARCH_FIELDS, sync_search_documents
+from youtube_api import TRANSCRIPT_UNAVAILABLE_MESSAGE
 
 logger = logging.getLogger(__name__)
 
+VIDEO_STATS_MAX_AGE = timedelta(
+    hours=float(os.environ.get("VIDEO_STATS_MAX_AGE_HOURS", "6"))
+)
+TRANSCRIPT_RETRY_AFTER = timedelta(
+    hours=float(os.environ.get("TRANSCRIPT_RETRY_HOURS", "168"))
+)
+# Refreshes closer together than this keep the previous trend sample, so
+# velocities are not measured over a few seconds of noise.
+TRENDING_MIN_INTERVAL = timedelta(
+    minutes=float(os.environ.get("TRENDING_MIN_INTERVAL_MINUTES", "30"))
+)
+TRENDING_SORTS = ("views_per_hour", "acceleration")
+TRANSCRIPT_STATUS_AVAILABLE = "available"
+TRANSCRIPT_STATUS_UNAVAILABLE = "unavailable"
+FRESHNESS_QUERY_CHUNK_SIZE = 500
+CHANGE_TRACKED_COLUMNS = (
+    "title",
+    "views",
+    "likes",
+    "comments",
+    "posted",
+    "duration_seconds",
+    "channel_id",
+    "like_rate",
+    "comment_rate",
+    "engagement_rate",
+)
+# ``channel_stats`` sums and the video column each one adds up.
+CHANNEL_STATS_SUMS = {
+    "total_views": "views",
+    "total_likes": "likes",
+    "total_comments": "comments",
+    "engagement_rate_sum": "engagement_rate",
+}
+# Counts recorded in ``video_stats_snapshots``.
+SNAPSHOT_COLUMNS = ("views", "likes", "comments")
+# Video column whose change means the search field must be rewritten.
+SEARCH_FIELD_COLUMNS = {
+    "title": "title",
+    "description": "description_hash",
+    "transcript": "transcript_hash",
+}
+
 
 def _safe_int(value, default=0):
     try:
@@ -12,8 +102,119 @@ def _safe_int(value, default=0):
         return default
 
 
-def save_video(data):
-    """Idempotently insert/update video data and manage channel subscriber history."""
+def utc_now():
+    """Naive UTC timestamp, matching how DateTime columns are stored."""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _transcript_status(transcript):
+    if not transcript:
+        return None
+    if transcript == TRANSCRIPT_UNAVAILABLE_MESSAGE:
+        return TRANSCRIPT_STATUS_UNAVAILABLE
+    return TRANSCRIPT_STATUS_AVAILABLE
+
+
+def _is_older_than(timestamp, max_age, now):
+    return timestamp is None or now - timestamp >= max_age
+
+
+def get_refresh_plan(youtube_video_ids, now=None):
+    """Decide per video which parts are stale, using one query per id chunk.
+
+    Returns ``{youtube_video_id: {"fetch_stats": bool, "fetch_transcript": bool}}``.
+    Unknown videos need everything; stored stats expire after
+    ``VIDEO_STATS_MAX_AGE``; transcripts are fetched once and only retried when
+    they were missing, unavailable or stored without segment timings for longer
+    than ``TRANSCRIPT_RETRY_AFTER``.
+    """
+    now = now or utc_now()
+    plan = {
+        video_id: {"fetch_stats": True, "fetch_transcript": True}
+        for video_id in youtube_video_ids
+    }
+    video_ids = list(plan)
+
+    for start in range(0, len(video_ids), FRESHNESS_QUERY_CHUNK_SIZE):
+        chunk = video_ids[start : start + FRESHNESS_QUERY_CHUNK_SIZE]
+        rows = (
+            db.session.query(
+                Video.youtube_video_id,
+                Video.last_refreshed_at,
+                Video.transcript_status,
+                Video.transcript_refreshed_at,
+                VideoTranscript.segment_index.is_not(None),
+            )
+            .outerjoin(VideoTranscript, VideoTranscript.video_id == Video.id)
+            .filter(Video.youtube_video_id.in_(chunk))
+        )
+
+        for video_id, refreshed_at, transcript_status, transcript_at, timed in rows:
+            if transcript_status == TRANSCRIPT_STATUS_AVAILABLE and timed:
+                fetch_transcript = False
+            else:
+                fetch_transcript = _is_older_than(
+                    transcript_at, TRANSCRIPT_RETRY_AFTER, now
+                )
+            plan[video_id] = {
+                "fetch_stats": _is_older_than(refreshed_at, VIDEO_STATS_MAX_AGE, now),
+                "fetch_transcript": fetch_transcript,
+            }
+
+    return plan
+
+
+def _upsert_insert(table):
+    """Return a dialect-specific INSERT supporting ON CONFLICT clauses."""
+    dialect_name = db.session.get_bind().dialect.name
+    if dialect_name == "postgresql":
+        return postgresql_insert(table)
+    if dialect_name == "sqlite":
+        return sqlite_insert(table)
+    raise NotImplementedError(f"Bulk upsert is not supported for {dialect_name}.")
+
+
+def _chunked(values, size=FRESHNESS_QUERY_CHUNK_SIZE):
+    values = list(values)
+    for start in range(0, len(values), size):
+        yield values[start : start + size]
+
+
+def _transcript_segments(data):
+    """Timed ``[start, duration, text]`` segments that spell out the transcript.
+
+    Segments are dropped unless their texts joined by spaces reproduce the
+    transcript exactly, since the packed index stores character offsets into it.
+    """
+    segments = data.get("transcript_segments")
+    transcript = data.get("transcript")
+    if not segments or not transcript:
+        return None
+    try:
+        segments = [
+            (float(start), float(duration or 0), str(text))
+            for start, duration, text in segments
+        ]
+    except (TypeError, ValueError):
+        return None
+    if " ".join(text for _start, _duration, text in segments) != transcript:
+        return None
+    return segments
+
+
+def _parse_posted(value):
+    """Publish date from a date or ``YYYY-MM-DD[...]`` string, else ``None``."""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    try:
+        return date.fromisoformat(str(value or "")[:10])
+    except ValueError:
+        return None
+
+
+def _normalize_record(data):
     youtube_video_id = data.get("youtube_video_id")
     if not youtube_video_id:
         raise ValueError("youtube_video_id is required to save video data.")
@@ -22,66 +223,942 @@ def save_video(data):
     if not channel_username:
         raise ValueError("channel_username is required to save video data.")
 
-    subscribers = _safe_int(data.get("subscribers"), 0)
+    return {
+        "youtube_video_id": youtube_video_id,
+        "channel_username": channel_username,
+        "subscribers": _safe_int(data.get("subscribers"), 0),
+        "title": data.get("title", ""),
+        "description": data.get("description", ""),
+        "views": _safe_int(data.get("views"), 0),
+        "likes": _safe_int(data.get("likes"), 0),
+        "comments": _safe_int(data.get("comments"), 0),
+        "posted": _parse_posted(data.get("posted")),
+        "duration_seconds": duration_to_seconds(
+            data.get("duration_seconds")
+            if data.get("duration_seconds") is not None
+            else data.get("video_length")
+        ),
+        # None means "not fetched": the stored transcript is left untouched.
+        "transcript": (data.get("transcript") or "") if "transcript" in data else None,
+        "transcript_segments": _transcript_segments(data),
+    }
 
-    try:
-        channel = Channel.query.filter_by(channel_username=channel_username).first()
-        if channel:
-            previous_subscribers = _safe_int(channel.subscribers, 0)
-            if previous_subscribers != subscribers:
-                db.session.add(
-                    ChannelHistory(
-                        channel_id=channel.id,
-                        previous_subscribers=previous_subscribers,
+
+def _load_existing_channels(usernames):
+    channels = Channel.__table__
+    existing = {}
+    for chunk in _chunked(usernames):
+        rows = db.session.execute(
+            select(
+                channels.c.id, channels.c.channel_username, channels.c.subscribers
+            ).where(channels.c.channel_username.in_(chunk))
+        )
+        existing.update({username: (id_, subs) for id_, username, subs in rows})
+    return existing
+
+
+def _upsert_channels(records, deltas):
+    """Create missing channels, update subscribers and record history in bulk.
+
+    Created channels and history rows are added to the ``deltas`` counter.
+    """
+    channels = Channel.__table__
+    latest_subscribers = {
+        record["channel_username"]: record["subscribers"] for record in records
+    }
+    usernames = list(latest_subscribers)
+    existing = _load_existing_channels(usernames)
+
+    missing = [username for username in usernames if username not in existing]
+    if missing:
+        # Only rows this batch actually inserted are counted; a channel created
+        # concurrently by another writer is skipped by ON CONFLICT DO NOTHING.
+        inserted = db.session.execute(
+            _upsert_insert(channels)
+            .on_conflict_do_nothing(index_elements=["channel_username"])
+            .returning(channels.c.channel_username),
+            [
+                {
+                    "channel_username": username,
+                    "subscribers": latest_subscribers[username],
+                }
+                for username in missing
+            ],
+        )
+        deltas[COUNTER_CHANNELS] += len(inserted.all())
+
+    history_rows = []
+    subscriber_updates = []
+    for username, (channel_id, stored) in existing.items():
+        previous_subscribers = _safe_int(stored, 0)
+        if previous_subscribers != latest_subscribers[username]:
+            history_rows.append(
+                {"channel_id": channel_id, "previous_subscribers": previous_subscribers}
+            )
+            subscriber_updates.append(
+                {"b_id": channel_id, "b_subscribers": latest_subscribers[username]}
+            )
+
+    if history_rows:
+        deltas[COUNTER_CHANNEL_HISTORY] += len(history_rows)
+        db.session.execute(insert(ChannelHistory.__table__), history_rows)
+        db.session.execute(
+            update(channels)
+            .where(channels.c.id == bindparam("b_id"))
+            .values(subscribers=bindparam("b_subscribers")),
+            subscriber_updates,
+        )
+
+    channel_ids = {username: id_ for username, (id_, _subs) in existing.items()}
+    for chunk in _chunked(missing):
+        rows = db.session.execute(
+            select(channels.c.id, channels.c.channel_username).where(
+                channels.c.channel_username.in_(chunk)
+            )
+        )
+        channel_ids.update({username: id_ for id_, username in rows})
+    return channel_ids
+
+
+def content_hash(text):
+    """Short digest used to detect changes in large text columns."""
+    return hashlib.blake2b((text or "").encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _load_existing_videos(youtube_video_ids):
+    videos = Video.__table__
+    transcripts = VideoTranscript.__table__
+    columns = [
+        videos.c.id,
+        videos.c.youtube_video_id,
+        videos.c.description_hash,
+        videos.c.transcript_hash,
+        transcripts.c.segment_index.is_not(None).label("timed_transcript"),
+        *(videos.c[column] for column in CHANGE_TRACKED_COLUMNS),
+    ]
+    existing = {}
+    for chunk in _chunked(youtube_video_ids):
+        rows = db.session.execute(
+            select(*columns)
+            .select_from(videos)
+            .outerjoin(transcripts, transcripts.c.video_id == videos.c.id)
+            .where(videos.c.youtube_video_id.in_(chunk))
+        ).mappings()
+        existing.update({row["youtube_video_id"]: dict(row) for row in rows})
+    return existing
+
+
+def _select_video_ids(youtube_video_ids):
+    videos = Video.__table__
+    video_ids = {}
+    for chunk in _chunked(youtube_video_ids):
+        rows = db.session.execute(
+            select(videos.c.id, videos.c.youtube_video_id).where(
+                videos.c.youtube_video_id.in_(chunk)
+            )
+        )
+        video_ids.update({youtube_video_id: id_ for id_, youtube_video_id in rows})
+    return video_ids
+
+
+def _video_row(record, channel_id, refreshed_at):
+    row = {
+        "youtube_video_id": record["youtube_video_id"],
+        "title": record["title"],
+        "description": record["description"],
+        "description_hash": content_hash(record["description"]),
+        "views": record["views"],
+        "likes": record["likes"],
+        "comments": record["comments"],
+        "posted": record["posted"],
+        "duration_seconds": record["duration_seconds"],
+        "channel_id": channel_id,
+        "last_refreshed_at": refreshed_at,
+        **engagement_rates(record["views"], record["likes"], record["comments"]),
+    }
+    if record["transcript"] is not None:
+        row.update(
+            transcript_hash=content_hash(record["transcript"]),
+            transcript_status=_transcript_status(record["transcript"]),
+            transcript_refreshed_at=refreshed_at,
+        )
+    return row
+
+
+def _changed_columns(row, stored):
+    """Columns of ``row`` that differ from the stored video, large text by hash."""
+    changes = {
+        column: row[column]
+        for column in CHANGE_TRACKED_COLUMNS
+        if row[column] != stored[column]
+    }
+    if row["description_hash"] != stored["description_hash"]:
+        changes["description"] = row["description"]
+        changes["description_hash"] = row["description_hash"]
+    if "transcript_hash" in row and row["transcript_hash"] != stored["transcript_hash"]:
+        changes["transcript_hash"] = row["transcript_hash"]
+        changes["transcript_status"] = row["transcript_status"]
+    return changes
+
+
+def _execute_grouped_updates(updates):
+    """Run one executemany UPDATE per distinct set of changed columns."""
+    videos = Video.__table__
+    groups = {}
+    for video_id, values in updates:
+        groups.setdefault(tuple(sorted(values)), []).append((video_id, values))
+
+    for columns, members in groups.items():
+        db.session.execute(
+            update(videos)
+            .where(videos.c.id == bindparam("b_id"))
+            .values({column: bindparam(f"b_{column}") for column in columns}),
+            [
+                {"b_id": video_id, **{f"b_{k}": v for k, v in values.items()}}
+                for video_id, values in members
+            ],
+        )
+
+
+def _insert_new_videos(rows):
+    """Insert new video rows and return the ids of the rows actually inserted.
+
+    A video inserted concurrently by another writer is not counted as created
+    here; its row is written with an ON CONFLICT DO UPDATE instead.
+    """
+    videos = Video.__table__
+    with_transcript = [row for row in rows if "transcript_hash" in row]
+    without_transcript = [row for row in rows if "transcript_hash" not in row]
+
+    inserted = set()
+    for group in (with_transcript, without_transcript):
+        if not group:
+            continue
+        result = db.session.execute(
+            _upsert_insert(videos)
+            .on_conflict_do_nothing(index_elements=["youtube_video_id"])
+            .returning(videos.c.youtube_video_id),
+            group,
+        )
+        created = set(result.scalars())
+        inserted |= created
+        conflicts = [row for row in group if row["youtube_video_id"] not in created]
+        if not conflicts:
+            continue
+        stmt = _upsert_insert(videos)
+        # Transcript columns that were not fetched are not in the row and stay
+        # as stored.
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["youtube_video_id"],
+            set_={
+                column: stmt.excluded[column]
+                for column in conflicts[0]
+                if column != "youtube_video_id"
+            },
+        )
+        db.session.execute(stmt, conflicts)
+    return inserted
+
+
+def _upsert_transcripts(transcripts):
+    """Write ``{video_id: (text, segments)}`` to ``video_transcripts``.
+
+    Text is compressed and timed segments, when known, are packed into the
+    ``segment_index`` column.
+    """
+    rows = []
+    for video_id, (transcript, segments) in transcripts.items():
+        codec, content = compress_text(transcript)
+        rows.append(
+            {
+                "video_id": video_id,
+                "codec": codec,
+                "content": content,
+                "segment_index": pack_segments(segments) if segments else None,
+            }
+        )
+    if not rows:
+        return
+
+    stmt = _upsert_insert(VideoTranscript.__table__)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["video_id"],
+        set_={
+            column: stmt.excluded[column]
+            for column in ("codec", "content", "segment_index")
+        },
+    )
+    db.session.execute(stmt, rows)
+
+
+def _write_videos(records, channel_ids, existing, refreshed_at):
+    """Insert new videos and write only the changed columns of existing ones.
+
+    Identical rows only get their refresh timestamps bumped. Returns a
+    ``{youtube_video_id: status}`` map of ``created``/``updated``/``unchanged``,
+    the ``{youtube_video_id: (text, segments)}`` transcripts that need writing
+    and the ``{youtube_video_id: {field: text}}`` search fields that changed.
+    """
+    statuses = {}
+    transcripts = {}
+    search_fields = {}
+    new_rows = []
+    updates = []
+
+    for record in records:
+        youtube_video_id = record["youtube_video_id"]
+        row = _video_row(record, channel_ids[record["channel_username"]], refreshed_at)
+        stored = existing.get(youtube_video_id)
+        if stored is None:
+            new_rows.append(row)
+            statuses[youtube_video_id] = "created"
+            if record["transcript"] is not None:
+                transcripts[youtube_video_id] = (
+                    record["transcript"],
+                    record["transcript_segments"],
+                )
+            search_fields[youtube_video_id] = {
+                field: record[field] or "" for field in SEARCH_FIELDS
+            }
+            continue
+
+        changes = _changed_columns(row, stored)
+        # Transcripts stored before segment timings were kept get them the
+        # next time the same text is fetched.
+        if "transcript_hash" in changes or (
+            record["transcript_segments"] and not stored["timed_transcript"]
+        ):
+            transcripts[youtube_video_id] = (
+                record["transcript"],
+                record["transcript_segments"],
+            )
+        changed_text = {
+            field: record[field]
+            for field, column in SEARCH_FIELD_COLUMNS.items()
+            if column in changes
+        }
+        if changed_text:
+            search_fields[youtube_video_id] = changed_text
+        statuses[youtube_video_id] = "updated" if changes else "unchanged"
+        changes["last_refreshed_at"] = refreshed_at
+        if "transcript_refreshed_at" in row:
+            changes["transcript_refreshed_at"] = refreshed_at
+        updates.append((stored["id"], changes))
+
+    if new_rows:
+        inserted = _insert_new_videos(new_rows)
+        for row in new_rows:
+            if row["youtube_video_id"] not in inserted:
+                statuses[row["youtube_video_id"]] = "updated"
+    if updates:
+        _execute_grouped_updates(updates)
+
+    return statuses, transcripts, search_fields
+
+
+def _count_video_writes(records, channel_ids, existing, statuses, deltas):
+    for record in records:
+        channel_id = channel_ids[record["channel_username"]]
+        stored = existing.get(record["youtube_video_id"])
+        if statuses[record["youtube_video_id"]] == "created":
+            deltas[COUNTER_VIDEOS] += 1
+            deltas[channel_videos_counter(channel_id)] += 1
+        elif stored is None:
+            # Inserted concurrently by another writer, which counted it.
+            continue
+        elif stored["channel_id"] != channel_id:
+            if stored["channel_id"] is not None:
+                deltas[channel_videos_counter(stored["channel_id"])] -= 1
+            deltas[channel_videos_counter(channel_id)] += 1
+
+
+def _append_stats_snapshots(records, existing, video_ids, captured_at):
+    """Append a stats snapshot for new videos and videos whose counts moved."""
+    snapshots = [
+        {
+            "video_id": video_ids[record["youtube_video_id"]],
+            "captured_at": captured_at,
+            **{column: record[column] for column in SNAPSHOT_COLUMNS},
+        }
+        for record in records
+        if record["youtube_video_id"] not in existing
+        or any(
+            record[column] != existing[record["youtube_video_id"]][column]
+            for column in SNAPSHOT_COLUMNS
+        )
+    ]
+    if snapshots:
+        db.session.execute(
+            _upsert_insert(VideoStatsSnapshot.__table__).on_conflict_do_nothing(
+                index_elements=["video_id", "captured_at"]
+            ),
+            snapshots,
+        )
+
+
+def _update_video_trends(records, video_ids, sampled_at):
+    """Move each video's ``video_trends`` row to the views seen in this batch.
+
+    Velocity is measured against the previous sample and acceleration against
+    the previous velocity; a video's first sample only records its views.
+    """
+    trends = VideoTrend.__table__
+    views = {
+        video_ids[record["youtube_video_id"]]: record["views"] for record in records
+    }
+    previous = {}
+    for chunk in _chunked(views):
+        previous.update(
+            {
+                row.video_id: row
+                for row in db.session.execute(
+                    select(trends).where(trends.c.video_id.in_(chunk))
+                )
+            }
+        )
+
+    rows = []
+    for video_id, current in views.items():
+        row = {
+            "video_id": video_id,
+            "sampled_at": sampled_at,
+            "views": current,
+            "views_per_hour": None,
+            "acceleration": None,
+        }
+        before = previous.get(video_id)
+        if before is not None:
+            elapsed = sampled_at - before.sampled_at
+            if elapsed < TRENDING_MIN_INTERVAL:
+                continue
+            row["views_per_hour"] = _per_hour(current - before.views, elapsed)
+            if before.views_per_hour is not None and row["views_per_hour"] is not None:
+                row["acceleration"] = _per_hour(
+                    row["views_per_hour"] - before.views_per_hour, elapsed
+                )
+        rows.append(row)
+    if rows:
+        stmt = _upsert_insert(trends)
+        db.session.execute(
+            stmt.on_conflict_do_update(
+                index_elements=["video_id"],
+                set_={
+                    column: stmt.excluded[column]
+                    for column in rows[0]
+                    if column != "video_id"
+                },
+            ),
+            rows,
+        )
+
+
+def _channel_stats_values(record):
+    values = {
+        column: record[column] for column in ("views", "likes", "comments", "posted")
+    }
+    values["engagement_rate"] = engagement_rates(
+        record["views"], record["likes"], record["comments"]
+    )["engagement_rate"]
+    return values
+
+
+def _update_channel_stats(records, channel_ids, existing, statuses):
+    """Apply the batch's changes to the ``channel_stats`` rollups.
+
+    Sums and counts of existing rollups move by deltas and their median is
+    re-read from the ``(channel_id, views)`` index. Missing rollups are left
+    alone (they are computed on first read, like the row counters); ones
+    whose latest upload may have moved back, or that another writer touched
+    concurrently, are dropped to be recomputed.
+    """
+    deltas = defaultdict(Counter)
+    latest_upload = {}
+    recompute = set()
+    for record in records:
+        channel_id = channel_ids[record["channel_username"]]
+        values = _channel_stats_values(record)
+        stored = existing.get(record["youtube_video_id"])
+        if stored is None and statuses[record["youtube_video_id"]] != "created":
+            # The video was inserted concurrently; its old values are unknown.
+            recompute.add(channel_id)
+            continue
+        if stored is not None:
+            if stored["channel_id"] == channel_id and all(
+                stored[column] == value for column, value in values.items()
+            ):
+                continue
+            previous = deltas[stored["channel_id"]]
+            previous["video_count"] -= 1
+            for total, column in CHANNEL_STATS_SUMS.items():
+                previous[total] -= stored[column] or 0
+            if stored["posted"] is not None and (
+                stored["channel_id"] != channel_id
+                or stored["posted"] != values["posted"]
+            ):
+                recompute.add(stored["channel_id"])
+        current = deltas[channel_id]
+        current["video_count"] += 1
+        for total, column in CHANNEL_STATS_SUMS.items():
+            current[total] += values[column] or 0
+        if values["posted"] is not None:
+            latest_upload[channel_id] = max(
+                values["posted"], latest_upload.get(channel_id, values["posted"])
+            )
+    deltas.pop(None, None)
+    recompute.discard(None)
+    if not deltas and not recompute:
+        return
+
+    stats = ChannelStats.__table__
+    computed = set()
+    for chunk in _chunked(deltas.keys() | recompute):
+        computed.update(
+            db.session.execute(
+                select(stats.c.channel_id).where(stats.c.channel_id.in_(chunk))
+            ).scalars()
+        )
+    stale = recompute & computed
+    if stale:
+        db.session.execute(stats.delete().where(stats.c.channel_id.in_(stale)))
+        computed -= stale
+    if computed:
+        db.session.execute(
+            update(stats)
+            .where(stats.c.channel_id == bindparam("b_channel_id"))
+            .values(
+                video_count=stats.c.video_count + bindparam("b_video_count"),
+                **{
+                    total: stats.c[total] + bindparam(f"b_{total}")
+                    for total in CHANNEL_STATS_SUMS
+                },
+                latest_upload=case(
+                    (
+                        or_(
+                            stats.c.latest_upload.is_(None),
+                            stats.c.latest_upload < bindparam("b_latest_upload"),
+                        ),
+                        bindparam("b_latest_upload"),
+                    ),
+                    else_=stats.c.latest_upload,
+                ),
+            ),
+            [
+                {
+                    "b_channel_id": channel_id,
+                    "b_video_count": deltas[channel_id]["video_count"],
+                    **{
+                        f"b_{total}": deltas[channel_id][total]
+                        for total in CHANNEL_STATS_SUMS
+                    },
+                    "b_latest_upload": latest_upload.get(channel_id),
+                }
+                for channel_id in computed
+            ],
+        )
+        medians = _channel_median_views(computed)
+        db.session.execute(
+            update(stats)
+            .where(stats.c.channel_id == bindparam("b_channel_id"))
+            .values(median_views=bindparam("b_median_views")),
+            [
+                {"b_channel_id": channel_id, "b_median_views": medians.get(channel_id)}
+                for channel_id in computed
+            ],
+        )
+
+
+def save_videos_batch(records):
+    """Upsert many videos in one transaction with set-based statements.
+
+    Channels, subscriber history, videos, compressed transcripts, stats
+    snapshots and channel links are each written with a handful of bulk
+    statements instead of per-row SELECT/flush round trips. Existing videos
+    are compared with the stored row so only changed columns are written.
+    Returns one ``{"youtube_video_id", "video_id", "created", "status"}`` dict
+    per input record, in input order. Duplicate video ids within a batch
+    resolve to the last record.
+    """
+    normalized = [_normalize_record(data) for data in records]
+    if not normalized:
+        return []
+
+    latest_by_video = {record["youtube_video_id"]: record for record in normalized}
+    unique_records = list(latest_by_video.values())
+
+    with use_primary(), single_writer():
+        try:
+            refreshed_at = utc_now()
+            deltas = Counter()
+            channel_ids = _upsert_channels(unique_records, deltas)
+            existing = _load_existing_videos(latest_by_video)
+            statuses, transcripts, search_fields = _write_videos(
+                unique_records, channel_ids, existing, refreshed_at
+            )
+            _count_video_writes(unique_records, channel_ids, existing, statuses, deltas)
+            _update_channel_stats(unique_records, channel_ids, existing, statuses)
+
+            video_ids = {key: stored["id"] for key, stored in existing.items()}
+            video_ids.update(
+                _select_video_ids([key for key in statuses if key not in existing])
+            )
+            _upsert_transcripts(
+                {video_ids[key]: transcript for key, transcript in transcripts.items()}
+            )
+            _append_stats_snapshots(unique_records, existing, video_ids, refreshed_at)
+            _update_video_trends(unique_records, video_ids, refreshed_at)
+            sync_search_documents(
+                created={
+                    video_ids[key]: fields
+                    for key, fields in search_fields.items()
+                    if statuses[key] == "created"
+                },
+                updated={
+                    video_ids[key]: fields
+                    for key, fields in search_fields.items()
+                    if statuses[key] != "created"
+                },
+            )
+
+            new_links = [
+                {
+                    "video_id": video_ids[record["youtube_video_id"]],
+                    "channel_id": channel_ids[record["channel_username"]],
+                }
+                for record in unique_records
+                if record["youtube_video_id"] not in existing
+                or existing[record["youtube_video_id"]]["channel_id"]
+                != channel_ids[record["channel_username"]]
+            ]
+            if new_links:
+                db.session.execute(
+                    _upsert_insert(ChannelVideo.__table__).on_conflict_do_nothing(
+                        index_elements=["video_id", "channel_id"]
+                    ),
+                    new_links,
+                )
+
+            # Every save at least moves last_refreshed_at, which exports include.
+            deltas[COUNTER_DATA_VERSION] += 1
+            apply_counter_deltas(db.session.connection(), deltas)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logger.exception("An error occurred: %s", str(e))
+            raise
+
+    return [
+        {
+            "youtube_video_id": record["youtube_video_id"],
+            "video_id": video_ids[record["youtube_video_id"]],
+            "created": statuses[record["youtube_video_id"]] == "created",
+            "status": statuses[record["youtube_video_id"]],
+        }
+        for record in normalized
+    ]
+
+
+def save_video(data):
+    """Idempotently insert/update video data and manage channel subscriber history."""
+    result = save_videos_batch([data])[0]
+    return {"video_id": result["video_id"], "created": result["created"]}
+
+
+def _count_from_source(name):
+    """Scalar subquery computing the value ``name`` is seeded with."""
+    models_by_counter = {counter: model for model, counter in COUNTED_MODELS.items()}
+    channel_id = name.removeprefix(CHANNEL_VIDEOS_COUNTER_PREFIX)
+    if name in models_by_counter:
+        query = select(func.count()).select_from(models_by_counter[name].__table__)
+    elif channel_id != name and channel_id.isdigit():
+        query = select(func.count(Video.id)).where(Video.channel_id == int(channel_id))
+    elif name == COUNTER_DATA_VERSION:
+        # Seeded from the clock so a recreated database never repeats a
+        # version that an old export artifact was built from.
+        query = select(literal(time.time_ns() // 1000))
+    else:
+        raise ValueError(f"Unknown counter: {name}")
+    return query.scalar_subquery()
+
+
+def get_row_counts(names):
+    """Return ``{name: value}`` from the maintained counters.
+
+    A counter that does not exist yet is seeded once from ``COUNT(*)`` on the
+    primary, even inside ``read_replica()``; after that the save path and ORM
+    flushes keep it current in the same transaction as the rows they write.
+    """
+    counters = RowCounter.__table__
+
+    def load(names):
+        return dict(
+            db.session.execute(
+                select(counters.c.name, counters.c.value).where(
+                    counters.c.name.in_(names)
+                )
+            ).all()
+        )
+
+    names = list(dict.fromkeys(names))
+    values = load(names)
+    missing = [name for name in names if name not in values]
+    if missing:
+        with use_primary(), single_writer():
+            if db.session.get_bind().dialect.name == "postgresql":
+                # Counter updates of batches still in flight wait for the seed
+                # to commit, so none of them can miss the new row while the
+                # COUNT below misses their rows.
+                db.session.execute(
+                    text("LOCK TABLE row_counters IN SHARE ROW EXCLUSIVE MODE")
+                )
+            for name in missing:
+                # COUNT and INSERT in one statement read one snapshot.
+                db.session.execute(
+                    _upsert_insert(counters)
+                    .from_select(
+                        ["name", "value"],
+                        # SQLite needs the WHERE to parse ON CONFLICT after SELECT.
+                        select(literal(name), _count_from_source(name)).where(true()),
                     )
+                    .on_conflict_do_nothing(index_elements=["name"])
+                )
+            db.session.commit()
+            values.update(load(missing))
+    return {name: values[name] for name in names}
+
+
+def _channel_median_views(channel_ids):
+    """``{channel_id: median views}`` read from the ``(channel_id, views)`` index."""
+    videos = Video.__table__
+    medians = {}
+    for chunk in _chunked(channel_ids):
+        ranked = (
+            select(
+                videos.c.channel_id,
+                videos.c.views,
+                func.row_number()
+                .over(partition_by=videos.c.channel_id, order_by=videos.c.views)
+                .label("position"),
+                # Same ordering as above so both windows share one index scan.
+                func.count()
+                .over(
+                    partition_by=videos.c.channel_id,
+                    order_by=videos.c.views,
+                    rows=(None, None),
+                )
+                .label("total"),
+            )
+            .where(videos.c.channel_id.in_(chunk), videos.c.views.is_not(None))
+            .subquery()
+        )
+        # The middle row, or the middle two to average for an even count.
+        rows = db.session.execute(
+            select(ranked.c.channel_id, func.avg(ranked.c.views))
+            .where(
+                ranked.c.position.in_(
+                    [(ranked.c.total + 1) // 2, (ranked.c.total + 2) // 2]
                 )
-                channel.subscribers = subscribers
-        else:
-            channel = Channel(
-                channel_username=channel_username, subscribers=subscribers
             )
-            db.session.add(channel)
-            db.session.flush()
-
-        video = Video.query.filter_by(youtube_video_id=youtube_video_id).first()
-
-        if video:
-            video.title = data.get("title", "")
-            video.description = data.get("description", "")
-            video.views = _safe_int(data.get("views"), 0)
-            video.likes = _safe_int(data.get("likes"), 0)
-            video.comments = _safe_int(data.get("comments"), 0)
-            video.posted = data.get("posted", "")
-            video.video_length = data.get("video_length", "")
-            video.transcript = data.get("transcript", "")
-            video.channel_id = channel.id
-            created = False
-        else:
-            video = Video(
-                title=data.get("title", ""),
-                description=data.get("description", ""),
-                views=_safe_int(data.get("views"), 0),
-                likes=_safe_int(data.get("likes"), 0),
-                comments=_safe_int(data.get("comments"), 0),
-                posted=data.get("posted", ""),
-                video_length=data.get("video_length", ""),
-                transcript=data.get("transcript", ""),
-                channel_id=channel.id,
-                youtube_video_id=youtube_video_id,
+            .group_by(ranked.c.channel_id)
+        )
+        medians.update(
+            {
+                channel_id: float(median)
+                for channel_id, median in rows
+                if median is not None
+            }
+        )
+    return medians
+
+
+def refresh_channel_stats(channel_ids=None):
+    """Recompute the ``channel_stats`` of ``channel_ids`` (all when ``None``).
+
+    Runs in the caller's transaction; returns the number of rollups written.
+    """
+    channels = Channel.__table__
+    videos = Video.__table__
+    stats = ChannelStats.__table__
+    if channel_ids is None:
+        channel_ids = db.session.execute(select(channels.c.id)).scalars().all()
+
+    written = 0
+    for chunk in _chunked(channel_ids):
+        totals = (
+            select(
+                videos.c.channel_id,
+                func.count(videos.c.id).label("video_count"),
+                *(
+                    func.coalesce(func.sum(videos.c[column]), 0).label(total)
+                    for total, column in CHANNEL_STATS_SUMS.items()
+                ),
+                func.max(videos.c.posted).label("latest_upload"),
             )
-            db.session.add(video)
-            db.session.flush()
-            created = True
-
-        existing_link = ChannelVideo.query.filter_by(
-            video_id=video.id, channel_id=channel.id
-        ).first()
-        if not existing_link:
-            db.session.add(ChannelVideo(video_id=video.id, channel_id=channel.id))
-
-        db.session.commit()
-        return {"video_id": video.id, "created": created}
-    except Exception as e:
-        db.session.rollback()
-        logger.exception("An error occurred: %s", str(e))
-        raise
+            .where(videos.c.channel_id.in_(chunk))
+            .group_by(videos.c.channel_id)
+            .subquery()
+        )
+        rows = db.session.execute(
+            select(channels.c.id, totals)
+            .outerjoin(totals, totals.c.channel_id == channels.c.id)
+            .where(channels.c.id.in_(chunk))
+        ).mappings()
+        medians = _channel_median_views(chunk)
+        values = [
+            {
+                "channel_id": row["id"],
+                "video_count": row["video_count"] or 0,
+                **{total: row[total] or 0 for total in CHANNEL_STATS_SUMS},
+                "median_views": medians.get(row["id"]),
+                "latest_upload": row["latest_upload"],
+            }
+            for row in rows
+        ]
+        if not values:
+            continue
+        stmt = _upsert_insert(stats)
+        db.session.execute(
+            stmt.on_conflict_do_update(
+                index_elements=["channel_id"],
+                set_={
+                    column: stmt.excluded[column]
+                    for column in values[0]
+                    if column != "channel_id"
+                },
+            ),
+            values,
+        )
+        written += len(values)
+    return written
+
+
+def _serialize_channel_stats(row):
+    count = row["video_count"]
+    return {
+        "channel_id": row["channel_id"],
+        "video_count": count,
+        "total_views": row["total_views"],
+        "total_likes": row["total_likes"],
+        "total_comments": row["total_comments"],
+        "avg_views": round(row["total_views"] / count, 2) if count else None,
+        "median_views": row["median_views"],
+        "avg_engagement_rate": (
+            round(row["engagement_rate_sum"] / count, 2) if count else None
+        ),
+        "latest_upload": (
+            row["latest_upload"].isoformat() if row["latest_upload"] else None
+        ),
+    }
+
+
+def get_channel_stats(channel_ids):
+    """Return ``{channel_id: stats}`` from the ``channel_stats`` rollups.
+
+    Like the row counters, a rollup that does not exist yet is computed once
+    from ``videos`` on the primary; afterwards the save path keeps it current.
+    """
+    stats = ChannelStats.__table__
+    channel_ids = list(dict.fromkeys(channel_ids))
+
+    def load(ids):
+        return {
+            row["channel_id"]: _serialize_channel_stats(row)
+            for row in db.session.execute(
+                select(stats).where(stats.c.channel_id.in_(ids))
+            ).mappings()
+        }
+
+    values = load(channel_ids)
+    missing = [channel_id for channel_id in channel_ids if channel_id not in values]
+    if missing:
+        # Read back from the primary too: a replica may not have them yet.
+        with use_primary():
+            if refresh_channel_stats(missing):
+                db.session.commit()
+                values.update(load(missing))
+    return values
+
+
+def _per_hour(change, elapsed):
+    hours = elapsed.total_seconds() / 3600
+    return round(change / hours, 2) if hours > 0 else None
+
+
+def get_video_stats_series(video_id, since=None, until=None, limit=500):
+    """Stats snapshots of one video with view and like velocity.
+
+    Returns ``None`` for an unknown video, otherwise the latest ``limit``
+    snapshots inside ``[since, until]`` oldest first. Each point carries
+    ``views_per_hour``/``likes_per_hour`` relative to the snapshot before it
+    (``None`` for the first snapshot that has no predecessor in the read).
+    """
+    videos = Video.__table__
+    youtube_video_id = db.session.execute(
+        select(videos.c.youtube_video_id).where(videos.c.id == video_id)
+    ).scalar()
+    if youtube_video_id is None:
+        return None
+
+    snapshots = VideoStatsSnapshot.__table__
+    stmt = select(
+        snapshots.c.captured_at, *(snapshots.c[column] for column in SNAPSHOT_COLUMNS)
+    ).where(snapshots.c.video_id == video_id)
+    if since is not None:
+        stmt = stmt.where(snapshots.c.captured_at >= since)
+    if until is not None:
+        stmt = stmt.where(snapshots.c.captured_at <= until)
+    # One extra row, when it exists, is the baseline for the first velocity.
+    rows = db.session.execute(
+        stmt.order_by(snapshots.c.captured_at.desc()).limit(limit + 1)
+    ).all()
+    rows.reverse()
+    baseline = rows.pop(0) if len(rows) > limit else None
+
+    points = []
+    for row in rows:
+        point = {
+            "captured_at": row.captured_at.isoformat(),
+            "views": row.views,
+            "likes": row.likes,
+            "comments": row.comments,
+            "views_per_hour": None,
+            "likes_per_hour": None,
+        }
+        if baseline is not None:
+            elapsed = row.captured_at - baseline.captured_at
+            point["views_per_hour"] = _per_hour(row.views - baseline.views, elapsed)
+            point["likes_per_hour"] = _per_hour(row.likes - baseline.likes, elapsed)
+        points.append(point)
+        baseline = row
+    return {"youtube_video_id": youtube_video_id, "points": points}
+
+
+def get_trending_videos(sort="views_per_hour", since=None, limit=20):
+    """Videos gaining views fastest, read from the ``video_trends`` index.
+
+    ``sort`` is ``views_per_hour`` or ``acceleration``; videos whose last
+    sample is older than ``since`` are skipped so stale velocities drop out.
+    """
+    if sort not in TRENDING_SORTS:
+        raise ValueError(f"Unknown trending sort: {sort}")
+    trends = VideoTrend.__table__
+    videos = Video.__table__
+    channels = Channel.__table__
+    stmt = (
+        select(
+            trends.c.video_id,
+            videos.c.youtube_video_id,
+            videos.c.title,
+            channels.c.channel_username,
+            trends.c.views,
+            trends.c.views_per_hour,
+            trends.c.acceleration,
+            trends.c.sampled_at,
+        )
+        .join(videos, videos.c.id == trends.c.video_id)
+        .outerjoin(channels, channels.c.id == videos.c.channel_id)
+        .where(trends.c[sort].is_not(None))
+    )
+    if since is not None:
+        stmt = stmt.where(trends.c.sampled_at >= since)
+    rows = db.session.execute(stmt.order_by(trends.c[sort].desc()).limit(limit))
+    return [{**row._asdict(), "sampled_at": row.sampled_at.isoformat()} for row in rows]
@@ -0,0 +1,138 @@
+import os
+from contextlib import contextmanager
+
+from flask import has_request_context
+from sqlalchemy import event, text
+
+from models import REPLICA_BIND, RoutingSession, db
+
+try:
+    import fcntl
+except ModuleNotFoundError:  # pragma: no cover - Windows
+    fcntl = None
+
+# SQLite engine profile. WAL lets readers keep going while a writer commits;
+# NORMAL synchronous is durable in WAL mode except across power loss.
+SQLITE_JOURNAL_MODE = os.environ.get("SQLITE_JOURNAL_MODE", "WAL").upper()
+SQLITE_SYNCHRONOUS = os.environ.get("SQLITE_SYNCHRONOUS", "NORMAL").upper()
+SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get("SQLITE_BUSY_TIMEOUT_MS", "15000"))
+SQLITE_CACHE_SIZE_KIB = int(os.environ.get("SQLITE_CACHE_SIZE_KIB", "65536"))
+SQLITE_MMAP_SIZE_BYTES = int(os.environ.get("SQLITE_MMAP_SIZE_BYTES", "268435456"))
+# Pooled server databases (PostgreSQL in compose).
+DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.environ.get("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT_SECONDS = int(os.environ.get("DB_POOL_TIMEOUT_SECONDS", "30"))
+DB_POOL_RECYCLE_SECONDS = int(os.environ.get("DB_POOL_RECYCLE_SECONDS", "1800"))
+DB_STATEMENT_TIMEOUT_MS = int(os.environ.get("DB_STATEMENT_TIMEOUT_MS", "30000"))
+DATABASE_REPLICA_URL = os.environ.get("DATABASE_REPLICA_URL")
+# Serialize write transactions of every process sharing the database file.
+SQLITE_SINGLE_WRITER = os.environ.get("SQLITE_SINGLE_WRITER", "").lower() in {
+    "1",
+    "true",
+    "yes",
+    "on",
+}
+
+
+def _sqlite_pragmas():
+    return (
+        f"PRAGMA journal_mode={SQLITE_JOURNAL_MODE}",
+        f"PRAGMA synchronous={SQLITE_SYNCHRONOUS}",
+        f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}",
+        # Negative sizes are KiB rather than pages.
+        f"PRAGMA cache_size=-{SQLITE_CACHE_SIZE_KIB}",
+        f"PRAGMA mmap_size={SQLITE_MMAP_SIZE_BYTES}",
+        "PRAGMA temp_store=MEMORY",
+    )
+
+
+def _apply_sqlite_pragmas(dbapi_connection, _connection_record):
+    cursor = dbapi_connection.cursor()
+    try:
+        for pragma in _sqlite_pragmas():
+            cursor.execute(pragma)
+    finally:
+        cursor.close()
+
+
+def engine_options(database_uri):
+    """``SQLALCHEMY_ENGINE_OPTIONS`` for the configured database."""
+    if database_uri.startswith("sqlite"):
+        # The driver-level timeout covers the initial connect; the pragma
+        # covers lock waits inside statements.
+        return {"connect_args": {"timeout": SQLITE_BUSY_TIMEOUT_MS / 1000}}
+
+    options = {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT_SECONDS,
+        # Connections idle past server/proxy timeouts are replaced, and
+        # pre-ping drops ones that died in the pool (failover, restarts).
+        "pool_recycle": DB_POOL_RECYCLE_SECONDS,
+        "pool_pre_ping": True,
+    }
+    return options
+
+
+def _apply_statement_timeout(_session, _transaction, connection):
+    # Only web requests are limited; migrations, CLI maintenance and background
+    # jobs share the engines and may run long statements on purpose.
+    if (
+        DB_STATEMENT_TIMEOUT_MS > 0
+        and connection.dialect.name == "postgresql"
+        and has_request_context()
+    ):
+        connection.execute(
+            text("SELECT set_config('statement_timeout', :timeout, true)"),
+            {"timeout": str(DB_STATEMENT_TIMEOUT_MS)},
+        )
+
+
+def engine_binds(replica_uri=None):
+    """``SQLALCHEMY_BINDS`` with the read replica when one is configured."""
+    replica_uri = replica_uri or DATABASE_REPLICA_URL
+    if not replica_uri:
+        return {}
+    return {REPLICA_BIND: {"url": replica_uri, **engine_options(replica_uri)}}
+
+
+def configure_engines(app):
+    """Install per-connection settings on the engines ``db`` created for ``app``."""
+    if not event.contains(RoutingSession, "after_begin", _apply_statement_timeout):
+        event.listen(RoutingSession, "after_begin", _apply_statement_timeout)
+    with app.app_context():
+        for engine in db.engines.values():
+            if engine.dialect.name == "sqlite" and not event.contains(
+                engine, "connect", _apply_sqlite_pragmas
+            ):
+                event.listen(engine, "connect", _apply_sqlite_pragmas)
+
+
+def _writer_lock_path():
+    engine = db.session.get_bind()
+    if engine.dialect.name != "sqlite" or fcntl is None:
+        return None
+    database = engine.url.database
+    if not database or database == ":memory:" or database.startswith("file:"):
+        return None
+    return f"{database}.writer.lock"
+
+
+@contextmanager
+def single_writer():
+    """Hold the cross-process writer lock when ``SQLITE_SINGLE_WRITER`` is on.
+
+    Writers queue on an ``flock`` next to the database file instead of racing
+    for SQLite's lock and failing with "database is locked" once the busy
+    timeout runs out. A no-op for other databases.
+    """
+    path = _writer_lock_path() if SQLITE_SINGLE_WRITER else None
+    if path is None:
+        yield
+        return
+    with open(path, "a") as handle:
+        fcntl.flock(handle, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(handle, fcntl.LOCK_UN)
@@ -1,86 +1,438 @@
 import csv
 import io
+import json
+import os
+import re
 import tempfile
+from datetime import date, datetime, time, timedelta
 
 from openpyxl import Workbook
-from sqlalchemy import text
+from sqlalchemy import (
+    Boolean,
+    Date,
+    DateTime,
+    Float,
+    Integer,
+    LargeBinary,
+    Numeric,
+    select,
+)
 
-from models import db
+from crud import get_row_counts
+from models import (
+    COUNTER_DATA_VERSION,
+    Channel,
+    ChannelHistory,
+    ChannelVideo,
+    Video,
+    VideoTranscript,
+    db,
+    decompress_text,
+    read_replica,
+    use_primary,
+)
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ModuleNotFoundError:
+    pyarrow = None
 
 EXPORT_TABLES = ("videos", "channels", "channel_videos", "channel_history")
-TABLE_SELECT_QUERIES = {
-    "videos": "SELECT * FROM videos",
-    "channels": "SELECT * FROM channels",
-    "channel_videos": "SELECT * FROM channel_videos",
-    "channel_history": "SELECT * FROM channel_history",
+EXPORT_FORMATS = ("csv", "ndjson", "xlsx", "parquet")
+EXPORT_TABLE_MODELS = {
+    "videos": Video,
+    "channels": Channel,
+    "channel_videos": ChannelVideo,
+    "channel_history": ChannelHistory,
+}
+# Column each table is filtered on for ``channel_id``.
+CHANNEL_FILTER_COLUMNS = {
+    "videos": "channel_id",
+    "channels": "id",
+    "channel_videos": "channel_id",
+    "channel_history": "channel_id",
 }
+# Column each table is filtered on for the ``since``/``until`` date range;
+# tables without one are not limited by it.
+DATE_FILTER_COLUMNS = {"videos": "posted", "channel_history": "recorded_at"}
+# Transcripts live compressed in video_transcripts; they are joined back in
+# and decompressed so exports keep a plain ``transcript`` column.
+TRANSCRIPT_COLUMN = "transcript"
 DB_FETCH_CHUNK_SIZE = 1000
+# Rows per Parquet row group; each group is flushed to the response as it fills.
+PARQUET_ROW_GROUP_SIZE = 50000
+PARQUET_COMPRESSION = "zstd"
+# Shared by the web app and the RQ worker (mounted as a volume in Docker).
+EXPORT_ARTIFACT_DIR = os.environ.get(
+    "EXPORT_ARTIFACT_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "exports"),
+)
 
 
-def execute_table_query(table_name):
-    query = TABLE_SELECT_QUERIES.get(table_name)
-    if query is None:
+def export_columns(table_name):
+    """Every column an export of ``table_name`` can include, in export order."""
+    model = EXPORT_TABLE_MODELS.get(table_name)
+    if model is None:
         raise ValueError(f"Unsupported table name: {table_name}")
-    return db.session.execute(text(query))
+    columns = [column.name for column in model.__table__.columns]
+    if table_name == "videos":
+        columns.append(TRANSCRIPT_COLUMN)
+    return columns
 
 
-def iter_table_csv(table_name):
-    result = execute_table_query(table_name)
-    columns = list(result.keys())
+def export_column_names(table_name, columns=None):
+    """The exported columns of ``table_name``: ``columns`` in table order, or all."""
+    names = export_columns(table_name)
+    if columns is None:
+        return names
+    return [name for name in names if name in columns]
 
-    buffer = io.StringIO()
-    writer = csv.writer(buffer)
 
-    writer.writerow(columns)
-    yield buffer.getvalue()
-    buffer.seek(0)
-    buffer.truncate(0)
+def table_query(table_name, columns=None, channel_id=None, since=None, until=None):
+    """SELECT for one export table, projected to ``columns`` and filtered.
+
+    ``channel_id`` keeps the rows of one channel; ``since``/``until`` are
+    inclusive dates applied to the table's ``DATE_FILTER_COLUMNS`` entry.
+    The transcript is selected as ``codec``/``content`` after the other
+    columns, and only when it is exported.
+    """
+    table = EXPORT_TABLE_MODELS[table_name].__table__
+    names = export_column_names(table_name, columns)
+    selected = [table.c[name] for name in names if name != TRANSCRIPT_COLUMN]
+    if TRANSCRIPT_COLUMN in names:
+        transcripts = VideoTranscript.__table__
+        stmt = select(
+            *selected, transcripts.c.codec, transcripts.c.content
+        ).select_from(
+            table.outerjoin(transcripts, transcripts.c.video_id == table.c.id)
+        )
+    else:
+        stmt = select(*selected)
+
+    if channel_id is not None:
+        stmt = stmt.where(table.c[CHANNEL_FILTER_COLUMNS[table_name]] == channel_id)
+    date_column = DATE_FILTER_COLUMNS.get(table_name)
+    if date_column is not None:
+        column = table.c[date_column]
+        if isinstance(column.type, DateTime):
+            # Timestamps cover whole days: midnight of ``since`` up to, but
+            # excluding, midnight after ``until``.
+            if since is not None:
+                stmt = stmt.where(column >= datetime.combine(since, time.min))
+            if until is not None:
+                stmt = stmt.where(
+                    column < datetime.combine(until + timedelta(days=1), time.min)
+                )
+        else:
+            if since is not None:
+                stmt = stmt.where(column >= since)
+            if until is not None:
+                stmt = stmt.where(column <= until)
+    return stmt
 
+
+def execute_table_query(table_name, **options):
+    # Large reads stream through a server-side cursor where the driver has one.
+    return db.session.execute(
+        table_query(table_name, **options),
+        execution_options={"stream_results": True, "yield_per": DB_FETCH_CHUNK_SIZE},
+    )
+
+
+def iter_table_chunks(table_name, **options):
+    """Rows of one export table as lists of tuples, ``DB_FETCH_CHUNK_SIZE`` at a time.
+
+    Values follow ``export_column_names`` with the transcript decompressed.
+    """
+    with_transcript = TRANSCRIPT_COLUMN in export_column_names(
+        table_name, options.get("columns")
+    )
+    result = execute_table_query(table_name, **options)
     try:
         while True:
             rows = result.fetchmany(DB_FETCH_CHUNK_SIZE)
             if not rows:
                 break
-
-            writer.writerows(tuple(row) for row in rows)
-            yield buffer.getvalue()
-            buffer.seek(0)
-            buffer.truncate(0)
+            if with_transcript:
+                yield [
+                    (*values, decompress_text(codec, content))
+                    for *values, codec, content in rows
+                ]
+            else:
+                yield [tuple(row) for row in rows]
     finally:
         result.close()
 
 
-def stream_all_tables_csv():
-    for table_name in EXPORT_TABLES:
-        yield f"=== {table_name.upper()} ===\n"
-        yield from iter_table_csv(table_name)
-        yield "\n"
+def iter_table_csv(table_name, **options):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    writer.writerow(export_column_names(table_name, options.get("columns")))
+    yield buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate(0)
+
+    for rows in iter_table_chunks(table_name, **options):
+        writer.writerows(rows)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate(0)
+
+
+def _json_value(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    raise TypeError(f"Cannot export {type(value).__name__} as JSON")
+
+
+def iter_table_ndjson(table_name, **options):
+    """One JSON object per row, tagged with its ``table``."""
+    names = export_column_names(table_name, options.get("columns"))
+    for rows in iter_table_chunks(table_name, **options):
+        yield "".join(
+            json.dumps(
+                {"table": table_name, **dict(zip(names, row))}, default=_json_value
+            )
+            + "\n"
+            for row in rows
+        )
+
+
+def parquet_supported():
+    return pyarrow is not None
+
+
+def _arrow_type(column_type):
+    if isinstance(column_type, Boolean):
+        return pyarrow.bool_()
+    if isinstance(column_type, Integer):
+        return pyarrow.int64()
+    if isinstance(column_type, (Float, Numeric)):
+        return pyarrow.float64()
+    if isinstance(column_type, DateTime):
+        return pyarrow.timestamp("us")
+    if isinstance(column_type, Date):
+        return pyarrow.date32()
+    if isinstance(column_type, LargeBinary):
+        return pyarrow.binary()
+    return pyarrow.string()
+
+
+def table_arrow_schema(table_name, columns=None):
+    """Arrow schema of an export table, typed from the model columns."""
+    table = EXPORT_TABLE_MODELS[table_name].__table__
+    return pyarrow.schema(
+        [
+            (
+                name,
+                (
+                    pyarrow.string()
+                    if name == TRANSCRIPT_COLUMN
+                    else _arrow_type(table.c[name].type)
+                ),
+            )
+            for name in export_column_names(table_name, columns)
+        ]
+    )
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file that hands back what was written since the last drain.
+
+    Parquet records byte offsets in its footer, so ``tell`` keeps counting
+    across drains.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._chunks = []
+        self._position = 0
+
+    def writable(self):
+        return True
 
+    def write(self, data):
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
 
-def build_xlsx_export_file():
+    def tell(self):
+        return self._position
+
+    def drain(self):
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def iter_table_parquet(table_name, **options):
+    """Stream one table as a Parquet file, one row group at a time.
+
+    Rows are read with ``fetchmany`` and gathered into columns; every
+    ``PARQUET_ROW_GROUP_SIZE`` rows become a row group whose bytes are
+    yielded before the next chunk is read.
+    """
+    if pyarrow is None:
+        raise RuntimeError("pyarrow is required for Parquet exports.")
+    schema = table_arrow_schema(table_name, options.get("columns"))
+    sink = _ChunkSink()
+    writer = pyarrow.parquet.ParquetWriter(
+        sink, schema, compression=PARQUET_COMPRESSION
+    )
+
+    def write_row_group(columns):
+        writer.write_table(
+            pyarrow.table(
+                [
+                    pyarrow.array(values, type=field.type)
+                    for values, field in zip(columns, schema)
+                ],
+                schema=schema,
+            )
+        )
+        return sink.drain()
+
+    columns = [[] for _field in schema]
+    pending = 0
+    for rows in iter_table_chunks(table_name, **options):
+        for values, column in zip(zip(*rows), columns):
+            column.extend(values)
+        pending += len(rows)
+        if pending >= PARQUET_ROW_GROUP_SIZE:
+            yield write_row_group(columns)
+            columns = [[] for _field in schema]
+            pending = 0
+    if pending:
+        yield write_row_group(columns)
+    writer.close()
+    yield sink.drain()
+
+
+def stream_table_parquet(table_name, **options):
+    with read_replica():
+        yield from iter_table_parquet(table_name, **options)
+
+
+def stream_tables_csv(tables=EXPORT_TABLES, **options):
+    with read_replica():
+        for table_name in tables:
+            yield f"=== {table_name.upper()} ===\n"
+            yield from iter_table_csv(table_name, **options)
+            yield "\n"
+
+
+def stream_tables_ndjson(tables=EXPORT_TABLES, **options):
+    with read_replica():
+        for table_name in tables:
+            yield from iter_table_ndjson(table_name, **options)
+
+
+@use_primary()
+def build_xlsx_export_file(path=None, progress=None):
+    """Write every export table to an XLSX workbook and return its path.
+
+    ``progress`` is called with the number of rows written after each
+    fetched chunk. Without ``path`` the workbook goes to a temporary file.
+    Rows are read from the primary, where the ``data_version`` the artifact
+    is named after is read, so a lagging replica cannot leave it stale.
+    """
     workbook = Workbook(write_only=True)
+    written = 0
 
     try:
         for table_name in EXPORT_TABLES:
             sheet = workbook.create_sheet(title=table_name[:31])
-            result = execute_table_query(table_name)
-            columns = list(result.keys())
-            sheet.append(columns)
+            sheet.append(export_columns(table_name))
 
-            try:
-                while True:
-                    rows = result.fetchmany(DB_FETCH_CHUNK_SIZE)
-                    if not rows:
-                        break
-                    for row in rows:
-                        sheet.append(tuple(row))
-            finally:
-                result.close()
-
-        temp_file = tempfile.NamedTemporaryFile(suffix=".xlsx", delete=False)
-        temp_file_path = temp_file.name
-        temp_file.close()
-        workbook.save(temp_file_path)
-        return temp_file_path
+            for rows in iter_table_chunks(table_name):
+                for row in rows:
+                    sheet.append(row)
+                written += len(rows)
+                if progress is not None:
+                    progress(written)
+
+        if path is None:
+            temp_file = tempfile.NamedTemporaryFile(suffix=".xlsx", delete=False)
+            path = temp_file.name
+            temp_file.close()
+        workbook.save(path)
+        return path
     finally:
         workbook.close()
+
+
+ARTIFACT_BUILDERS = {"xlsx": build_xlsx_export_file}
+
+
+def export_data_version():
+    return get_row_counts([COUNTER_DATA_VERSION])[COUNTER_DATA_VERSION]
+
+
+def export_artifact_name(export_format, data_version):
+    return f"exported_data-{data_version}.{export_format}"
+
+
+def _is_artifact_name(filename, export_format):
+    return re.fullmatch(rf"exported_data-\d+\.{export_format}", filename) is not None
+
+
+def export_artifact_path(filename):
+    """Path of a stored artifact by file name, or ``None`` if there is none."""
+    export_format = filename.rsplit(".", 1)[-1]
+    if export_format not in ARTIFACT_BUILDERS or not _is_artifact_name(
+        filename, export_format
+    ):
+        return None
+    path = os.path.join(EXPORT_ARTIFACT_DIR, filename)
+    return path if os.path.exists(path) else None
+
+
+def find_export_artifact(export_format, data_version=None):
+    """Path of the artifact built from the current data, or ``None``."""
+    if data_version is None:
+        data_version = export_data_version()
+    path = os.path.join(
+        EXPORT_ARTIFACT_DIR, export_artifact_name(export_format, data_version)
+    )
+    return path if os.path.exists(path) else None
+
+
+def build_export_artifact(export_format, progress=None):
+    """Return the artifact for the current data version, building it if needed.
+
+    The file is written under a temporary name and renamed into place, so a
+    reader never sees a partial artifact. Artifacts of older versions are
+    removed once the new one exists.
+    """
+    builder = ARTIFACT_BUILDERS.get(export_format)
+    if builder is None:
+        raise ValueError(f"Unsupported export format: {export_format}")
+    data_version = export_data_version()
+    path = find_export_artifact(export_format, data_version)
+    if path is not None:
+        return path
+
+    os.makedirs(EXPORT_ARTIFACT_DIR, exist_ok=True)
+    name = export_artifact_name(export_format, data_version)
+    partial = tempfile.NamedTemporaryFile(
+        dir=EXPORT_ARTIFACT_DIR, prefix=f".{name}.", delete=False
+    )
+    partial.close()
+    try:
+        builder(partial.name, progress=progress)
+        path = os.path.join(EXPORT_ARTIFACT_DIR, name)
+        os.replace(partial.name, path)
+    except BaseException:
+        os.remove(partial.name)
+        raise
+
+    for stale in os.listdir(EXPORT_ARTIFACT_DIR):
+        if stale != name and _is_artifact_name(stale, export_format):
+            try:
+                os.remove(os.path.join(EXPORT_ARTIFACT_DIR, stale))
+            except OSError:
+                pass
+    return path
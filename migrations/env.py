@@ -87,9 +87,15 @@ def run_migrations_online():
                 directives[:] = []
                 logger.info("No changes in schema detected.")
 
+    def include_object(object, name, type_, reflected, compare_to):
+        # The dialect-specific search table (and FTS5 shadow tables) are managed
+        # by hand-written migrations, not autogenerate.
+        return not (type_ == "table" and name.startswith("video_search"))
+
     conf_args = current_app.extensions["migrate"].configure_args
     if conf_args.get("process_revision_directives") is None:
         conf_args["process_revision_directives"] = process_revision_directives
+    conf_args.setdefault("include_object", include_object)
 
     connectable = get_engine()
 
@@ -0,0 +1,42 @@
+"""Channel stats rollup
+
+Revision ID: 2f9b6d4e8c15
+Revises: 8a5d3c1f7e64
+Create Date: 2026-10-19 17:08:41.552907
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "2f9b6d4e8c15"
+down_revision = "8a5d3c1f7e64"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Rows are computed on first read or by `flask refresh-channel-stats`.
+    op.create_table(
+        "channel_stats",
+        sa.Column("channel_id", sa.Integer(), nullable=False),
+        sa.Column("video_count", sa.Integer(), nullable=False),
+        sa.Column("total_views", sa.BigInteger(), nullable=False),
+        sa.Column("total_likes", sa.BigInteger(), nullable=False),
+        sa.Column("total_comments", sa.BigInteger(), nullable=False),
+        sa.Column("engagement_rate_sum", sa.Float(), nullable=False),
+        sa.Column("median_views", sa.Float(), nullable=True),
+        sa.Column("latest_upload", sa.Date(), nullable=True),
+        sa.ForeignKeyConstraint(["channel_id"], ["channels.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("channel_id"),
+    )
+    # Serves the per-channel median.
+    op.create_index(
+        "ix_videos_channel_id_views", "videos", ["channel_id", "views"], unique=False
+    )
+
+
+def downgrade():
+    op.drop_index("ix_videos_channel_id_views", table_name="videos")
+    op.drop_table("channel_stats")
@@ -0,0 +1,85 @@
+"""Compressed video transcripts
+
+Revision ID: 3f6d0b9e4a21
+Revises: e5a2c8f01b37
+Create Date: 2026-10-19 12:47:52.310845
+
+"""
+
+import zlib
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "3f6d0b9e4a21"
+down_revision = "e5a2c8f01b37"
+branch_labels = None
+depends_on = None
+
+CHUNK_SIZE = 500
+
+
+def upgrade():
+    video_transcripts = op.create_table(
+        "video_transcripts",
+        sa.Column("video_id", sa.Integer(), nullable=False),
+        sa.Column("codec", sa.String(length=8), nullable=False),
+        sa.Column("content", sa.LargeBinary(), nullable=False),
+        sa.ForeignKeyConstraint(["video_id"], ["videos.id"]),
+        sa.PrimaryKeyConstraint("video_id"),
+    )
+
+    # Copy in chunks so large tables are never held in memory at once. zlib is
+    # always available; rows written later use TRANSCRIPT_CODEC.
+    connection = op.get_bind()
+    last_id = 0
+    while True:
+        rows = connection.execute(
+            sa.text(
+                "SELECT id, transcript FROM videos "
+                "WHERE id > :last_id AND transcript IS NOT NULL AND transcript <> '' "
+                "ORDER BY id LIMIT :limit"
+            ),
+            {"last_id": last_id, "limit": CHUNK_SIZE},
+        ).fetchall()
+        if not rows:
+            break
+        op.bulk_insert(
+            video_transcripts,
+            [
+                {
+                    "video_id": video_id,
+                    "codec": "zlib",
+                    "content": zlib.compress(transcript.encode("utf-8"), 9),
+                }
+                for video_id, transcript in rows
+            ],
+        )
+        last_id = rows[-1][0]
+
+    with op.batch_alter_table("videos", schema=None) as batch_op:
+        batch_op.drop_column("transcript")
+
+
+def downgrade():
+    with op.batch_alter_table("videos", schema=None) as batch_op:
+        batch_op.add_column(sa.Column("transcript", sa.Text(), nullable=True))
+
+    connection = op.get_bind()
+    rows = connection.execute(
+        sa.text("SELECT video_id, codec, content FROM video_transcripts")
+    )
+    for video_id, codec, content in rows.fetchall():
+        if codec == "zstd":
+            import zstandard
+
+            raw = zstandard.ZstdDecompressor().decompress(content)
+        else:
+            raw = zlib.decompress(content)
+        connection.execute(
+            sa.text("UPDATE videos SET transcript = :transcript WHERE id = :id"),
+            {"transcript": raw.decode("utf-8"), "id": video_id},
+        )
+
+    op.drop_table("video_transcripts")
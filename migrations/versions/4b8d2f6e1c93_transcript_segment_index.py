@@ -0,0 +1,26 @@
+"""Transcript segment index
+
+Revision ID: 4b8d2f6e1c93
+Revises: 9c4e7a1d2b58
+Create Date: 2026-10-19 14:02:47.316508
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "4b8d2f6e1c93"
+down_revision = "9c4e7a1d2b58"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table("video_transcripts", schema=None) as batch_op:
+        batch_op.add_column(sa.Column("segment_index", sa.LargeBinary(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table("video_transcripts", schema=None) as batch_op:
+        batch_op.drop_column("segment_index")
@@ -0,0 +1,34 @@
+"""Video content hashes
+
+Revision ID: 5c0e7f2a9b14
+Revises: a918e6482a8c
+Create Date: 2026-10-19 10:02:47.530912
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "5c0e7f2a9b14"
+down_revision = "a918e6482a8c"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Hashes start NULL, so each existing video is rewritten once on its next
+    # refresh and compared by hash afterwards.
+    with op.batch_alter_table("videos", schema=None) as batch_op:
+        batch_op.add_column(
+            sa.Column("description_hash", sa.String(length=32), nullable=True)
+        )
+        batch_op.add_column(
+            sa.Column("transcript_hash", sa.String(length=32), nullable=True)
+        )
+
+
+def downgrade():
+    with op.batch_alter_table("videos", schema=None) as batch_op:
+        batch_op.drop_column("transcript_hash")
+        batch_op.drop_column("description_hash")
@@ -0,0 +1,51 @@
+"""Video trends
+
+Revision ID: 5c8e2a7d9b31
+Revises: 2f9b6d4e8c15
+Create Date: 2026-10-19 18:02:16.274519
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "5c8e2a7d9b31"
+down_revision = "2f9b6d4e8c15"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "video_trends",
+        sa.Column("video_id", sa.Integer(), nullable=False),
+        sa.Column("sampled_at", sa.DateTime(), nullable=False),
+        sa.Column("views", sa.Integer(), nullable=False),
+        sa.Column("views_per_hour", sa.Float(), nullable=True),
+        sa.Column("acceleration", sa.Float(), nullable=True),
+        sa.ForeignKeyConstraint(["video_id"], ["videos.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("video_id"),
+    )
+    op.create_index(
+        "ix_video_trends_views_per_hour",
+        "video_trends",
+        ["views_per_hour"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_video_trends_acceleration", "video_trends", ["acceleration"], unique=False
+    )
+    # The stored counts are the first sample; velocities follow on the next
+    # refresh of each video.
+    op.execute(
+        "INSERT INTO video_trends (video_id, sampled_at, views) "
+        "SELECT id, last_refreshed_at, COALESCE(views, 0) FROM videos "
+        "WHERE last_refreshed_at IS NOT NULL"
+    )
+
+
+def downgrade():
+    op.drop_index("ix_video_trends_acceleration", table_name="video_trends")
+    op.drop_index("ix_video_trends_views_per_hour", table_name="video_trends")
+    op.drop_table("video_trends")
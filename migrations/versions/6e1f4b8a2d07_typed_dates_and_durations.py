@@ -0,0 +1,155 @@
+"""Typed dates and durations
+
+Revision ID: 6e1f4b8a2d07
+Revises: d7a3c5e9f241
+Create Date: 2026-10-19 15:42:18.306471
+
+"""
+
+import re
+from datetime import timedelta
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "6e1f4b8a2d07"
+down_revision = "d7a3c5e9f241"
+branch_labels = None
+depends_on = None
+
+CHUNK_SIZE = 500
+# ``str(timedelta)`` as written by parse_duration: "[N day(s), ]H:MM:SS".
+DURATION_PATTERN = re.compile(r"(?:(\d+) days?, )?(?:(\d+):)?(\d{1,2}):(\d{2})")
+CURRENT_TIMESTAMP = sa.text("(CURRENT_TIMESTAMP)")
+
+
+def _duration_seconds(value):
+    match = DURATION_PATTERN.fullmatch((value or "").strip())
+    if match is None:
+        return None
+    days, hours, minutes, seconds = (int(part or 0) for part in match.groups())
+    return ((days * 24 + hours) * 60 + minutes) * 60 + seconds
+
+
+def _convert_rows(connection, select_sql, update_sql, convert):
+    last_id = 0
+    while True:
+        rows = connection.execute(
+            sa.text(select_sql), {"last_id": last_id, "limit": CHUNK_SIZE}
+        ).fetchall()
+        if not rows:
+            break
+        connection.execute(
+            sa.text(update_sql),
+            [{"id": row_id, "value": convert(value)} for row_id, value in rows],
+        )
+        last_id = rows[-1][0]
+
+
+def _retype_timestamp(table, column, type_, using):
+    # The text default cannot be cast along with the column on PostgreSQL.
+    op.alter_column(table, column, server_default=None)
+    op.alter_column(table, column, type_=type_, postgresql_using=using)
+    op.alter_column(table, column, server_default=sa.text("CURRENT_TIMESTAMP"))
+
+
+def upgrade():
+    connection = op.get_bind()
+    # Only ISO dates survive; "" and other placeholders become NULL.
+    op.execute(
+        "UPDATE videos SET posted = NULL "
+        "WHERE posted IS NOT NULL AND posted NOT LIKE '____-__-__%'"
+    )
+    op.execute("UPDATE videos SET posted = substr(posted, 1, 10)")
+
+    with op.batch_alter_table("videos", schema=None) as batch_op:
+        batch_op.add_column(sa.Column("duration_seconds", sa.Integer(), nullable=True))
+    _convert_rows(
+        connection,
+        "SELECT id, video_length FROM videos WHERE id > :last_id "
+        "AND video_length IS NOT NULL ORDER BY id LIMIT :limit",
+        "UPDATE videos SET duration_seconds = :value WHERE id = :id",
+        _duration_seconds,
+    )
+
+    if connection.dialect.name == "sqlite":
+        # Declaring the new types on the reflected table copies the stored ISO
+        # text as is; a plain type change would CAST it to a number.
+        with op.batch_alter_table(
+            "videos",
+            recreate="always",
+            reflect_args=[
+                sa.Column("posted", sa.Date()),
+                sa.Column("saved_at", sa.DateTime(), server_default=CURRENT_TIMESTAMP),
+            ],
+        ) as batch_op:
+            batch_op.drop_column("video_length")
+            batch_op.create_index(
+                "ix_videos_duration_seconds", ["duration_seconds"], unique=False
+            )
+        with op.batch_alter_table(
+            "channel_history",
+            recreate="always",
+            reflect_args=[
+                sa.Column(
+                    "recorded_at", sa.DateTime(), server_default=CURRENT_TIMESTAMP
+                )
+            ],
+        ):
+            pass
+        return
+
+    op.alter_column(
+        "videos", "posted", type_=sa.Date(), postgresql_using="posted::date"
+    )
+    _retype_timestamp("videos", "saved_at", sa.DateTime(), "saved_at::timestamp")
+    _retype_timestamp(
+        "channel_history", "recorded_at", sa.DateTime(), "recorded_at::timestamp"
+    )
+    op.drop_column("videos", "video_length")
+    op.create_index(
+        "ix_videos_duration_seconds", "videos", ["duration_seconds"], unique=False
+    )
+
+
+def downgrade():
+    connection = op.get_bind()
+    with op.batch_alter_table("videos", schema=None) as batch_op:
+        batch_op.add_column(sa.Column("video_length", sa.String(), nullable=True))
+    _convert_rows(
+        connection,
+        "SELECT id, duration_seconds FROM videos WHERE id > :last_id "
+        "AND duration_seconds IS NOT NULL ORDER BY id LIMIT :limit",
+        "UPDATE videos SET video_length = :value WHERE id = :id",
+        lambda seconds: str(timedelta(seconds=seconds)),
+    )
+
+    if connection.dialect.name == "sqlite":
+        with op.batch_alter_table(
+            "videos",
+            recreate="always",
+            reflect_args=[
+                sa.Column("posted", sa.String()),
+                sa.Column("saved_at", sa.Text(), server_default=CURRENT_TIMESTAMP),
+            ],
+        ) as batch_op:
+            batch_op.drop_index("ix_videos_duration_seconds")
+            batch_op.drop_column("duration_seconds")
+        with op.batch_alter_table(
+            "channel_history",
+            recreate="always",
+            reflect_args=[
+                sa.Column("recorded_at", sa.Text(), server_default=CURRENT_TIMESTAMP)
+            ],
+        ):
+            pass
+        return
+
+    op.drop_index("ix_videos_duration_seconds", table_name="videos")
+    op.drop_column("videos", "duration_seconds")
+    op.alter_column(
+        "videos", "posted", type_=sa.String(), postgresql_using="posted::text"
+    )
+    _retype_timestamp("videos", "saved_at", sa.Text(), "saved_at::text")
+    _retype_timestamp("channel_history", "recorded_at", sa.Text(), "recorded_at::text")
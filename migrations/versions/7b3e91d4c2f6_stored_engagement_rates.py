@@ -0,0 +1,53 @@
+"""Stored engagement rates
+
+Revision ID: 7b3e91d4c2f6
+Revises: c0d1eb96a0d0
+Create Date: 2026-10-19 11:26:48.530917
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "7b3e91d4c2f6"
+down_revision = "c0d1eb96a0d0"
+branch_labels = None
+depends_on = None
+
+RATE_COLUMNS = ("like_rate", "comment_rate", "engagement_rate")
+
+
+def upgrade():
+    with op.batch_alter_table("videos", schema=None) as batch_op:
+        for column in RATE_COLUMNS:
+            batch_op.add_column(
+                sa.Column(column, sa.Float(), nullable=False, server_default="0")
+            )
+
+    # Same rounding as models.engagement_rates so backfilled and newly written
+    # rows sort consistently.
+    op.execute(
+        sa.text(
+            "UPDATE videos SET "
+            "like_rate = ROUND(CAST(COALESCE(likes, 0) * 100.0 / views AS NUMERIC), 2), "
+            "comment_rate = "
+            "ROUND(CAST(COALESCE(comments, 0) * 100.0 / views AS NUMERIC), 2), "
+            "engagement_rate = ROUND(CAST("
+            "(COALESCE(likes, 0) + COALESCE(comments, 0)) * 100.0 / views "
+            "AS NUMERIC), 2) "
+            "WHERE views IS NOT NULL AND views <> 0"
+        )
+    )
+
+    for column in RATE_COLUMNS:
+        op.create_index(f"ix_videos_{column}", "videos", [column], unique=False)
+
+
+def downgrade():
+    for column in RATE_COLUMNS:
+        op.drop_index(f"ix_videos_{column}", table_name="videos")
+
+    with op.batch_alter_table("videos", schema=None) as batch_op:
+        for column in reversed(list(RATE_COLUMNS)):
+            batch_op.drop_column(column)
@@ -0,0 +1,24 @@
+"""Video title index
+
+Revision ID: 8a5d3c1f7e64
+Revises: 6e1f4b8a2d07
+Create Date: 2026-10-19 16:27:53.918244
+
+"""
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "8a5d3c1f7e64"
+down_revision = "6e1f4b8a2d07"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Serves the /api/data title_prefix range and title sorts.
+    op.create_index("ix_videos_title", "videos", ["title"], unique=False)
+
+
+def downgrade():
+    op.drop_index("ix_videos_title", table_name="videos")
@@ -0,0 +1,29 @@
+"""Video transcript status index
+
+Revision ID: 8abc3f033ae2
+Revises: 5c8e2a7d9b31
+Create Date: 2026-10-19 19:06:48.028304
+
+"""
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "8abc3f033ae2"
+down_revision = "5c8e2a7d9b31"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Serves the has_transcript filter of /api/data and its filtered total.
+    op.create_index(
+        "ix_videos_transcript_status_saved_at",
+        "videos",
+        ["transcript_status", "saved_at"],
+        unique=False,
+    )
+
+
+def downgrade():
+    op.drop_index("ix_videos_transcript_status_saved_at", table_name="videos")
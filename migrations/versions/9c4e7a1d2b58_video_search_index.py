@@ -0,0 +1,115 @@
+"""Video search index
+
+Revision ID: 9c4e7a1d2b58
+Revises: 3f6d0b9e4a21
+Create Date: 2026-10-19 13:34:10.582117
+
+"""
+
+import zlib
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "9c4e7a1d2b58"
+down_revision = "3f6d0b9e4a21"
+branch_labels = None
+depends_on = None
+
+CHUNK_SIZE = 500
+TRANSCRIPT_UNAVAILABLE_MESSAGE = "Transcript unavailable or disabled by the uploader."
+
+
+def _decompress(codec, content):
+    if codec == "zstd":
+        import zstandard
+
+        return zstandard.ZstdDecompressor().decompress(content).decode("utf-8")
+    return zlib.decompress(content).decode("utf-8")
+
+
+def upgrade():
+    connection = op.get_bind()
+    if connection.dialect.name == "sqlite":
+        key = "rowid"
+        op.execute(
+            "CREATE VIRTUAL TABLE video_search USING fts5("
+            "title, description, transcript, tokenize = 'porter unicode61')"
+        )
+    elif connection.dialect.name == "postgresql":
+        key = "video_id"
+        op.execute(
+            "CREATE TABLE video_search ("
+            "video_id INTEGER PRIMARY KEY REFERENCES videos (id) ON DELETE CASCADE, "
+            "title TEXT, description TEXT, transcript TEXT, "
+            "document tsvector GENERATED ALWAYS AS ("
+            "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+            "setweight(to_tsvector('english', coalesce(description, '')), 'B') || "
+            "setweight(to_tsvector('english', coalesce(transcript, '')), 'D')"
+            ") STORED)"
+        )
+    else:
+        return
+
+    search = sa.table(
+        "video_search",
+        sa.column(key),
+        sa.column("title"),
+        sa.column("description"),
+        sa.column("transcript"),
+    )
+    videos = sa.table(
+        "videos", sa.column("id"), sa.column("title"), sa.column("description")
+    )
+    op.execute(
+        search.insert().from_select(
+            [key, "title", "description", "transcript"],
+            sa.select(
+                videos.c.id,
+                sa.func.coalesce(videos.c.title, ""),
+                sa.func.coalesce(videos.c.description, ""),
+                sa.literal(""),
+            ),
+        )
+    )
+
+    last_id = 0
+    while True:
+        rows = connection.execute(
+            sa.text(
+                "SELECT video_id, codec, content FROM video_transcripts "
+                "WHERE video_id > :last_id ORDER BY video_id LIMIT :limit"
+            ),
+            {"last_id": last_id, "limit": CHUNK_SIZE},
+        ).fetchall()
+        if not rows:
+            break
+        transcripts = [
+            {"b_id": video_id, "b_transcript": _decompress(codec, content)}
+            for video_id, codec, content in rows
+        ]
+        # Unavailable transcripts stay indexed as empty text.
+        transcripts = [
+            row
+            for row in transcripts
+            if row["b_transcript"] != TRANSCRIPT_UNAVAILABLE_MESSAGE
+        ]
+        if transcripts:
+            connection.execute(
+                search.update()
+                .where(search.c[key] == sa.bindparam("b_id"))
+                .values(transcript=sa.bindparam("b_transcript")),
+                transcripts,
+            )
+        last_id = rows[-1][0]
+
+    # Built after the backfill so the GIN index is written once.
+    if connection.dialect.name == "postgresql":
+        op.execute(
+            "CREATE INDEX ix_video_search_document ON video_search USING GIN (document)"
+        )
+
+
+def downgrade():
+    op.execute("DROP TABLE IF EXISTS video_search")
@@ -0,0 +1,47 @@
+"""Video freshness tracking
+
+Revision ID: a918e6482a8c
+Revises: a07144c0dbb0
+Create Date: 2026-10-19 09:12:04.118520
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "a918e6482a8c"
+down_revision = "a07144c0dbb0"
+branch_labels = None
+depends_on = None
+
+TRANSCRIPT_UNAVAILABLE_MESSAGE = "Transcript unavailable or disabled by the uploader."
+
+
+def upgrade():
+    with op.batch_alter_table("videos", schema=None) as batch_op:
+        batch_op.add_column(
+            sa.Column("last_refreshed_at", sa.DateTime(), nullable=True)
+        )
+        batch_op.add_column(sa.Column("transcript_status", sa.String(), nullable=True))
+        batch_op.add_column(
+            sa.Column("transcript_refreshed_at", sa.DateTime(), nullable=True)
+        )
+
+    # Existing rows keep NULL timestamps so the next channel scrape refreshes
+    # them once; transcript availability is derived from the stored text.
+    op.execute(
+        sa.text(
+            "UPDATE videos SET transcript_status = CASE "
+            "WHEN transcript IS NULL OR transcript = '' THEN NULL "
+            "WHEN transcript = :unavailable THEN 'unavailable' "
+            "ELSE 'available' END"
+        ).bindparams(unavailable=TRANSCRIPT_UNAVAILABLE_MESSAGE)
+    )
+
+
+def downgrade():
+    with op.batch_alter_table("videos", schema=None) as batch_op:
+        batch_op.drop_column("transcript_refreshed_at")
+        batch_op.drop_column("transcript_status")
+        batch_op.drop_column("last_refreshed_at")
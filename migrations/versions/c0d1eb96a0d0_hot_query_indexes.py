@@ -0,0 +1,42 @@
+"""Hot query indexes
+
+Revision ID: c0d1eb96a0d0
+Revises: 5c0e7f2a9b14
+Create Date: 2026-10-19 10:41:15.204377
+
+"""
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "c0d1eb96a0d0"
+down_revision = "5c0e7f2a9b14"
+branch_labels = None
+depends_on = None
+
+INDEXES = (
+    ("ix_channels_subscribers", "channels", ["subscribers"]),
+    ("ix_videos_channel_id_saved_at", "videos", ["channel_id", "saved_at"]),
+    ("ix_videos_saved_at", "videos", ["saved_at"]),
+    ("ix_videos_views", "videos", ["views"]),
+    ("ix_videos_likes", "videos", ["likes"]),
+    ("ix_videos_comments", "videos", ["comments"]),
+    ("ix_videos_posted", "videos", ["posted"]),
+    (
+        "ix_channel_history_channel_id_recorded_at",
+        "channel_history",
+        ["channel_id", "recorded_at"],
+    ),
+    ("ix_channel_history_recorded_at", "channel_history", ["recorded_at"]),
+    ("ix_channel_videos_channel_id", "channel_videos", ["channel_id"]),
+)
+
+
+def upgrade():
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, unique=False)
+
+
+def downgrade():
+    for name, table, _columns in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
@@ -0,0 +1,41 @@
+"""Video stats snapshots
+
+Revision ID: d7a3c5e9f241
+Revises: 4b8d2f6e1c93
+Create Date: 2026-10-19 14:31:05.842190
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "d7a3c5e9f241"
+down_revision = "4b8d2f6e1c93"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "video_stats_snapshots",
+        sa.Column("video_id", sa.Integer(), nullable=False),
+        sa.Column("captured_at", sa.DateTime(), nullable=False),
+        sa.Column("views", sa.Integer(), nullable=False),
+        sa.Column("likes", sa.Integer(), nullable=False),
+        sa.Column("comments", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["video_id"], ["videos.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("video_id", "captured_at"),
+        sqlite_with_rowid=False,
+    )
+    # Start every series from the counts we already have.
+    op.execute(
+        "INSERT INTO video_stats_snapshots "
+        "(video_id, captured_at, views, likes, comments) "
+        "SELECT id, COALESCE(last_refreshed_at, CURRENT_TIMESTAMP), "
+        "COALESCE(views, 0), COALESCE(likes, 0), COALESCE(comments, 0) FROM videos"
+    )
+
+
+def downgrade():
+    op.drop_table("video_stats_snapshots")
@@ -0,0 +1,42 @@
+"""Row counters
+
+Revision ID: e5a2c8f01b37
+Revises: 7b3e91d4c2f6
+Create Date: 2026-10-19 12:03:27.661204
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "e5a2c8f01b37"
+down_revision = "7b3e91d4c2f6"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "row_counters",
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("value", sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint("name"),
+    )
+
+    # Seed from the current tables so the API never has to fall back to COUNT(*).
+    op.execute(
+        "INSERT INTO row_counters (name, value) "
+        "SELECT 'videos', COUNT(*) FROM videos "
+        "UNION ALL SELECT 'channels', COUNT(*) FROM channels "
+        "UNION ALL SELECT 'channel_history', COUNT(*) FROM channel_history"
+    )
+    op.execute(
+        "INSERT INTO row_counters (name, value) "
+        "SELECT 'channel_videos:' || CAST(channel_id AS VARCHAR), COUNT(*) "
+        "FROM videos WHERE channel_id IS NOT NULL GROUP BY channel_id"
+    )
+
+
+def downgrade():
+    op.drop_table("row_counters")
@@ -1,10 +1,164 @@
+import os
+import re
+import sys
+import zlib
+from array import array
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import timedelta
+
 from flask_sqlalchemy import SQLAlchemy
+from flask_sqlalchemy.session import Session
+from sqlalchemy import bindparam, event, inspect, update
+from sqlalchemy.dialects import sqlite
+from sqlalchemy.orm import deferred
+
+try:
+    import zstandard
+except ModuleNotFoundError:
+    zstandard = None
+
+# Bind key of the optional read replica configured by ``DATABASE_REPLICA_URL``.
+REPLICA_BIND = "replica"
+_reading_from_replica = ContextVar("reading_from_replica", default=False)
+
+
+class RoutingSession(Session):
+    """Session that sends reads to the replica inside ``read_replica()``.
+
+    Only statements are routed: flushes, DML and bare ``connection()`` calls
+    always use the primary, so writes inside a replica block stay correct.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (
+            bind is None
+            and clause is not None
+            and _reading_from_replica.get()
+            and not self._flushing
+            and not getattr(clause, "is_dml", False)
+        ):
+            replica = self._db.engines.get(REPLICA_BIND)
+            if replica is not None:
+                return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+@contextmanager
+def _replica_reads(enabled):
+    token = _reading_from_replica.set(enabled)
+    try:
+        yield
+    finally:
+        _reading_from_replica.reset(token)
+
+
+def read_replica():
+    """Route reads to the replica, when one is configured, for the block."""
+    return _replica_reads(True)
+
+
+def use_primary():
+    """Keep every statement of the block on the primary (read-your-writes)."""
+    return _replica_reads(False)
+
+
+db = SQLAlchemy(session_options={"class_": RoutingSession})
+
+# Timestamp defaulting to CURRENT_TIMESTAMP. SQLite stores it as text in the
+# same second-resolution format, so bound values compare correctly against
+# rows the server default wrote.
+Timestamp = db.DateTime().with_variant(
+    sqlite.DATETIME(
+        storage_format="%(year)04d-%(month)02d-%(day)02d %(hour)02d:%(minute)02d:%(second)02d"
+    ),
+    "sqlite",
+)
+
+TRANSCRIPT_CODEC = os.environ.get(
+    "TRANSCRIPT_CODEC", "zstd" if zstandard is not None else "zlib"
+).lower()
+
+
+def compress_text(text):
+    """Return ``(codec, payload)`` for ``text`` using ``TRANSCRIPT_CODEC``."""
+    raw = (text or "").encode("utf-8")
+    if TRANSCRIPT_CODEC == "zstd" and zstandard is not None:
+        return "zstd", zstandard.ZstdCompressor(level=10).compress(raw)
+    return "zlib", zlib.compress(raw, 9)
+
+
+def decompress_text(codec, payload):
+    if payload is None:
+        return None
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("zstandard is required to read zstd transcripts.")
+        raw = zstandard.ZstdDecompressor().decompress(payload)
+    elif codec == "zlib":
+        raw = zlib.decompress(payload)
+    else:
+        raise ValueError(f"Unknown transcript codec: {codec}")
+    return raw.decode("utf-8")
+
+
+def pack_segments(segments):
+    """Pack ``[start, duration, text]`` segments into a compact offset index.
+
+    The index is a zlib-compressed little-endian ``uint32`` array of
+    ``(char_offset, start_ms, duration_ms)`` triples, where ``char_offset`` is
+    where the segment starts in the space-joined transcript text.
+    """
+    values = array("I")
+    offset = 0
+    for start, duration, text in segments:
+        values.extend(
+            (offset, int(round(start * 1000)), int(round((duration or 0) * 1000)))
+        )
+        offset += len(text) + 1
+    if sys.byteorder != "little":
+        values.byteswap()
+    return zlib.compress(values.tobytes(), 9)
+
 
-db = SQLAlchemy()
+def unpack_segments(payload):
+    """Return ``(offsets, starts_ms, durations_ms)`` arrays from ``pack_segments``."""
+    values = array("I")
+    values.frombytes(zlib.decompress(payload))
+    if sys.byteorder != "little":
+        values.byteswap()
+    return values[0::3], values[1::3], values[2::3]
+
+
+def duration_to_seconds(value):
+    """Seconds from an int or an ``[N day(s), ]H:MM:SS``/``M:SS`` string.
+
+    Returns ``None`` for empty or unparseable values such as ``"Unknown"``.
+    """
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return int(value)
+    match = re.fullmatch(
+        r"\s*(?:(\d+) days?, )?(?:(\d+):)?(\d{1,2}):(\d{2})\s*", str(value)
+    )
+    if match is None:
+        return None
+    days, hours, minutes, seconds = (int(part or 0) for part in match.groups())
+    return ((days * 24 + hours) * 60 + minutes) * 60 + seconds
+
+
+def format_duration(seconds):
+    """``H:MM:SS`` (``str(timedelta)``) for a duration in seconds."""
+    if seconds is None:
+        return None
+    return str(timedelta(seconds=seconds))
 
 
 class Channel(db.Model):
     __tablename__ = "channels"
+    __table_args__ = (db.Index("ix_channels_subscribers", "subscribers"),)
 
     id = db.Column(db.Integer, primary_key=True)
     channel_username = db.Column(db.String, unique=True, nullable=False)
@@ -19,66 +173,366 @@ class Channel(db.Model):
 
 class Video(db.Model):
     __tablename__ = "videos"
+    __table_args__ = (
+        db.Index("ix_videos_channel_id_saved_at", "channel_id", "saved_at"),
+        db.Index("ix_videos_saved_at", "saved_at"),
+        db.Index("ix_videos_views", "views"),
+        db.Index("ix_videos_likes", "likes"),
+        db.Index("ix_videos_comments", "comments"),
+        db.Index("ix_videos_posted", "posted"),
+        db.Index("ix_videos_like_rate", "like_rate"),
+        db.Index("ix_videos_comment_rate", "comment_rate"),
+        db.Index("ix_videos_engagement_rate", "engagement_rate"),
+        db.Index("ix_videos_duration_seconds", "duration_seconds"),
+        db.Index("ix_videos_title", "title"),
+        db.Index("ix_videos_channel_id_views", "channel_id", "views"),
+        db.Index(
+            "ix_videos_transcript_status_saved_at", "transcript_status", "saved_at"
+        ),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     youtube_video_id = db.Column(db.String, unique=True)
     title = db.Column(db.String)
-    description = db.Column(db.Text)
+    # Only the detail page and exports need the description.
+    description = deferred(db.Column(db.Text))
+    description_hash = db.Column(db.String(32))
     views = db.Column(db.Integer)
     likes = db.Column(db.Integer)
     comments = db.Column(db.Integer)
-    posted = db.Column(db.String)
-    video_length = db.Column(db.String)
-    transcript = db.Column(db.Text)
-    saved_at = db.Column(db.Text, server_default=db.text("CURRENT_TIMESTAMP"))
+    posted = db.Column(db.Date)
+    duration_seconds = db.Column(db.Integer)
+    transcript_hash = db.Column(db.String(32))
+    saved_at = db.Column(Timestamp, server_default=db.text("CURRENT_TIMESTAMP"))
+    last_refreshed_at = db.Column(db.DateTime)
+    transcript_status = db.Column(db.String)
+    transcript_refreshed_at = db.Column(db.DateTime)
+    # Materialized from views/likes/comments on every write so sorts use indexes.
+    like_rate = db.Column(db.Float, nullable=False, default=0.0, server_default="0")
+    comment_rate = db.Column(db.Float, nullable=False, default=0.0, server_default="0")
+    engagement_rate = db.Column(
+        db.Float, nullable=False, default=0.0, server_default="0"
+    )
     channel_id = db.Column(db.Integer, db.ForeignKey("channels.id"))
 
     channel = db.relationship("Channel", back_populates="videos")
     linked_channels = db.relationship("ChannelVideo", back_populates="video", lazy=True)
-
-    def _safe_percentage_rate(self, numerator):
-        """Return a 2-decimal percentage, suppressing invalid math states."""
-        try:
-            return round((numerator / self.views) * 100, 2)
-        except (ZeroDivisionError, TypeError):
-            return 0.0
+    transcript_record = db.relationship(
+        "VideoTranscript",
+        back_populates="video",
+        uselist=False,
+        lazy="select",
+        cascade="all, delete-orphan",
+    )
+    # Append-only and potentially huge: never loaded as a collection.
+    stats_snapshots = db.relationship(
+        "VideoStatsSnapshot",
+        back_populates="video",
+        lazy="write_only",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+    )
+    trend = db.relationship(
+        "VideoTrend",
+        back_populates="video",
+        uselist=False,
+        lazy="select",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+    )
 
     @property
-    def like_rate(self):
-        """Likes as a percentage of views."""
-        return self._safe_percentage_rate(self.likes)
+    def video_length(self):
+        """Duration as ``H:MM:SS`` for display."""
+        return format_duration(self.duration_seconds)
+
+    @video_length.setter
+    def video_length(self, value):
+        self.duration_seconds = duration_to_seconds(value)
 
     @property
-    def comment_rate(self):
-        """Comments as a percentage of views."""
-        return self._safe_percentage_rate(self.comments)
+    def transcript(self):
+        """Transcript text, loaded and decompressed on first access."""
+        record = self.transcript_record
+        return record.text if record is not None else None
+
+    @transcript.setter
+    def transcript(self, value):
+        if self.transcript_record is None:
+            self.transcript_record = VideoTranscript(text=value)
+        else:
+            self.transcript_record.text = value
+
+
+class VideoTranscript(db.Model):
+    """Compressed transcript text kept out of the wide ``videos`` rows."""
+
+    __tablename__ = "video_transcripts"
+
+    video_id = db.Column(db.Integer, db.ForeignKey("videos.id"), primary_key=True)
+    codec = db.Column(db.String(8), nullable=False)
+    content = db.Column(db.LargeBinary, nullable=False)
+    # Packed segment timings, see ``pack_segments``; NULL when not fetched.
+    segment_index = deferred(db.Column(db.LargeBinary))
+
+    video = db.relationship("Video", back_populates="transcript_record")
 
     @property
-    def engagement_rate(self):
-        """Combined likes + comments as a percentage of views."""
-        try:
-            engagement_total = (self.likes or 0) + (self.comments or 0)
-        except TypeError:
-            engagement_total = 0
-        return self._safe_percentage_rate(engagement_total)
+    def text(self):
+        return decompress_text(self.codec, self.content)
+
+    @text.setter
+    def text(self, value):
+        self.codec, self.content = compress_text(value)
+
+
+class VideoStatsSnapshot(db.Model):
+    """Views, likes and comments of a video as seen by one refresh.
+
+    A row is appended only when the counts changed. The composite primary key
+    doubles as the ``(video_id, captured_at)`` range index, and on SQLite the
+    table is stored ``WITHOUT ROWID`` so that index is the table itself.
+    """
+
+    __tablename__ = "video_stats_snapshots"
+    __table_args__ = {"sqlite_with_rowid": False}
+
+    video_id = db.Column(
+        db.Integer,
+        db.ForeignKey("videos.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    captured_at = db.Column(db.DateTime, primary_key=True)
+    views = db.Column(db.Integer, nullable=False, default=0)
+    likes = db.Column(db.Integer, nullable=False, default=0)
+    comments = db.Column(db.Integer, nullable=False, default=0)
+
+    video = db.relationship("Video", back_populates="stats_snapshots")
+
+
+class VideoTrend(db.Model):
+    """Latest view velocity of a video, kept current by the save path.
+
+    Each refresh replaces the row with the views seen and the views per hour
+    (and change in views per hour) since the previous sample, so the
+    ``views_per_hour`` and ``acceleration`` indexes hold the trending top-K
+    without reading ``video_stats_snapshots``.
+    """
+
+    __tablename__ = "video_trends"
+    __table_args__ = (
+        db.Index("ix_video_trends_views_per_hour", "views_per_hour"),
+        db.Index("ix_video_trends_acceleration", "acceleration"),
+    )
+
+    video_id = db.Column(
+        db.Integer,
+        db.ForeignKey("videos.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    sampled_at = db.Column(db.DateTime, nullable=False)
+    views = db.Column(db.Integer, nullable=False, default=0)
+    # NULL until a second sample exists.
+    views_per_hour = db.Column(db.Float)
+    # Change in views per hour, per hour, between the last two intervals.
+    acceleration = db.Column(db.Float)
+
+    video = db.relationship("Video", back_populates="trend")
+
+
+def _safe_percentage_rate(numerator, views):
+    """Return a 2-decimal percentage, suppressing invalid math states."""
+    try:
+        return round((numerator / views) * 100, 2)
+    except (ZeroDivisionError, TypeError):
+        return 0.0
+
+
+def engagement_rates(views, likes, comments):
+    """Like, comment and combined engagement rates as percentages of views."""
+    return {
+        "like_rate": _safe_percentage_rate(likes, views),
+        "comment_rate": _safe_percentage_rate(comments, views),
+        "engagement_rate": _safe_percentage_rate((likes or 0) + (comments or 0), views),
+    }
+
+
+@event.listens_for(Video, "before_insert")
+@event.listens_for(Video, "before_update")
+def _store_engagement_rates(_mapper, _connection, target):
+    for column, value in engagement_rates(
+        target.views, target.likes, target.comments
+    ).items():
+        setattr(target, column, value)
 
 
 class ChannelHistory(db.Model):
     __tablename__ = "channel_history"
+    __table_args__ = (
+        db.Index(
+            "ix_channel_history_channel_id_recorded_at", "channel_id", "recorded_at"
+        ),
+        db.Index("ix_channel_history_recorded_at", "recorded_at"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     channel_id = db.Column(db.Integer, db.ForeignKey("channels.id"), nullable=False)
     previous_subscribers = db.Column(db.Integer, nullable=False, default=0)
-    recorded_at = db.Column(db.Text, server_default=db.text("CURRENT_TIMESTAMP"))
+    recorded_at = db.Column(Timestamp, server_default=db.text("CURRENT_TIMESTAMP"))
 
     channel = db.relationship("Channel", back_populates="history_records")
 
 
 class ChannelVideo(db.Model):
     __tablename__ = "channel_videos"
+    __table_args__ = (db.Index("ix_channel_videos_channel_id", "channel_id"),)
 
     video_id = db.Column(db.Integer, db.ForeignKey("videos.id"), primary_key=True)
     channel_id = db.Column(db.Integer, db.ForeignKey("channels.id"), primary_key=True)
 
     video = db.relationship("Video", back_populates="linked_channels")
     channel = db.relationship("Channel", back_populates="linked_videos")
+
+
+class RowCounter(db.Model):
+    """Maintained row counts so totals never need a ``COUNT(*)`` scan."""
+
+    __tablename__ = "row_counters"
+
+    name = db.Column(db.String, primary_key=True)
+    value = db.Column(db.BigInteger, nullable=False, default=0)
+
+
+COUNTER_VIDEOS = "videos"
+COUNTER_CHANNELS = "channels"
+COUNTER_CHANNEL_HISTORY = "channel_history"
+COUNTED_MODELS = {
+    Video: COUNTER_VIDEOS,
+    Channel: COUNTER_CHANNELS,
+    ChannelHistory: COUNTER_CHANNEL_HISTORY,
+}
+# Bumped by every write to an exported table; export artifacts are keyed on it.
+COUNTER_DATA_VERSION = "data_version"
+VERSIONED_MODELS = (Video, VideoTranscript, Channel, ChannelHistory, ChannelVideo)
+
+
+CHANNEL_VIDEOS_COUNTER_PREFIX = "channel_videos:"
+
+
+def channel_videos_counter(channel_id):
+    """Counter name for the number of videos whose primary channel is ``channel_id``."""
+    return f"{CHANNEL_VIDEOS_COUNTER_PREFIX}{channel_id}"
+
+
+def apply_counter_deltas(connection, deltas):
+    """Add ``{name: delta}`` to existing counters in the caller's transaction.
+
+    Counters that do not exist yet are left alone; they are seeded from a
+    ``COUNT(*)`` the first time they are read.
+    """
+    counters = RowCounter.__table__
+    rows = [
+        {"b_name": name, "b_delta": delta} for name, delta in deltas.items() if delta
+    ]
+    if rows:
+        connection.execute(
+            update(counters)
+            .where(counters.c.name == bindparam("b_name"))
+            .values(value=counters.c.value + bindparam("b_delta")),
+            rows,
+        )
+
+
+def _video_channel_delta(deltas, channel_id, delta):
+    if channel_id is not None:
+        deltas[channel_videos_counter(channel_id)] += delta
+
+
+@event.listens_for(db.session, "after_flush")
+def _count_orm_writes(session, _flush_context):
+    deltas = Counter()
+    for obj, delta in [(obj, 1) for obj in session.new] + [
+        (obj, -1) for obj in session.deleted
+    ]:
+        name = COUNTED_MODELS.get(type(obj))
+        if name is None:
+            continue
+        deltas[name] += delta
+        if isinstance(obj, Video):
+            _video_channel_delta(deltas, obj.channel_id, delta)
+
+    for obj in session.dirty:
+        if not isinstance(obj, Video):
+            continue
+        history = inspect(obj).attrs.channel_id.history
+        if history.has_changes():
+            for channel_id in history.deleted:
+                _video_channel_delta(deltas, channel_id, -1)
+            for channel_id in history.added:
+                _video_channel_delta(deltas, channel_id, 1)
+
+    if any(
+        isinstance(obj, VERSIONED_MODELS)
+        for obj in (*session.new, *session.dirty, *session.deleted)
+    ):
+        deltas[COUNTER_DATA_VERSION] += 1
+    apply_counter_deltas(session.connection(), deltas)
+
+
+class ChannelStats(db.Model):
+    """Per-channel rollup of its videos, read in one primary-key lookup.
+
+    The save path applies deltas to existing rows; missing rows are computed
+    from ``videos`` when first read (see ``crud.get_channel_stats``).
+    """
+
+    __tablename__ = "channel_stats"
+
+    channel_id = db.Column(
+        db.Integer, db.ForeignKey("channels.id", ondelete="CASCADE"), primary_key=True
+    )
+    video_count = db.Column(db.Integer, nullable=False, default=0)
+    total_views = db.Column(db.BigInteger, nullable=False, default=0)
+    total_likes = db.Column(db.BigInteger, nullable=False, default=0)
+    total_comments = db.Column(db.BigInteger, nullable=False, default=0)
+    engagement_rate_sum = db.Column(db.Float, nullable=False, default=0.0)
+    median_views = db.Column(db.Float)
+    latest_upload = db.Column(db.Date)
+
+
+# Video columns the channel rollup is computed from.
+CHANNEL_STATS_SOURCE_COLUMNS = (
+    "channel_id",
+    "views",
+    "likes",
+    "comments",
+    "engagement_rate",
+    "posted",
+)
+
+
+@event.listens_for(db.session, "after_flush")
+def _invalidate_channel_stats(session, _flush_context):
+    """Drop rollups of channels whose videos changed through the ORM.
+
+    Bulk saves maintain ``channel_stats`` with deltas; ORM writes are rare, so
+    their channels are simply recomputed on the next read.
+    """
+    channel_ids = set()
+    for obj in session.new | session.deleted | session.dirty:
+        if not isinstance(obj, Video):
+            continue
+        state = inspect(obj)
+        if obj in session.dirty and not any(
+            state.attrs[column].history.has_changes()
+            for column in CHANNEL_STATS_SOURCE_COLUMNS
+        ):
+            continue
+        channel_ids.add(obj.channel_id)
+        channel_ids.update(state.attrs.channel_id.history.deleted)
+    channel_ids.discard(None)
+    if channel_ids:
+        stats = ChannelStats.__table__
+        session.connection().execute(
+            stats.delete().where(stats.c.channel_id.in_(channel_ids))
+        )
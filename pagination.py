@@ -0,0 +1,153 @@
+import base64
+import binascii
+import json
+from datetime import date, datetime
+
+from sqlalchemy import tuple_
+
+from models import db
+
+
+class InvalidCursor(ValueError):
+    """Raised when a pagination cursor cannot be decoded or does not apply."""
+
+
+def _encode_value(value):
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    if isinstance(value, date):
+        return {"d": value.isoformat()}
+    return value
+
+
+def _decode_value(value):
+    if isinstance(value, dict):
+        if "dt" in value:
+            return datetime.fromisoformat(value["dt"])
+        if "d" in value:
+            return date.fromisoformat(value["d"])
+        raise InvalidCursor("Unknown cursor value type.")
+    return value
+
+
+def encode_cursor(scope, value, row_id, backward=False):
+    """Opaque token pointing just past ``(value, row_id)`` in ``scope``'s order."""
+    payload = {"s": list(scope), "v": _encode_value(value), "i": row_id}
+    if backward:
+        payload["b"] = 1
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token, scope):
+    """Return ``(value, row_id, backward)`` for a token issued for ``scope``.
+
+    Tokens issued for another dataset or sort order decode to ``None`` (start
+    from the first page); malformed tokens raise ``InvalidCursor``.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        payload = json.loads(raw)
+        if payload["s"] != list(scope):
+            return None
+        value = _decode_value(payload["v"])
+        return value, int(payload["i"]), bool(payload.get("b"))
+    except InvalidCursor:
+        raise
+    except (binascii.Error, UnicodeDecodeError, ValueError, KeyError, TypeError) as e:
+        raise InvalidCursor("Malformed cursor.") from e
+
+
+def _nulls_sort_low():
+    # PostgreSQL treats NULL as larger than every value; SQLite and MySQL as smaller.
+    return db.session.get_bind().dialect.name != "postgresql"
+
+
+def _ordered(column, direction):
+    return column.asc() if direction == "asc" else column.desc()
+
+
+def _after(column, direction, value):
+    return column > value if direction == "asc" else column < value
+
+
+def keyset_page(query, sort_column, id_column, direction, limit, cursor=None):
+    """Fetch one keyset page of ``query`` ordered by ``sort_column`` then ``id``.
+
+    ``cursor`` is ``None`` for the first page or a decoded ``(value, id,
+    backward)`` tuple. Rows with a NULL sort value are read as their own
+    segment, placed where the database would sort them, so every statement is
+    an index range scan on ``sort_column`` instead of an ``OFFSET`` walk.
+
+    The sort value of each row is appended as the last selected column.
+    Returns ``(rows, has_more)`` with rows in display order; ``has_more`` says
+    whether rows exist beyond the page in the direction of travel.
+    """
+    backward = bool(cursor and cursor[2])
+    if backward:
+        direction = "desc" if direction == "asc" else "asc"
+
+    query = query.add_columns(sort_column)
+    value_segment = query.filter(sort_column.isnot(None)).order_by(
+        _ordered(sort_column, direction), _ordered(id_column, direction)
+    )
+    if not getattr(sort_column.expression, "nullable", True):
+        segments = [("value", value_segment)]
+    else:
+        null_segment = query.filter(sort_column.is_(None)).order_by(
+            _ordered(id_column, direction)
+        )
+        nulls_first = _nulls_sort_low() == (direction == "asc")
+        segments = [("value", value_segment), ("null", null_segment)]
+        if nulls_first:
+            segments.reverse()
+
+    if cursor is not None:
+        value, row_id, _ = cursor
+        start = "null" if value is None else "value"
+        while segments[0][0] != start:
+            segments.pop(0)
+        kind, segment = segments[0]
+        if kind == "null":
+            segment = segment.filter(_after(id_column, direction, row_id))
+        else:
+            segment = segment.filter(
+                _after(tuple_(sort_column, id_column), direction, (value, row_id))
+            )
+        segments[0] = (kind, segment)
+
+    rows = []
+    for _kind, segment in segments:
+        rows.extend(segment.limit(limit + 1 - len(rows)).all())
+        if len(rows) > limit:
+            break
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if backward:
+        rows.reverse()
+    return rows, has_more
+
+
+def keyset_metadata(rows, scope, has_more, cursor, limit, total):
+    """Pagination block for a keyset page, mirroring the page-based fields."""
+    backward = bool(cursor and cursor[2])
+    has_next = has_more if not backward else True
+    has_prev = has_more if backward else cursor is not None
+    first, last = (rows[0], rows[-1]) if rows else (None, None)
+    return {
+        "total_items": total,
+        "per_page": limit,
+        "has_next": bool(has_next and last is not None),
+        "has_prev": bool(has_prev and first is not None),
+        "next_cursor": (
+            encode_cursor(scope, last[-1], last[0].id)
+            if has_next and last is not None
+            else None
+        ),
+        "prev_cursor": (
+            encode_cursor(scope, first[-1], first[0].id, backward=True)
+            if has_prev and first is not None
+            else None
+        ),
+    }
@@ -0,0 +1,175 @@
+import logging
+import os
+import re
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import delete, func, select, tuple_
+
+from database import single_writer
+from models import (
+    COUNTER_CHANNEL_HISTORY,
+    COUNTER_DATA_VERSION,
+    ChannelHistory,
+    VideoStatsSnapshot,
+    apply_counter_deltas,
+    db,
+    use_primary,
+)
+
+logger = logging.getLogger(__name__)
+
+HISTORY_GRANULARITIES = ("hour", "day", "week")
+# "<granularity>@<age>" tiers: rows older than the age keep one sample per
+# bucket of that granularity (the latest one).
+DEFAULT_RETENTION_POLICY = "hour@7d,day@30d,week@365d"
+HISTORY_RETENTION_POLICY = os.environ.get(
+    "HISTORY_RETENTION_POLICY", DEFAULT_RETENTION_POLICY
+)
+_AGE_UNITS = {"h": "hours", "d": "days", "w": "weeks"}
+
+
+def parse_retention_policy(policy):
+    """Parse ``"hour@7d,day@30d"`` into ``[(granularity, timedelta), ...]``."""
+    tiers = []
+    for part in filter(None, (chunk.strip() for chunk in policy.split(","))):
+        match = re.fullmatch(r"(\w+)@(\d+)([hdw])", part)
+        if match is None or match.group(1) not in HISTORY_GRANULARITIES:
+            raise ValueError(f"Invalid retention tier: {part!r}")
+        age = timedelta(**{_AGE_UNITS[match.group(3)]: int(match.group(2))})
+        tiers.append((match.group(1), age))
+    return tiers
+
+
+def _dialect():
+    return db.session.get_bind().dialect.name
+
+
+def history_bucket(column, granularity):
+    """SQL expression truncating a timestamp column to ``granularity``."""
+    if granularity not in HISTORY_GRANULARITIES:
+        raise ValueError(f"Unknown granularity: {granularity}")
+    if _dialect() == "postgresql":
+        return func.date_trunc(granularity, column)
+    if granularity == "hour":
+        return func.strftime("%Y-%m-%d %H:00:00", column)
+    if granularity == "day":
+        return func.date(column)
+    # SQLite weeks start on the Monday on or before the date.
+    return func.date(column, "weekday 0", "-6 days")
+
+
+def _history_tables():
+    """``(name, table, series, timestamp, kept)`` per history table.
+
+    ``kept`` is the column whose maximum marks the row a bucket keeps.
+    """
+    history = ChannelHistory.__table__
+    snapshots = VideoStatsSnapshot.__table__
+    return (
+        (
+            "channel_history",
+            history,
+            history.c.channel_id,
+            history.c.recorded_at,
+            history.c.id,
+        ),
+        (
+            "video_stats_snapshots",
+            snapshots,
+            snapshots.c.video_id,
+            snapshots.c.captured_at,
+            snapshots.c.captured_at,
+        ),
+    )
+
+
+def compact_history(now=None, policy=None):
+    """Downsample old rows of the history tables according to ``policy``.
+
+    For every tier, rows older than its age are reduced to the latest row per
+    series and bucket. Each tier is one set-based DELETE per table, committed
+    on its own. Returns ``{table: deleted_rows}``.
+    """
+    now = now or datetime.now(timezone.utc).replace(tzinfo=None)
+    tiers = parse_retention_policy(
+        HISTORY_RETENTION_POLICY if policy is None else policy
+    )
+    deleted = Counter()
+
+    for name, table, series, timestamp, kept in _history_tables():
+        for granularity, age in tiers:
+            cutoff = now - age
+            survivors = (
+                select(series, func.max(kept))
+                .where(timestamp < cutoff)
+                .group_by(series, history_bucket(timestamp, granularity))
+            )
+            with use_primary(), single_writer():
+                result = db.session.execute(
+                    delete(table).where(
+                        timestamp < cutoff, tuple_(series, kept).not_in(survivors)
+                    )
+                )
+                if name == "channel_history" and result.rowcount:
+                    apply_counter_deltas(
+                        db.session.connection(),
+                        {
+                            COUNTER_CHANNEL_HISTORY: -result.rowcount,
+                            COUNTER_DATA_VERSION: 1,
+                        },
+                    )
+                db.session.commit()
+            deleted[name] += max(result.rowcount, 0)
+
+    logger.info("Compacted history tables: %s", dict(deleted))
+    return dict(deleted)
+
+
+def _serialize_period(value):
+    return value.isoformat() if isinstance(value, datetime) else str(value)
+
+
+def get_channel_history_series(
+    channel_id, granularity="day", since=None, until=None, limit=1000
+):
+    """Subscriber history of one channel downsampled to ``granularity``.
+
+    Returns the latest ``limit`` buckets inside ``[since, until]`` oldest
+    first; each point has the bucket ``period``, the last recorded
+    ``subscribers`` value in it and the bucket's ``min``/``max``.
+    """
+    history = ChannelHistory.__table__
+    bucket = history_bucket(history.c.recorded_at, granularity).label("period")
+    stmt = select(
+        bucket,
+        func.max(history.c.id).label("last_id"),
+        func.min(history.c.previous_subscribers).label("min"),
+        func.max(history.c.previous_subscribers).label("max"),
+    ).where(history.c.channel_id == channel_id)
+    if since is not None:
+        stmt = stmt.where(history.c.recorded_at >= since)
+    if until is not None:
+        stmt = stmt.where(history.c.recorded_at <= until)
+    buckets = (
+        stmt.group_by(bucket).order_by(bucket.desc()).limit(limit).subquery("buckets")
+    )
+    rows = db.session.execute(
+        select(
+            buckets.c.period,
+            buckets.c.min,
+            buckets.c.max,
+            history.c.previous_subscribers,
+        )
+        .join(history, history.c.id == buckets.c.last_id)
+        .order_by(buckets.c.period)
+    ).all()
+    return [
+        {
+            "period": _serialize_period(row.period),
+            "subscribers": row.previous_subscribers,
+            "min": row.min,
+            "max": row.max,
+        }
+        for row in rows
+    ]
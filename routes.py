@@ -1,11 +1,35 @@
 import os
 import logging
+import operator
+from datetime import date, datetime, timedelta, timezone
 
-from crud import save_video
-from export import build_xlsx_export_file, stream_all_tables_csv
+from analytics import get_analytics
+from crud import (
+    TRANSCRIPT_STATUS_AVAILABLE,
+    TRENDING_SORTS,
+    get_channel_stats,
+    get_row_counts,
+    get_trending_videos,
+    get_video_stats_series,
+    save_video,
+    utc_now,
+)
+from export import (
+    ARTIFACT_BUILDERS,
+    EXPORT_FORMATS,
+    EXPORT_TABLES,
+    build_export_artifact,
+    export_artifact_path,
+    export_columns,
+    export_data_version,
+    find_export_artifact,
+    parquet_supported,
+    stream_table_parquet,
+    stream_tables_csv,
+    stream_tables_ndjson,
+)
 from flask import (
     Response,
-    after_this_request,
     flash,
     jsonify,
     redirect,
@@ -15,11 +39,34 @@ from flask import (
     stream_with_context,
     url_for,
 )
-from models import Channel, ChannelHistory, Video, db
+from models import (
+    COUNTER_CHANNEL_HISTORY,
+    COUNTER_CHANNELS,
+    COUNTER_VIDEOS,
+    Channel,
+    ChannelHistory,
+    Video,
+    channel_videos_counter,
+    db,
+    read_replica,
+)
+from pagination import InvalidCursor, decode_cursor, keyset_metadata, keyset_page
 from pydantic import ValidationError
+from retention import HISTORY_GRANULARITIES, get_channel_history_series
 from schemas import VideoCreateSchema
-from sqlalchemy import case, func
-from tasks import RedisError, enqueue_channel_job, get_channel_job
+from search import find_transcript_moments, search_videos
+from sqlalchemy import and_, func, or_
+from sqlalchemy.orm import load_only, raiseload
+from tasks import (
+    RedisError,
+    enqueue_channel_job,
+    enqueue_export_job,
+    enqueue_video_job,
+    get_channel_job,
+    get_export_job,
+    get_video_data_cached,
+    get_video_job,
+)
 from youtube_api import (
     YOUTUBE_API_KEY,
     extract_video_id,
@@ -32,6 +79,20 @@ from youtube_api import (
 logger = logging.getLogger(__name__)
 
 MAX_API_PAGE_SIZE = 200
+MAX_ANALYTICS_LIMIT = 100
+EXPORT_SELECTION_PARAMS = (
+    "table",
+    "columns",
+    "channel_id",
+    "channel",
+    "since",
+    "until",
+)
+XLSX_MIMETYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+MAX_TRENDING_LIMIT = 100
+# Videos not sampled within this many hours drop out of /api/trending.
+TRENDING_WINDOW_HOURS = 48
+VIDEO_SCRAPE_MODE = os.environ.get("VIDEO_SCRAPE_MODE", "sync").lower()
 
 
 def _parse_positive_int(value, default, maximum=None):
@@ -49,20 +110,163 @@ def _parse_positive_int(value, default, maximum=None):
     return parsed
 
 
+def _parse_datetime_param(value):
+    """Parse an ISO 8601 query value into naive UTC; ``None`` when absent.
+
+    Raises ``ValueError`` for values that are not ISO 8601.
+    """
+    if not value:
+        return None
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def _parse_non_negative_int(value):
+    parsed = int(value)
+    if parsed < 0:
+        raise ValueError(f"Negative value: {value}")
+    return parsed
+
+
+def _parse_bool_param(value):
+    lowered = value.lower()
+    if lowered in {"1", "true", "yes", "on"}:
+        return True
+    if lowered in {"0", "false", "no", "off"}:
+        return False
+    raise ValueError(f"Not a boolean: {value}")
+
+
+def _starts_with(column, prefix):
+    """Case-sensitive prefix match that an index range scan can serve.
+
+    The bounds let the planner seek the column's index (``LIKE`` cannot on
+    SQLite, where it ignores case); ``substr`` keeps the match exact under any
+    collation.
+    """
+    return and_(
+        column >= prefix,
+        column < prefix + "\U0010ffff",
+        func.substr(column, 1, len(prefix)) == prefix,
+    )
+
+
+def _has_transcript(column, wanted):
+    if wanted:
+        return column == TRANSCRIPT_STATUS_AVAILABLE
+    return or_(column.is_(None), column != TRANSCRIPT_STATUS_AVAILABLE)
+
+
+class InvalidFilter(ValueError):
+    """A filter query parameter whose value cannot be parsed."""
+
+    def __init__(self, param):
+        super().__init__(param)
+        self.param = param
+
+
+def _dataset_filters(filters, args):
+    """WHERE clauses for the filter parameters present in ``args``.
+
+    ``filters`` are ``(param, column, compare, parse)`` entries of a dataset
+    spec; values are parsed and bound, never interpolated. Raises
+    ``InvalidFilter`` for unparseable values.
+    """
+    clauses = {}
+    for param, column, compare, parse in filters:
+        raw = args.get(param)
+        if raw is None or raw.strip() == "":
+            continue
+        try:
+            value = parse(raw.strip())
+        except ValueError:
+            raise InvalidFilter(param) from None
+        clauses[param] = compare(column, value)
+    return clauses
+
+
+def _split_param(args, param):
+    """Values of a repeatable, comma-separated query parameter, or ``None``."""
+    values = [
+        value.strip()
+        for raw in args.getlist(param)
+        for value in raw.split(",")
+        if value.strip()
+    ]
+    return values or None
+
+
+def _export_selection(args):
+    """``(tables, options)`` for ``/export`` from its query parameters.
+
+    ``table`` selects tables (all by default), ``columns`` projects them,
+    ``channel_id``/``channel`` and ``since``/``until`` (inclusive dates)
+    filter rows. Raises ``InvalidFilter`` for values that do not apply.
+    """
+    tables = _split_param(args, "table") or list(EXPORT_TABLES)
+    if any(table_name not in EXPORT_TABLES for table_name in tables):
+        raise InvalidFilter("table")
+    tables = list(dict.fromkeys(tables))
+
+    options = {}
+    columns = _split_param(args, "columns")
+    if columns is not None:
+        available = {table_name: export_columns(table_name) for table_name in tables}
+        known = {name for names in available.values() for name in names}
+        if not set(columns) <= known or not all(
+            set(columns) & set(names) for names in available.values()
+        ):
+            raise InvalidFilter("columns")
+        options["columns"] = set(columns)
+
+    channel_id = args.get("channel_id", "").strip()
+    username = args.get("channel", "").strip()
+    if channel_id:
+        try:
+            options["channel_id"] = _parse_non_negative_int(channel_id)
+        except ValueError:
+            raise InvalidFilter("channel_id") from None
+    elif username:
+        options["channel_id"] = (
+            db.session.query(Channel.id).filter_by(channel_username=username).scalar()
+        )
+        if options["channel_id"] is None:
+            raise InvalidFilter("channel")
+
+    for param in ("since", "until"):
+        raw = args.get(param, "").strip()
+        if raw:
+            try:
+                options[param] = date.fromisoformat(raw)
+            except ValueError:
+                raise InvalidFilter(param) from None
+    return tables, options
+
+
 def _normalize_sort_direction(value):
     return "asc" if str(value).lower() == "asc" else "desc"
 
 
-def _build_order_clause(
+def _resolve_sort(
     column_map, sort_column, sort_direction, default_column, default_direction="desc"
 ):
+    """Return ``(column_name, column, direction)``, falling back to the default."""
     if sort_column in column_map:
-        target_column = column_map[sort_column]
-        direction = sort_direction
-    else:
-        target_column = default_column
-        direction = default_direction
+        return sort_column, column_map[sort_column], sort_direction
+    default_name = next(
+        name for name, column in column_map.items() if column is default_column
+    )
+    return default_name, default_column, default_direction
+
 
+def _build_order_clause(
+    column_map, sort_column, sort_direction, default_column, default_direction="desc"
+):
+    _name, target_column, direction = _resolve_sort(
+        column_map, sort_column, sort_direction, default_column, default_direction
+    )
     return target_column.asc() if direction == "asc" else target_column.desc()
 
 
@@ -79,6 +283,204 @@ def _pagination_metadata(page_obj):
     }
 
 
+def _without_sort_value(row):
+    """Drop the sort key ``keyset_page`` appends, unwrapping single entities."""
+    values = tuple(row)[:-1]
+    return values[0] if len(values) == 1 else values
+
+
+CHANNEL_DETAIL_PAGE_SIZE = 50
+# Columns the channel page lists; descriptions and transcripts stay unloaded.
+CHANNEL_VIDEO_COLUMNS = ("id", "title", "views", "likes", "comments", "saved_at")
+
+
+def _keyset_section(query, sort_column, id_column, scope, token):
+    """One newest-first keyset page of ``query`` for a detail page section.
+
+    Unreadable or foreign cursors fall back to the first page. Returns the
+    entities and the ``keyset_metadata`` block for the page links.
+    """
+    try:
+        cursor = decode_cursor(token, scope) if token else None
+    except InvalidCursor:
+        cursor = None
+    rows, has_more = keyset_page(
+        query, sort_column, id_column, "desc", CHANNEL_DETAIL_PAGE_SIZE, cursor
+    )
+    page = keyset_metadata(
+        rows, scope, has_more, cursor, CHANNEL_DETAIL_PAGE_SIZE, None
+    )
+    return [_without_sort_value(row) for row in rows], page
+
+
+API_DATASETS = ("videos", "channels", "history")
+API_COUNT_KEYS = {
+    "videos": "total_videos",
+    "channels": "total_channels",
+    "history": "total_history_records",
+}
+API_TOTALS_MODES = ("all", "dataset", "none")
+
+
+def _isoformat(value):
+    return value.isoformat() if value is not None else None
+
+
+def _serialize_video_row(row):
+    video, channel_username, subscribers = row
+    return {
+        "id": video.id,
+        "youtube_video_id": video.youtube_video_id,
+        "title": video.title,
+        "channel_username": channel_username,
+        "views": video.views,
+        "likes": video.likes,
+        "comments": video.comments,
+        "like_rate": video.like_rate,
+        "comment_rate": video.comment_rate,
+        "engagement_rate": video.engagement_rate,
+        "posted": _isoformat(video.posted),
+        "video_length": video.video_length,
+        "duration_seconds": video.duration_seconds,
+        "saved_at": _isoformat(video.saved_at),
+        "subscribers": subscribers,
+    }
+
+
+def _serialize_channel_row(channel):
+    return {
+        "id": channel.id,
+        "channel_username": channel.channel_username,
+        "subscribers": channel.subscribers,
+    }
+
+
+def _serialize_history_row(row):
+    record, channel_username = row
+    return {
+        "id": record.id,
+        "channel_username": channel_username,
+        "previous_subscribers": record.previous_subscribers,
+        "recorded_at": _isoformat(record.recorded_at),
+    }
+
+
+# Each /api/data dataset: base query (built per request), sortable columns,
+# default sort, keyset tiebreaker, row serializer and filter parameters.
+# Filter bounds (``*_from``/``*_to``, ``min_*``/``max_*``) are inclusive.
+_DATASET_SPECS = {
+    "videos": {
+        "query": lambda: db.session.query(
+            Video, Channel.channel_username, Channel.subscribers
+        ).join(Channel, Video.channel_id == Channel.id),
+        "sort_columns": {
+            "id": Video.id,
+            "youtube_video_id": Video.youtube_video_id,
+            "title": Video.title,
+            "channel_username": Channel.channel_username,
+            "views": Video.views,
+            "likes": Video.likes,
+            "comments": Video.comments,
+            "like_rate": Video.like_rate,
+            "comment_rate": Video.comment_rate,
+            "engagement_rate": Video.engagement_rate,
+            "posted": Video.posted,
+            "video_length": Video.duration_seconds,
+            "duration_seconds": Video.duration_seconds,
+            "saved_at": Video.saved_at,
+            "subscribers": Channel.subscribers,
+        },
+        "default_sort": Video.saved_at,
+        "id_column": Video.id,
+        "counter": COUNTER_VIDEOS,
+        "serialize": _serialize_video_row,
+        "filters": (
+            ("channel_id", Video.channel_id, operator.eq, int),
+            ("channel", Channel.channel_username, operator.eq, str),
+            ("title_prefix", Video.title, _starts_with, str),
+            ("min_views", Video.views, operator.ge, _parse_non_negative_int),
+            ("max_views", Video.views, operator.le, _parse_non_negative_int),
+            (
+                "has_transcript",
+                Video.transcript_status,
+                _has_transcript,
+                _parse_bool_param,
+            ),
+            ("posted_from", Video.posted, operator.ge, date.fromisoformat),
+            ("posted_to", Video.posted, operator.le, date.fromisoformat),
+            ("saved_from", Video.saved_at, operator.ge, _parse_datetime_param),
+            ("saved_to", Video.saved_at, operator.le, _parse_datetime_param),
+            (
+                "min_duration",
+                Video.duration_seconds,
+                operator.ge,
+                _parse_non_negative_int,
+            ),
+            (
+                "max_duration",
+                Video.duration_seconds,
+                operator.le,
+                _parse_non_negative_int,
+            ),
+        ),
+    },
+    "channels": {
+        "query": lambda: db.session.query(Channel),
+        "sort_columns": {
+            "id": Channel.id,
+            "channel_username": Channel.channel_username,
+            "subscribers": Channel.subscribers,
+        },
+        "default_sort": Channel.subscribers,
+        "id_column": Channel.id,
+        "counter": COUNTER_CHANNELS,
+        "serialize": _serialize_channel_row,
+        "filters": (
+            ("channel_id", Channel.id, operator.eq, int),
+            ("channel", Channel.channel_username, operator.eq, str),
+        ),
+    },
+    "history": {
+        "query": lambda: db.session.query(
+            ChannelHistory, Channel.channel_username
+        ).join(Channel, ChannelHistory.channel_id == Channel.id),
+        "sort_columns": {
+            "id": ChannelHistory.id,
+            "channel_username": Channel.channel_username,
+            "previous_subscribers": ChannelHistory.previous_subscribers,
+            "recorded_at": ChannelHistory.recorded_at,
+        },
+        "default_sort": ChannelHistory.recorded_at,
+        "id_column": ChannelHistory.id,
+        "counter": COUNTER_CHANNEL_HISTORY,
+        "serialize": _serialize_history_row,
+        "filters": (
+            ("channel_id", ChannelHistory.channel_id, operator.eq, int),
+            ("channel", Channel.channel_username, operator.eq, str),
+            (
+                "recorded_from",
+                ChannelHistory.recorded_at,
+                operator.ge,
+                _parse_datetime_param,
+            ),
+            (
+                "recorded_to",
+                ChannelHistory.recorded_at,
+                operator.le,
+                _parse_datetime_param,
+            ),
+        ),
+    },
+}
+
+
+def _count_rows(datasets):
+    """Totals for ``datasets`` from the maintained row counters."""
+    counters = {name: _DATASET_SPECS[name]["counter"] for name in datasets}
+    values = get_row_counts(counters.values())
+    return {name: values[counter] for name, counter in counters.items()}
+
+
 def _safe_float(value):
     try:
         return float(value)
@@ -96,6 +498,16 @@ def _safe_percentage_rate(numerator, denominator):
         return 0.0
 
 
+def _with_engagement_rates(video_data):
+    likes = _safe_float(video_data.get("likes"))
+    comments = _safe_float(video_data.get("comments"))
+    views = video_data.get("views")
+    video_data["like_rate"] = _safe_percentage_rate(likes, views)
+    video_data["comment_rate"] = _safe_percentage_rate(comments, views)
+    video_data["engagement_rate"] = _safe_percentage_rate(likes + comments, views)
+    return video_data
+
+
 def register_routes(app, limiter):
     """Register application routes."""
 
@@ -126,21 +538,44 @@ def register_routes(app, limiter):
                 )
                 return render_template("index.html", data=None)
 
-            video_data = get_video_data(video_id)
+            if VIDEO_SCRAPE_MODE == "job":
+                try:
+                    job_id = enqueue_video_job(video_id)
+                except RedisError:
+                    logger.warning(
+                        "Video queue unavailable; scraping %s inline.", video_id
+                    )
+                else:
+                    return redirect(url_for("index", video_job=job_id))
+
+            video_data = get_video_data_cached(video_id, fetcher=get_video_data)
             if not video_data:
                 flash(
                     "Could not fetch video data. Check your API key/quota and try again.",
                     "warning",
                 )
             else:
-                likes = _safe_float(video_data.get("likes"))
-                comments = _safe_float(video_data.get("comments"))
-                views = video_data.get("views")
-                video_data["like_rate"] = _safe_percentage_rate(likes, views)
-                video_data["comment_rate"] = _safe_percentage_rate(comments, views)
-                video_data["engagement_rate"] = _safe_percentage_rate(
-                    likes + comments, views
-                )
+                video_data = _with_engagement_rates(video_data)
+
+            return render_template("index.html", data=video_data)
+
+        video_job_id = request.args.get("video_job")
+        if video_job_id:
+            job = get_video_job(video_job_id)
+            if not job:
+                flash("The requested scrape job was not found.", "warning")
+            elif job["status"] == "failed":
+                flash("Video scrape job failed. Please try again.", "danger")
+            elif job["status"] == "completed":
+                if job["data"]:
+                    video_data = _with_engagement_rates(job["data"])
+                else:
+                    flash(
+                        "Could not fetch video data. Check your API key/quota and try again.",
+                        "warning",
+                    )
+            else:
+                return render_template("index.html", data=None, pending_job=job)
 
         return render_template("index.html", data=video_data)
 
@@ -230,6 +665,88 @@ def register_routes(app, limiter):
             return jsonify({"error": "Job not found"}), 404
         return jsonify(job)
 
+    @app.route("/api/video-jobs/<job_id>")
+    def get_video_job_status(job_id):
+        job = get_video_job(job_id)
+        if not job:
+            return jsonify({"error": "Job not found"}), 404
+        return jsonify({key: value for key, value in job.items() if key != "data"})
+
+    def _export_job_payload(job):
+        payload = dict(job)
+        payload["download_url"] = (
+            url_for("download_export", filename=job["artifact"])
+            if job["artifact"]
+            else None
+        )
+        return payload
+
+    @app.route("/api/export-jobs", methods=["POST"])
+    def create_export_job():
+        export_format = request.args.get("format", "xlsx").lower()
+        if export_format not in ARTIFACT_BUILDERS:
+            return jsonify({"error": "Invalid format"}), 400
+
+        data_version = export_data_version()
+        path = find_export_artifact(export_format, data_version)
+        if path is not None:
+            return jsonify(
+                {
+                    "id": None,
+                    "format": export_format,
+                    "data_version": data_version,
+                    "status": "completed",
+                    "progress_pct": 100,
+                    "artifact": os.path.basename(path),
+                    "download_url": url_for(
+                        "download_export", filename=os.path.basename(path)
+                    ),
+                }
+            )
+        return _queue_export_job(export_format, data_version)
+
+    def _queue_export_job(export_format, data_version):
+        try:
+            job_id = enqueue_export_job(export_format, data_version)
+        except RedisError:
+            return (
+                jsonify(
+                    {
+                        "error": "Background queue is unavailable. Ensure Redis and the RQ worker are running."
+                    }
+                ),
+                503,
+            )
+        return _export_job_accepted(job_id)
+
+    def _export_job_accepted(job_id):
+        job = get_export_job(job_id)
+        if not job:
+            return jsonify({"error": "Job not found"}), 404
+        return (
+            jsonify(_export_job_payload(job)),
+            202,
+            {"Location": url_for("get_export_job_status", job_id=job_id)},
+        )
+
+    @app.route("/api/export-jobs/<job_id>")
+    def get_export_job_status(job_id):
+        job = get_export_job(job_id)
+        if not job:
+            return jsonify({"error": "Job not found"}), 404
+        return jsonify(_export_job_payload(job))
+
+    @app.route("/exports/<filename>")
+    def download_export(filename):
+        path = export_artifact_path(filename)
+        if path is None:
+            return jsonify({"error": "Export not found"}), 404
+        return send_file(
+            path,
+            as_attachment=True,
+            download_name="exported_data." + filename.rsplit(".", 1)[-1],
+        )
+
     @app.route("/save", methods=["POST"])
     def save():
         try:
@@ -264,26 +781,50 @@ def register_routes(app, limiter):
         return render_template("video_detail.html", video=video)
 
     @app.route("/channel/<int:channel_id>")
+    @read_replica()
     def channel_detail(channel_id):
         channel = Channel.query.get_or_404(channel_id)
-        videos = (
-            Video.query.filter_by(channel_id=channel.id)
-            .order_by(Video.saved_at.desc())
-            .all()
+        videos_cursor = request.args.get("videos_cursor")
+        history_cursor = request.args.get("history_cursor")
+        # Read first: seeding a missing counter commits, expiring loaded rows.
+        counter = channel_videos_counter(channel.id)
+        video_total = get_row_counts([counter])[counter]
+        stats = get_channel_stats([channel.id])[channel.id]
+
+        videos, videos_page = _keyset_section(
+            Video.query.filter(Video.channel_id == channel.id).options(
+                load_only(*(getattr(Video, name) for name in CHANNEL_VIDEO_COLUMNS)),
+                raiseload("*"),
+            ),
+            Video.saved_at,
+            Video.id,
+            ("channel_videos", channel.id),
+            videos_cursor,
         )
-        history = (
-            ChannelHistory.query.filter_by(channel_id=channel.id)
-            .order_by(ChannelHistory.recorded_at.desc())
-            .all()
+        history, history_page = _keyset_section(
+            ChannelHistory.query.filter(
+                ChannelHistory.channel_id == channel.id
+            ).options(raiseload("*")),
+            ChannelHistory.recorded_at,
+            ChannelHistory.id,
+            ("channel_history", channel.id),
+            history_cursor,
         )
         return render_template(
             "channel_detail.html",
             channel=channel,
             videos=videos,
+            videos_page=videos_page,
+            videos_cursor=videos_cursor,
+            video_total=video_total,
+            stats=stats,
             history=history,
+            history_page=history_page,
+            history_cursor=history_cursor,
         )
 
     @app.route("/api/data")
+    @read_replica()
     def get_data_api():
         page = _parse_positive_int(request.args.get("page", 1), default=1)
         limit = _parse_positive_int(
@@ -293,185 +834,298 @@ def register_routes(app, limiter):
         sort_direction = _normalize_sort_direction(
             request.args.get("sort_direction", "desc")
         )
-
-        engagement_rate_order = case(
-            (Video.views.is_(None), 0.0),
-            (Video.views == 0, 0.0),
-            else_=(
-                (func.coalesce(Video.likes, 0) + func.coalesce(Video.comments, 0))
-                * 100.0
-                / Video.views
-            ),
-        )
-        like_rate_order = case(
-            (Video.views.is_(None), 0.0),
-            (Video.views == 0, 0.0),
-            else_=(func.coalesce(Video.likes, 0) * 100.0 / Video.views),
-        )
-        comment_rate_order = case(
-            (Video.views.is_(None), 0.0),
-            (Video.views == 0, 0.0),
-            else_=(func.coalesce(Video.comments, 0) * 100.0 / Video.views),
+        cursor_token = request.args.get("cursor") or None
+        use_cursor = (
+            cursor_token is not None or request.args.get("pagination") == "cursor"
         )
-        videos_sort_columns = {
-            "id": Video.id,
-            "youtube_video_id": Video.youtube_video_id,
-            "title": Video.title,
-            "channel_username": Channel.channel_username,
-            "views": Video.views,
-            "likes": Video.likes,
-            "comments": Video.comments,
-            "like_rate": like_rate_order,
-            "comment_rate": comment_rate_order,
-            "engagement_rate": engagement_rate_order,
-            "posted": Video.posted,
-            "video_length": Video.video_length,
-            "saved_at": Video.saved_at,
-            "subscribers": Channel.subscribers,
+        dataset = request.args.get("dataset") or None
+        if dataset is not None and dataset not in API_DATASETS:
+            return jsonify({"error": "Unknown dataset"}), 400
+        requested = (dataset,) if dataset else API_DATASETS
+        totals = request.args.get("totals")
+        if totals not in API_TOTALS_MODES:
+            totals = "all" if dataset is None else "dataset"
+        try:
+            filters = {
+                name: _dataset_filters(
+                    _DATASET_SPECS[name].get("filters", ()), request.args
+                )
+                for name in requested
+            }
+        except InvalidFilter as e:
+            return jsonify({"error": f"Invalid filter: {e.param}"}), 400
+
+        payload = {
+            "query": {
+                "page": page,
+                "limit": limit,
+                "sort_column": sort_column,
+                "sort_direction": sort_direction,
+                "pagination": "cursor" if use_cursor else "page",
+                "cursor": cursor_token,
+                "dataset": dataset,
+                "totals": totals,
+                "filters": {
+                    param: request.args[param]
+                    for clauses in filters.values()
+                    for param in clauses
+                },
+            },
         }
-        videos_order = _build_order_clause(
-            videos_sort_columns,
-            sort_column,
-            sort_direction,
-            default_column=Video.saved_at,
-            default_direction="desc",
-        )
-        videos_page = (
-            db.session.query(Video, Channel.channel_username, Channel.subscribers)
-            .join(Channel, Video.channel_id == Channel.id)
-            .order_by(videos_order)
-            .paginate(page=page, per_page=limit, error_out=False)
+        counted = {
+            "all": API_DATASETS,
+            "dataset": requested,
+            # Page mode needs a total to number its pages.
+            "none": () if use_cursor else requested,
+        }[totals]
+        totals_by_dataset = _count_rows(counted)
+        payload["counts"] = {
+            API_COUNT_KEYS[name]: totals_by_dataset[name]
+            for name in API_DATASETS
+            if name in totals_by_dataset
+        }
+        try:
+            for name in requested:
+                spec = _DATASET_SPECS[name]
+                sort_name, column, direction = _resolve_sort(
+                    spec["sort_columns"],
+                    sort_column,
+                    sort_direction,
+                    spec["default_sort"],
+                )
+                query = spec["query"]().filter(*filters[name].values())
+                total = totals_by_dataset.get(name)
+                if filters[name] and name in counted:
+                    # The counters hold unfiltered totals.
+                    total = query.order_by(None).count()
+                if not use_cursor:
+                    order = column.asc() if direction == "asc" else column.desc()
+                    page_obj = query.order_by(order).paginate(
+                        page=page, per_page=limit, error_out=False, count=False
+                    )
+                    page_obj.total = total
+                    rows = page_obj.items
+                    pagination = _pagination_metadata(page_obj)
+                else:
+                    scope = (name, sort_name, direction)
+                    cursor = (
+                        decode_cursor(cursor_token, scope) if cursor_token else None
+                    )
+                    rows, has_more = keyset_page(
+                        query, column, spec["id_column"], direction, limit, cursor
+                    )
+                    pagination = keyset_metadata(
+                        rows,
+                        scope,
+                        has_more,
+                        cursor,
+                        limit,
+                        total,
+                    )
+                    rows = [_without_sort_value(row) for row in rows]
+                payload[name] = {
+                    "items": [spec["serialize"](row) for row in rows],
+                    "pagination": pagination,
+                }
+        except InvalidCursor:
+            return jsonify({"error": "Invalid cursor"}), 400
+
+        return jsonify(payload)
+
+    @app.route("/api/search")
+    def search_api():
+        query = request.args.get("q", "").strip()
+        page = _parse_positive_int(request.args.get("page", 1), default=1)
+        limit = _parse_positive_int(
+            request.args.get("limit", 25), default=25, maximum=MAX_API_PAGE_SIZE
         )
-        videos = [
+        if not query:
+            return jsonify({"error": "Missing search query"}), 400
+
+        items, has_next = search_videos(query, page=page, limit=limit)
+        return jsonify(
             {
-                "id": video.id,
-                "youtube_video_id": video.youtube_video_id,
-                "title": video.title,
-                "channel_username": channel_username,
-                "views": video.views,
-                "likes": video.likes,
-                "comments": video.comments,
-                "like_rate": video.like_rate,
-                "comment_rate": video.comment_rate,
-                "engagement_rate": video.engagement_rate,
-                "posted": video.posted,
-                "video_length": video.video_length,
-                "saved_at": video.saved_at,
-                "subscribers": subscribers,
+                "query": {"q": query, "page": page, "limit": limit},
+                "items": items,
+                "pagination": {
+                    "current_page": page,
+                    "per_page": limit,
+                    "has_next": has_next,
+                    "has_prev": page > 1,
+                    "next_page": page + 1 if has_next else None,
+                    "prev_page": page - 1 if page > 1 else None,
+                },
             }
-            for video, channel_username, subscribers in videos_page.items
-        ]
+        )
 
-        channels_sort_columns = {
-            "id": Channel.id,
-            "channel_username": Channel.channel_username,
-            "subscribers": Channel.subscribers,
-        }
-        channels_order = _build_order_clause(
-            channels_sort_columns,
-            sort_column,
-            sort_direction,
-            default_column=Channel.subscribers,
-            default_direction="desc",
+    @app.route("/api/videos/<int:video_id>/moments")
+    def video_moments_api(video_id):
+        query = request.args.get("q", "").strip()
+        limit = _parse_positive_int(
+            request.args.get("limit", 20), default=20, maximum=MAX_API_PAGE_SIZE
         )
-        channels_page = Channel.query.order_by(channels_order).paginate(
-            page=page, per_page=limit, error_out=False
+        if not query:
+            return jsonify({"error": "Missing search query"}), 400
+
+        result = find_transcript_moments(video_id, query, limit=limit)
+        if result is None:
+            return jsonify({"error": "Video not found"}), 404
+        return jsonify({"query": {"q": query, "limit": limit}, **result})
+
+    @app.route("/api/videos/<int:video_id>/stats")
+    def video_stats_api(video_id):
+        limit = _parse_positive_int(
+            request.args.get("limit", 500), default=500, maximum=5000
         )
-        channels = [
-            {
-                "id": channel.id,
-                "channel_username": channel.channel_username,
-                "subscribers": channel.subscribers,
-            }
-            for channel in channels_page.items
-        ]
+        try:
+            since = _parse_datetime_param(request.args.get("since"))
+            until = _parse_datetime_param(request.args.get("until"))
+        except ValueError:
+            return jsonify({"error": "Invalid date range"}), 400
 
-        history_sort_columns = {
-            "id": ChannelHistory.id,
-            "channel_username": Channel.channel_username,
-            "previous_subscribers": ChannelHistory.previous_subscribers,
-            "recorded_at": ChannelHistory.recorded_at,
-        }
-        history_order = _build_order_clause(
-            history_sort_columns,
-            sort_column,
-            sort_direction,
-            default_column=ChannelHistory.recorded_at,
-            default_direction="desc",
+        result = get_video_stats_series(video_id, since=since, until=until, limit=limit)
+        if result is None:
+            return jsonify({"error": "Video not found"}), 404
+        return jsonify(result)
+
+    @app.route("/api/channels/<int:channel_id>/stats")
+    @read_replica()
+    def channel_stats_api(channel_id):
+        if db.session.get(Channel, channel_id) is None:
+            return jsonify({"error": "Channel not found"}), 404
+        return jsonify(get_channel_stats([channel_id])[channel_id])
+
+    @app.route("/api/trending")
+    @read_replica()
+    def trending_api():
+        sort = request.args.get("sort", "views_per_hour")
+        limit = _parse_positive_int(
+            request.args.get("limit", 20), default=20, maximum=MAX_TRENDING_LIMIT
         )
-        history_page = (
-            db.session.query(ChannelHistory, Channel.channel_username)
-            .join(Channel, ChannelHistory.channel_id == Channel.id)
-            .order_by(history_order)
-            .paginate(page=page, per_page=limit, error_out=False)
+        hours = _parse_positive_int(
+            request.args.get("hours", TRENDING_WINDOW_HOURS),
+            default=TRENDING_WINDOW_HOURS,
         )
-        history = [
-            {
-                "id": record.id,
-                "channel_username": channel_username,
-                "previous_subscribers": record.previous_subscribers,
-                "recorded_at": record.recorded_at,
-            }
-            for record, channel_username in history_page.items
-        ]
+        if sort not in TRENDING_SORTS:
+            return jsonify({"error": "Invalid sort"}), 400
 
+        items = get_trending_videos(
+            sort=sort, since=utc_now() - timedelta(hours=hours), limit=limit
+        )
         return jsonify(
-            {
-                "query": {
-                    "page": page,
-                    "limit": limit,
-                    "sort_column": sort_column,
-                    "sort_direction": sort_direction,
-                },
-                "videos": {
-                    "items": videos,
-                    "pagination": _pagination_metadata(videos_page),
-                },
-                "channels": {
-                    "items": channels,
-                    "pagination": _pagination_metadata(channels_page),
-                },
-                "history": {
-                    "items": history,
-                    "pagination": _pagination_metadata(history_page),
-                },
-                "counts": {
-                    "total_videos": videos_page.total,
-                    "total_channels": channels_page.total,
-                    "total_history_records": history_page.total,
-                },
-            }
+            {"query": {"sort": sort, "hours": hours, "limit": limit}, "items": items}
+        )
+
+    @app.route("/api/analytics")
+    @read_replica()
+    def analytics_api():
+        limit = _parse_positive_int(
+            request.args.get("limit", 20), default=20, maximum=MAX_ANALYTICS_LIMIT
+        )
+        channel_id = request.args.get("channel_id")
+        if channel_id is not None:
+            try:
+                channel_id = _parse_non_negative_int(channel_id)
+            except ValueError:
+                return jsonify({"error": "Invalid filter: channel_id"}), 400
+            if db.session.get(Channel, channel_id) is None:
+                return jsonify({"error": "Channel not found"}), 404
+        return jsonify(get_analytics(channel_id, limit=limit))
+
+    @app.route("/api/channels/<int:channel_id>/history")
+    def channel_history_api(channel_id):
+        granularity = request.args.get("granularity", "day")
+        limit = _parse_positive_int(
+            request.args.get("limit", 1000), default=1000, maximum=5000
+        )
+        if granularity not in HISTORY_GRANULARITIES:
+            return jsonify({"error": "Invalid granularity"}), 400
+        try:
+            since = _parse_datetime_param(request.args.get("since"))
+            until = _parse_datetime_param(request.args.get("until"))
+        except ValueError:
+            return jsonify({"error": "Invalid date range"}), 400
+        if db.session.get(Channel, channel_id) is None:
+            return jsonify({"error": "Channel not found"}), 404
+
+        points = get_channel_history_series(
+            channel_id, granularity, since=since, until=until, limit=limit
         )
+        return jsonify({"granularity": granularity, "points": points})
 
     @app.route("/export", methods=["GET"])
     def export_data_route():
         export_format = request.args.get("format", "csv").lower()
+        if export_format not in EXPORT_FORMATS:
+            return (
+                "Invalid format! Please choose 'csv', 'ndjson', 'xlsx' or 'parquet'.",
+                400,
+            )
+
+        if export_format == "xlsx":
+            if any(param in request.args for param in EXPORT_SELECTION_PARAMS):
+                return (
+                    "Excel exports cover every table; use csv, ndjson or parquet "
+                    "to select tables, columns or rows.",
+                    400,
+                )
+            # Served from the artifact of the current data version; without one
+            # the workbook is built by a background job, as for /api/export-jobs,
+            # or in the request when the queue is unavailable.
+            data_version = export_data_version()
+            path = find_export_artifact("xlsx", data_version)
+            if path is None:
+                try:
+                    job_id = enqueue_export_job("xlsx", data_version)
+                except RedisError:
+                    logger.warning("Export queue unavailable; building xlsx inline.")
+                    path = build_export_artifact("xlsx")
+                else:
+                    return _export_job_accepted(job_id)
+            return send_file(
+                path,
+                as_attachment=True,
+                download_name="exported_data.xlsx",
+                mimetype=XLSX_MIMETYPE,
+            )
+
+        try:
+            tables, options = _export_selection(request.args)
+        except InvalidFilter as error:
+            return f"Invalid export parameter: {error.param}", 400
 
         if export_format == "csv":
             return Response(
-                stream_with_context(stream_all_tables_csv()),
+                stream_with_context(stream_tables_csv(tables, **options)),
                 mimetype="text/csv",
                 headers={
                     "Content-Disposition": "attachment; filename=exported_data.csv"
                 },
             )
 
-        if export_format == "xlsx":
-            file_path = build_xlsx_export_file()
-
-            @after_this_request
-            def cleanup(response):
-                try:
-                    os.remove(file_path)
-                except OSError:
-                    pass
-                return response
-
-            return send_file(
-                file_path,
-                as_attachment=True,
-                download_name="exported_data.xlsx",
-                mimetype="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        if export_format == "ndjson":
+            return Response(
+                stream_with_context(stream_tables_ndjson(tables, **options)),
+                mimetype="application/x-ndjson",
+                headers={
+                    "Content-Disposition": "attachment; filename=exported_data.ndjson"
+                },
             )
 
-        return "Invalid format! Please choose 'csv' or 'xlsx'.", 400
+        if len(tables) != 1 or "table" not in request.args:
+            return (
+                "Parquet exports are per table: choose table="
+                + ", ".join(EXPORT_TABLES)
+                + ".",
+                400,
+            )
+        if not parquet_supported():
+            return "Parquet export requires the optional pyarrow package.", 501
+        (table_name,) = tables
+        return Response(
+            stream_with_context(stream_table_parquet(table_name, **options)),
+            mimetype="application/vnd.apache.parquet",
+            headers={
+                "Content-Disposition": (f"attachment; filename={table_name}.parquet")
+            },
+        )
@@ -1,6 +1,11 @@
-from typing import Optional
+import json
+from typing import Annotated, List, Optional, Tuple
 
-from pydantic import BaseModel, ConfigDict, field_validator
+from pydantic import BaseModel, ConfigDict, StringConstraints, field_validator
+
+# Segment texts must join back into the transcript exactly, so they keep their
+# whitespace.
+SegmentText = Annotated[str, StringConstraints(strip_whitespace=False)]
 
 
 class VideoCreateSchema(BaseModel):
@@ -16,7 +21,9 @@ class VideoCreateSchema(BaseModel):
     comments: int = 0
     posted: Optional[str] = None
     video_length: str = ""
+    duration_seconds: Optional[int] = None
     transcript: str = ""
+    transcript_segments: Optional[List[Tuple[float, float, SegmentText]]] = None
 
     @field_validator("subscribers", "views", "likes", "comments", mode="before")
     @classmethod
@@ -37,6 +44,20 @@ class VideoCreateSchema(BaseModel):
             raise ValueError("Field must not be empty.")
         return value
 
+    @field_validator("transcript_segments", mode="before")
+    @classmethod
+    def parse_transcript_segments(cls, value):
+        # Posted by the save form as a JSON string.
+        if isinstance(value, str):
+            if value.strip() == "":
+                return None
+            try:
+                return json.loads(value)
+            except ValueError:
+                # Left to fail type validation with a serializable error.
+                return value
+        return value
+
     @field_validator("posted", mode="before")
     @classmethod
     def normalize_posted(cls, value):
@@ -0,0 +1,318 @@
+import html
+import re
+from bisect import bisect_right
+
+from sqlalchemy import (
+    DDL,
+    bindparam,
+    column,
+    delete,
+    event,
+    insert,
+    select,
+    table,
+    text,
+    update,
+)
+
+from models import Video, VideoTranscript, db, decompress_text, unpack_segments
+from youtube_api import TRANSCRIPT_UNAVAILABLE_MESSAGE
+
+SEARCH_TABLE = "video_search"
+SEARCH_FIELDS = ("title", "description", "transcript")
+# bm25 column weights: a title hit outranks a description hit, which outranks
+# a transcript hit.
+SEARCH_WEIGHTS = (10.0, 4.0, 1.0)
+SNIPPET_START = "\x02"
+SNIPPET_END = "\x03"
+SNIPPET_WORDS = 16
+WATCH_URL = "https://www.youtube.com/watch?v={video_id}"
+
+_SQLITE_DDL = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5("
+    "title, description, transcript, tokenize = 'porter unicode61')"
+)
+_POSTGRES_DDL = (
+    f"CREATE TABLE IF NOT EXISTS {SEARCH_TABLE} ("
+    "video_id INTEGER PRIMARY KEY REFERENCES videos (id) ON DELETE CASCADE, "
+    "title TEXT, description TEXT, transcript TEXT, "
+    "document tsvector GENERATED ALWAYS AS ("
+    "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(description, '')), 'B') || "
+    "setweight(to_tsvector('english', coalesce(transcript, '')), 'D')"
+    ") STORED); "
+    f"CREATE INDEX IF NOT EXISTS ix_{SEARCH_TABLE}_document "
+    f"ON {SEARCH_TABLE} USING GIN (document)"
+)
+
+# The search table is dialect specific, so it is created next to the ORM
+# tables rather than declared as a model.
+event.listen(
+    db.metadata,
+    "after_create",
+    DDL(_SQLITE_DDL).execute_if(dialect="sqlite"),
+)
+event.listen(
+    db.metadata,
+    "after_create",
+    DDL(_POSTGRES_DDL).execute_if(dialect="postgresql"),
+)
+event.listen(
+    db.metadata,
+    "before_drop",
+    DDL(f"DROP TABLE IF EXISTS {SEARCH_TABLE}").execute_if(
+        dialect=("sqlite", "postgresql")
+    ),
+)
+
+
+def _dialect():
+    return db.session.get_bind().dialect.name
+
+
+def _key_column():
+    # FTS5 rows are addressed by rowid, which doubles as the video id.
+    return "rowid" if _dialect() == "sqlite" else "video_id"
+
+
+def _search_table():
+    return table(
+        SEARCH_TABLE, column(_key_column()), *(column(field) for field in SEARCH_FIELDS)
+    )
+
+
+def _search_text(field, value):
+    # The "no transcript" placeholder is not something the video says.
+    if field == "transcript" and value == TRANSCRIPT_UNAVAILABLE_MESSAGE:
+        return ""
+    return value or ""
+
+
+def sync_search_documents(created, updated):
+    """Mirror video text into the search table in the caller's transaction.
+
+    ``created`` maps video ids to full ``{title, description, transcript}``
+    documents; ``updated`` maps video ids to just the fields that changed.
+    Unavailable transcripts are indexed as empty text.
+    """
+    search = _search_table()
+    key = search.c[_key_column()]
+    if created:
+        db.session.execute(
+            delete(search).where(key == bindparam("b_video_id")),
+            [{"b_video_id": video_id} for video_id in created],
+        )
+        db.session.execute(
+            insert(search),
+            [
+                {
+                    key.name: video_id,
+                    **{
+                        field: _search_text(field, document.get(field))
+                        for field in SEARCH_FIELDS
+                    },
+                }
+                for video_id, document in created.items()
+            ],
+        )
+
+    groups = {}
+    for video_id, fields in updated.items():
+        groups.setdefault(tuple(sorted(fields)), []).append((video_id, fields))
+    for fields, members in groups.items():
+        db.session.execute(
+            update(search)
+            .where(key == bindparam("b_video_id"))
+            .values({field: bindparam(f"b_{field}") for field in fields}),
+            [
+                {
+                    "b_video_id": video_id,
+                    **{
+                        f"b_{field}": _search_text(field, value)
+                        for field, value in values.items()
+                    },
+                }
+                for video_id, values in members
+            ],
+        )
+
+
+def _match_expression(query):
+    """FTS5 query matching every word of ``query``, free of FTS syntax."""
+    terms = re.findall(r"\w+", query)
+    return " ".join(f'"{term}"' for term in terms)
+
+
+def _sqlite_search_sql():
+    weights = {
+        f"{field}_weight": weight
+        for field, weight in zip(SEARCH_FIELDS, SEARCH_WEIGHTS)
+    }
+    return text(
+        "SELECT videos.id, videos.youtube_video_id, videos.title, videos.views, "
+        "videos.posted, channels.channel_username, "
+        "-bm25(video_search, :title_weight, :description_weight, :transcript_weight) "
+        "AS score, "
+        "snippet(video_search, -1, char(2), char(3), '…', :snippet_words) "
+        "AS snippet "
+        "FROM video_search "
+        "JOIN videos ON videos.id = video_search.rowid "
+        "LEFT JOIN channels ON channels.id = videos.channel_id "
+        "WHERE video_search MATCH :match "
+        "ORDER BY score DESC, videos.id LIMIT :limit OFFSET :offset"
+    ).bindparams(snippet_words=SNIPPET_WORDS, **weights)
+
+
+def _postgres_search_sql():
+    options = (
+        f"StartSel={SNIPPET_START}, StopSel={SNIPPET_END}, "
+        f"MaxWords={SNIPPET_WORDS}, MinWords=5, MaxFragments=1"
+    )
+    return text(
+        "SELECT videos.id, videos.youtube_video_id, videos.title, videos.views, "
+        "videos.posted, channels.channel_username, "
+        "ts_rank_cd(search.document, query) AS score, "
+        "ts_headline('english', "
+        "concat_ws(' ', search.title, search.description, search.transcript), "
+        "query, :options) AS snippet "
+        "FROM video_search AS search "
+        "CROSS JOIN websearch_to_tsquery('english', :match) AS query "
+        "JOIN videos ON videos.id = search.video_id "
+        "LEFT JOIN channels ON channels.id = videos.channel_id "
+        "WHERE search.document @@ query "
+        "ORDER BY score DESC, videos.id LIMIT :limit OFFSET :offset"
+    ).bindparams(bindparam("options", options))
+
+
+def _render_snippet(snippet):
+    """HTML-escape a snippet and turn the match markers into ``<mark>`` tags."""
+    escaped = html.escape(snippet or "")
+    return escaped.replace(SNIPPET_START, "<mark>").replace(SNIPPET_END, "</mark>")
+
+
+def search_videos(query, page=1, limit=25):
+    """Rank videos whose title, description or transcript match ``query``.
+
+    Returns ``(items, has_next)`` ordered by descending ``score``; each item
+    carries a ``snippet`` with matches wrapped in ``<mark>`` and the surrounding
+    text HTML-escaped.
+    """
+    if _dialect() == "postgresql":
+        statement, match = _postgres_search_sql(), query
+    else:
+        statement, match = _sqlite_search_sql(), _match_expression(query)
+    if not match.strip():
+        return [], False
+
+    rows = (
+        db.session.execute(
+            statement,
+            {"match": match, "limit": limit + 1, "offset": (page - 1) * limit},
+        )
+        .mappings()
+        .all()
+    )
+    items = [
+        {
+            "id": row["id"],
+            "youtube_video_id": row["youtube_video_id"],
+            "title": row["title"],
+            "channel_username": row["channel_username"],
+            "views": row["views"],
+            # Text SQL: SQLite returns the stored ISO string, PostgreSQL a date.
+            "posted": None if row["posted"] is None else str(row["posted"]),
+            "score": row["score"],
+            "snippet": _render_snippet(row["snippet"]),
+        }
+        for row in rows[:limit]
+    ]
+    return items, len(rows) > limit
+
+
+def _phrase_pattern(phrase):
+    """Case-insensitive pattern for the words of ``phrase`` across any spacing."""
+    terms = re.findall(r"\w+", phrase)
+    if not terms:
+        return None
+    return re.compile(
+        r"(?<!\w)" + r"\W+".join(re.escape(term) for term in terms), re.IGNORECASE
+    )
+
+
+def _deep_link(youtube_video_id, start_seconds):
+    url = WATCH_URL.format(video_id=youtube_video_id)
+    if start_seconds is None:
+        return url
+    return f"{url}&t={int(start_seconds)}s"
+
+
+def find_transcript_moments(video_id, phrase, limit=20):
+    """Where ``phrase`` is said in one video's transcript.
+
+    Reads only the compressed transcript and its packed segment index, maps
+    each match's character offset to its segment with a binary search and
+    returns ``{"youtube_video_id", "moments"}``; each moment has the segment
+    ``start``/``duration`` in seconds, its ``text`` and a timestamped ``url``.
+    Transcripts stored without timings yield moments with a ``None`` start.
+    Returns ``None`` when the video does not exist.
+    """
+    videos = Video.__table__
+    transcripts = VideoTranscript.__table__
+    row = (
+        db.session.execute(
+            select(
+                videos.c.youtube_video_id,
+                transcripts.c.codec,
+                transcripts.c.content,
+                transcripts.c.segment_index,
+            )
+            .select_from(videos)
+            .outerjoin(transcripts, transcripts.c.video_id == videos.c.id)
+            .where(videos.c.id == video_id)
+        )
+        .mappings()
+        .first()
+    )
+    if row is None:
+        return None
+
+    result = {"youtube_video_id": row["youtube_video_id"], "moments": []}
+    pattern = _phrase_pattern(phrase)
+    if pattern is None or row["content"] is None:
+        return result
+
+    transcript = decompress_text(row["codec"], row["content"])
+    if transcript == TRANSCRIPT_UNAVAILABLE_MESSAGE:
+        return result
+    if row["segment_index"] is not None:
+        offsets, starts, durations = unpack_segments(row["segment_index"])
+    else:
+        offsets = starts = durations = None
+
+    seen = set()
+    for match in pattern.finditer(transcript):
+        if starts is None:
+            # Without timings every match keeps its own snippet.
+            start = duration = None
+            snippet = transcript[max(match.start() - 80, 0) : match.end() + 80].strip()
+        else:
+            # Matches inside one segment collapse into a single moment.
+            position = bisect_right(offsets, match.start()) - 1
+            if position in seen:
+                continue
+            seen.add(position)
+            start = starts[position] / 1000
+            duration = durations[position] / 1000
+            end = offsets[position + 1] - 1 if position + 1 < len(offsets) else None
+            snippet = transcript[offsets[position] : end]
+        result["moments"].append(
+            {
+                "start": start,
+                "duration": duration,
+                "text": snippet,
+                "url": _deep_link(row["youtube_video_id"], start),
+            }
+        )
+        if len(result["moments"]) >= limit:
+            break
+    return result
@@ -1,12 +1,17 @@
 import os
+import json
 import logging
+import secrets
+import time
 from datetime import datetime, timezone
-from typing import Any, Dict, Optional
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 from flask import has_app_context
 from flask_socketio import SocketIO
 
-from crud import save_video
+from crud import get_refresh_plan, get_row_counts, save_videos_batch
+from export import build_export_artifact
+from models import COUNTER_CHANNEL_HISTORY, COUNTER_CHANNELS, COUNTER_VIDEOS
 from youtube_api import get_channel_videos, get_video_data
 
 logger = logging.getLogger(__name__)
@@ -35,8 +40,23 @@ except ModuleNotFoundError:
 
 REDIS_URL = os.environ.get("REDIS_URL", "redis://localhost:6379/0")
 RQ_QUEUE_NAME = os.environ.get("RQ_QUEUE_NAME", "channel-scrape")
+RQ_VIDEO_QUEUE_NAME = os.environ.get("RQ_VIDEO_QUEUE_NAME", "video-scrape")
+RQ_EXPORT_QUEUE_NAME = os.environ.get("RQ_EXPORT_QUEUE_NAME", "export")
 CHANNEL_JOB_TIMEOUT = int(os.environ.get("CHANNEL_JOB_TIMEOUT_SECONDS", "7200"))
 CHANNEL_JOB_RESULT_TTL = int(os.environ.get("CHANNEL_JOB_RESULT_TTL_SECONDS", "86400"))
+VIDEO_JOB_TIMEOUT = int(os.environ.get("VIDEO_JOB_TIMEOUT_SECONDS", "180"))
+VIDEO_JOB_RESULT_TTL = int(os.environ.get("VIDEO_JOB_RESULT_TTL_SECONDS", "600"))
+EXPORT_JOB_TIMEOUT = int(os.environ.get("EXPORT_JOB_TIMEOUT_SECONDS", "3600"))
+EXPORT_JOB_RESULT_TTL = int(os.environ.get("EXPORT_JOB_RESULT_TTL_SECONDS", "86400"))
+VIDEO_CACHE_TTL = int(os.environ.get("VIDEO_CACHE_TTL_SECONDS", "900"))
+VIDEO_CACHE_MISS_TTL = int(os.environ.get("VIDEO_CACHE_MISS_TTL_SECONDS", "30"))
+VIDEO_FETCH_LOCK_TTL = int(os.environ.get("VIDEO_FETCH_LOCK_TTL_SECONDS", "120"))
+VIDEO_FETCH_WAIT_SECONDS = float(os.environ.get("VIDEO_FETCH_WAIT_SECONDS", "60"))
+VIDEO_FETCH_POLL_SECONDS = 0.2
+VIDEO_CACHE_KEY_PREFIX = "video-data"
+VIDEO_JOB_ID_PREFIX = "video-"
+EXPORT_JOB_ID_PREFIX = "export-"
+SAVE_BATCH_SIZE = int(os.environ.get("SAVE_BATCH_SIZE", "50"))
 SOCKETIO_ASYNC_MODE = os.environ.get("SOCKETIO_ASYNC_MODE", "threading")
 external_sio = SocketIO(
     message_queue=os.environ.get("REDIS_URL"),
@@ -48,9 +68,21 @@ if RQ_AVAILABLE and REDIS_URL:
     channel_queue = Queue(
         RQ_QUEUE_NAME, connection=redis_connection, default_timeout=CHANNEL_JOB_TIMEOUT
     )
+    video_queue = Queue(
+        RQ_VIDEO_QUEUE_NAME,
+        connection=redis_connection,
+        default_timeout=VIDEO_JOB_TIMEOUT,
+    )
+    export_queue = Queue(
+        RQ_EXPORT_QUEUE_NAME,
+        connection=redis_connection,
+        default_timeout=EXPORT_JOB_TIMEOUT,
+    )
 else:
     redis_connection = None
     channel_queue = None
+    video_queue = None
+    export_queue = None
 _worker_app = None
 
 
@@ -77,7 +109,9 @@ def _job_payload_defaults(channel_id: str, max_videos: int) -> Dict[str, Any]:
         "current": 0,
         "processed": 0,
         "failed": 0,
-        "skipped": 0,
+        "updated": 0,
+        "unchanged": 0,
+        "fresh": 0,
         "progress_pct": 0,
         "current_video_id": None,
         "error": None,
@@ -165,13 +199,154 @@ def get_channel_job(job_id: Optional[str]) -> Optional[Dict[str, Any]]:
         "current": current,
         "processed": int(meta.get("processed", 0) or 0),
         "failed": int(meta.get("failed", 0) or 0),
-        "skipped": int(meta.get("skipped", 0) or 0),
+        "updated": int(meta.get("updated", 0) or 0),
+        "unchanged": int(meta.get("unchanged", 0) or 0),
+        "fresh": int(meta.get("fresh", 0) or 0),
         "progress_pct": progress_pct,
         "current_video_id": meta.get("current_video_id"),
         "error": error,
     }
 
 
+def _video_cache_key(video_id: str) -> str:
+    return f"{VIDEO_CACHE_KEY_PREFIX}:{video_id}"
+
+
+def _video_lock_key(video_id: str) -> str:
+    return f"{VIDEO_CACHE_KEY_PREFIX}:{video_id}:lock"
+
+
+def _read_cached_video(video_id: str) -> Tuple[bool, Optional[Dict[str, Any]]]:
+    raw = redis_connection.get(_video_cache_key(video_id))
+    if raw is None:
+        return False, None
+    return True, json.loads(raw)
+
+
+def _store_cached_video(video_id: str, video_data: Optional[Dict[str, Any]]) -> None:
+    # Misses are cached briefly so waiters on the lock see the outcome too.
+    ttl = VIDEO_CACHE_TTL if video_data else VIDEO_CACHE_MISS_TTL
+    redis_connection.set(_video_cache_key(video_id), json.dumps(video_data), ex=ttl)
+
+
+def _release_video_lock(video_id: str, token: str) -> None:
+    lock_key = _video_lock_key(video_id)
+    current = redis_connection.get(lock_key)
+    if current is not None and current.decode() == token:
+        redis_connection.delete(lock_key)
+
+
+def get_video_data_cached(
+    video_id: str,
+    fetcher: Callable[[str], Optional[Dict[str, Any]]] = get_video_data,
+) -> Optional[Dict[str, Any]]:
+    """Return video data through the Redis result cache with single-flight fetches.
+
+    Only the caller holding the per-video lock hits the YouTube API; concurrent
+    callers for the same video poll the cache until the result is published.
+    Falls back to a direct fetch whenever Redis is unavailable.
+    """
+    if not RQ_AVAILABLE or not redis_connection:
+        return fetcher(video_id)
+
+    token = secrets.token_hex(16)
+    try:
+        hit, cached = _read_cached_video(video_id)
+        if hit:
+            return cached
+        acquired = redis_connection.set(
+            _video_lock_key(video_id), token, nx=True, ex=VIDEO_FETCH_LOCK_TTL
+        )
+    except (RedisError, ValueError):
+        return fetcher(video_id)
+
+    if acquired:
+        video_data = fetcher(video_id)
+        try:
+            _store_cached_video(video_id, video_data)
+            _release_video_lock(video_id, token)
+        except (RedisError, TypeError, ValueError) as e:
+            logger.warning("Could not cache video %s: %s", video_id, str(e))
+        return video_data
+
+    deadline = time.monotonic() + VIDEO_FETCH_WAIT_SECONDS
+    try:
+        while time.monotonic() < deadline:
+            time.sleep(VIDEO_FETCH_POLL_SECONDS)
+            hit, cached = _read_cached_video(video_id)
+            if hit:
+                return cached
+            if not redis_connection.exists(_video_lock_key(video_id)):
+                break
+    except (RedisError, ValueError):
+        pass
+
+    return fetcher(video_id)
+
+
+def _video_job_id(video_id: str) -> str:
+    return f"{VIDEO_JOB_ID_PREFIX}{video_id}"
+
+
+def enqueue_video_job(video_id: str) -> str:
+    """Queue a single-video scrape, reusing an identical job already in flight."""
+    _get_queue()
+    job_id = _video_job_id(video_id)
+
+    try:
+        existing = Job.fetch(job_id, connection=redis_connection)
+        if existing.get_status(refresh=True) in {"queued", "started", "deferred"}:
+            return existing.id
+    except NoSuchJobError:
+        pass
+
+    job = video_queue.enqueue(
+        fetch_video_background,
+        video_id,
+        job_id=job_id,
+        job_timeout=VIDEO_JOB_TIMEOUT,
+        result_ttl=VIDEO_JOB_RESULT_TTL,
+        failure_ttl=VIDEO_JOB_RESULT_TTL,
+    )
+    job.meta.update({"video_id": video_id, "queued_at": utc_now_iso()})
+    job.save_meta()
+    return job.id
+
+
+def get_video_job(job_id: Optional[str]) -> Optional[Dict[str, Any]]:
+    # Other job kinds share the connection; their results are not video data.
+    if not job_id or not job_id.startswith(VIDEO_JOB_ID_PREFIX):
+        return None
+
+    if not RQ_AVAILABLE or not redis_connection:
+        return None
+
+    try:
+        redis_connection.ping()
+        job = Job.fetch(job_id, connection=redis_connection)
+    except (NoSuchJobError, RedisError, ValueError):
+        return None
+
+    status = _normalize_job_status(job.get_status(refresh=True))
+    meta = dict(job.meta or {})
+    error = None
+    if status == "failed" and job.exc_info:
+        error = job.exc_info.strip().splitlines()[-1]
+
+    return {
+        "id": job.id,
+        "video_id": meta.get("video_id"),
+        "status": status,
+        "queued_at": meta.get("queued_at"),
+        "data": job.result if status == "completed" else None,
+        "error": error,
+    }
+
+
+def fetch_video_background(video_id: str) -> Optional[Dict[str, Any]]:
+    return get_video_data_cached(video_id)
+
+
 def _update_current_job_meta(**updates: Any) -> None:
     job = get_current_job()
     if not job:
@@ -182,6 +357,30 @@ def _update_current_job_meta(**updates: Any) -> None:
     external_sio.emit("progress_update", updates, room=job.id)
 
 
+def _save_pending_videos(pending: List[Dict[str, Any]], counts: Dict[str, int]) -> None:
+    """Save fetched videos in one batch, isolating bad records on failure."""
+    if not pending:
+        return
+
+    try:
+        results = save_videos_batch(pending)
+    except Exception as e:
+        logger.warning("Batch save failed, retrying videos one by one: %s", str(e))
+        results = []
+        for video_data in pending:
+            try:
+                results.extend(save_videos_batch([video_data]))
+            except Exception as video_error:
+                logger.exception("An error occurred: %s", str(video_error))
+                counts["failed"] += 1
+
+    for result in results:
+        if result["created"]:
+            counts["processed"] += 1
+        else:
+            counts[result["status"]] += 1
+
+
 def _process_channel_background_impl(
     channel_id: str, max_videos: int
 ) -> Dict[str, int]:
@@ -202,7 +401,9 @@ def _process_channel_background_impl(
         if total_videos == 0:
             summary = {
                 "inserted": 0,
-                "updated_or_skipped": 0,
+                "updated": 0,
+                "unchanged": 0,
+                "fresh": 0,
                 "failed": 0,
                 "total_videos": 0,
             }
@@ -214,39 +415,55 @@ def _process_channel_background_impl(
             )
             return summary
 
-        processed_count = 0
-        failed_count = 0
-        skipped_count = 0
+        counts = {
+            "processed": 0,
+            "failed": 0,
+            "updated": 0,
+            "unchanged": 0,
+            "fresh": 0,
+        }
+        refresh_plan = get_refresh_plan(video_ids)
+        pending = []
 
         for index, video_id in enumerate(video_ids, start=1):
+            video_plan = refresh_plan[video_id]
             try:
-                video_data = get_video_data(video_id)
-                if video_data:
-                    save_result = save_video(video_data)
-                    if save_result.get("created"):
-                        processed_count += 1
-                    else:
-                        skipped_count += 1
+                if not video_plan["fetch_stats"] and not video_plan["fetch_transcript"]:
+                    counts["fresh"] += 1
                 else:
-                    failed_count += 1
+                    video_data = get_video_data(
+                        video_id, include_transcript=video_plan["fetch_transcript"]
+                    )
+                    if video_data:
+                        pending.append(video_data)
+                    else:
+                        counts["failed"] += 1
             except Exception as e:
                 logger.exception("An error occurred: %s", str(e))
-                failed_count += 1
+                counts["failed"] += 1
+
+            if len(pending) >= SAVE_BATCH_SIZE or index == total_videos:
+                _save_pending_videos(pending, counts)
+                pending = []
 
             _update_current_job_meta(
                 current=index,
-                processed=processed_count,
-                failed=failed_count,
-                skipped=skipped_count,
+                processed=counts["processed"],
+                failed=counts["failed"],
+                updated=counts["updated"],
+                unchanged=counts["unchanged"],
+                fresh=counts["fresh"],
                 current_video_id=video_id,
                 progress_pct=int((index / total_videos) * 100),
                 message=f"Processing videos ({index}/{total_videos})",
             )
 
         summary = {
-            "inserted": processed_count,
-            "updated_or_skipped": skipped_count,
-            "failed": failed_count,
+            "inserted": counts["processed"],
+            "updated": counts["updated"],
+            "unchanged": counts["unchanged"],
+            "fresh": counts["fresh"],
+            "failed": counts["failed"],
             "total_videos": total_videos,
         }
         _update_current_job_meta(
@@ -254,7 +471,10 @@ def _process_channel_background_impl(
             progress_pct=100,
             message=(
                 "Channel processing complete. "
-                f"Inserted: {processed_count}, Updated/Skipped: {skipped_count}, Failed: {failed_count}."
+                f"Inserted: {counts['processed']}, "
+                f"Updated: {counts['updated']}, "
+                f"Unchanged: {counts['unchanged']}, "
+                f"Fresh: {counts['fresh']}, Failed: {counts['failed']}."
             ),
             **summary,
         )
@@ -269,11 +489,11 @@ def _process_channel_background_impl(
         raise
 
 
-def process_channel_background(channel_id: str, max_videos: int) -> Dict[str, int]:
+def _run_in_app_context(func: Callable[..., Any], *args: Any) -> Any:
     global _worker_app
 
     if has_app_context():
-        return _process_channel_background_impl(channel_id, max_videos)
+        return func(*args)
 
     # RQ workers run outside request context; build an app context for db.session.
     if _worker_app is None:
@@ -282,4 +502,145 @@ def process_channel_background(channel_id: str, max_videos: int) -> Dict[str, in
         _worker_app = create_app()
 
     with _worker_app.app_context():
-        return _process_channel_background_impl(channel_id, max_videos)
+        return func(*args)
+
+
+def process_channel_background(channel_id: str, max_videos: int) -> Dict[str, int]:
+    return _run_in_app_context(_process_channel_background_impl, channel_id, max_videos)
+
+
+def _export_job_id(export_format: str, data_version: int) -> str:
+    return f"{EXPORT_JOB_ID_PREFIX}{export_format}-{data_version}"
+
+
+def enqueue_export_job(export_format: str, data_version: int) -> str:
+    """Queue an export build, reusing the job already building this data version."""
+    _get_queue()
+    job_id = _export_job_id(export_format, data_version)
+
+    try:
+        existing = Job.fetch(job_id, connection=redis_connection)
+        if existing.get_status(refresh=True) in {
+            "queued",
+            "started",
+            "deferred",
+            "finished",
+        }:
+            return existing.id
+    except NoSuchJobError:
+        pass
+
+    job = export_queue.enqueue(
+        build_export_background,
+        export_format,
+        job_id=job_id,
+        job_timeout=EXPORT_JOB_TIMEOUT,
+        result_ttl=EXPORT_JOB_RESULT_TTL,
+        failure_ttl=EXPORT_JOB_RESULT_TTL,
+    )
+    job.meta.update(
+        {
+            "format": export_format,
+            "data_version": data_version,
+            "message": "Export is queued.",
+            "queued_at": utc_now_iso(),
+            "started_at": None,
+            "completed_at": None,
+            "rows_written": 0,
+            "total_rows": 0,
+            "progress_pct": 0,
+            "error": None,
+        }
+    )
+    job.save_meta()
+    return job.id
+
+
+def get_export_job(job_id: Optional[str]) -> Optional[Dict[str, Any]]:
+    # Other job kinds share the connection; their results carry no artifact.
+    if not job_id or not job_id.startswith(EXPORT_JOB_ID_PREFIX):
+        return None
+
+    if not RQ_AVAILABLE or not redis_connection:
+        return None
+
+    try:
+        redis_connection.ping()
+        job = Job.fetch(job_id, connection=redis_connection)
+    except (NoSuchJobError, RedisError, ValueError):
+        return None
+
+    status = _normalize_job_status(job.get_status(refresh=True))
+    meta = dict(job.meta or {})
+    error = meta.get("error")
+    if status == "failed" and not error and job.exc_info:
+        error = job.exc_info.strip().splitlines()[-1]
+    result = job.result if status == "completed" else None
+
+    return {
+        "id": job.id,
+        "format": meta.get("format"),
+        "data_version": meta.get("data_version"),
+        "status": status,
+        "message": meta.get("message"),
+        "queued_at": meta.get("queued_at"),
+        "started_at": meta.get("started_at"),
+        "completed_at": meta.get("completed_at"),
+        "rows_written": int(meta.get("rows_written", 0) or 0),
+        "total_rows": int(meta.get("total_rows", 0) or 0),
+        "progress_pct": 100 if status == "completed" else meta.get("progress_pct", 0),
+        "artifact": result.get("artifact") if result else None,
+        "error": error,
+    }
+
+
+def _estimated_export_rows() -> int:
+    counts = get_row_counts([COUNTER_VIDEOS, COUNTER_CHANNELS, COUNTER_CHANNEL_HISTORY])
+    # channel_videos has no maintained counter; it holds about one row per video.
+    return (
+        2 * counts[COUNTER_VIDEOS]
+        + counts[COUNTER_CHANNELS]
+        + counts[COUNTER_CHANNEL_HISTORY]
+    )
+
+
+def _build_export_background_impl(export_format: str) -> Dict[str, Any]:
+    total_rows = _estimated_export_rows()
+    _update_current_job_meta(
+        started_at=utc_now_iso(),
+        total_rows=total_rows,
+        message="Writing export...",
+        progress_pct=0,
+    )
+    reported = {"progress_pct": 0}
+
+    def progress(rows_written: int) -> None:
+        # Writing the file after the last row takes a moment, so stop at 99.
+        progress_pct = min(99, int(rows_written * 100 / max(total_rows, 1)))
+        if progress_pct != reported["progress_pct"]:
+            reported["progress_pct"] = progress_pct
+            _update_current_job_meta(
+                rows_written=rows_written,
+                progress_pct=progress_pct,
+                message=f"Writing export ({rows_written}/{total_rows} rows)",
+            )
+
+    try:
+        path = build_export_artifact(export_format, progress=progress)
+    except Exception as e:
+        logger.exception("An error occurred: %s", str(e))
+        _update_current_job_meta(
+            completed_at=utc_now_iso(),
+            error=str(e),
+            message="Export failed.",
+        )
+        raise
+
+    _update_current_job_meta(
+        completed_at=utc_now_iso(), progress_pct=100, message="Export is ready."
+    )
+    return {"artifact": os.path.basename(path)}
+
+
+def build_export_background(export_format: str) -> Dict[str, Any]:
+    return _run_in_app_context(_build_export_background_impl, export_format)
@@ -0,0 +1,116 @@
+from datetime import date
+
+import pytest
+from flask import Flask
+
+import analytics
+from analytics import (
+    clear_analytics_cache,
+    compute_analytics,
+    get_analytics,
+    load_video_frame,
+)
+from crud import save_videos_batch
+from models import Channel, db
+
+
+@pytest.fixture
+def app_context():
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite:///:memory:"
+    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    db.init_app(app)
+
+    with app.app_context():
+        db.create_all()
+        clear_analytics_cache()
+        yield app
+        clear_analytics_cache()
+        db.session.remove()
+        db.drop_all()
+
+
+def _save_channel(username, views_list, start_day=1):
+    save_videos_batch(
+        [
+            {
+                "youtube_video_id": f"{username}_{idx}",
+                "channel_username": username,
+                "title": f"{username} video {idx}",
+                "views": views,
+                "likes": views // 25,
+                "comments": views // 100,
+                "posted": date(2025, 3, start_day + idx * 2).isoformat(),
+            }
+            for idx, views in enumerate(views_list)
+        ]
+    )
+
+
+def test_load_video_frame_reads_in_chunks(app_context):
+    _save_channel("@frame", [100, 200, 300, 400, 500])
+
+    frame = load_video_frame(chunk_size=2)
+
+    assert len(frame) == 5
+    assert frame["views"].sum() == 1500
+    assert str(frame["posted"].dtype).startswith("datetime64")
+    assert load_video_frame(channel_id=999).empty
+
+
+def test_compute_analytics_flags_view_outliers_within_channel(app_context):
+    _save_channel("@steady", [1000, 1100, 900, 1050, 950, 1000, 500000])
+    # A bigger channel with the same spread must not drown out the outlier.
+    _save_channel("@large", [90000, 100000, 110000, 95000, 105000])
+
+    result = compute_analytics(limit=5)
+
+    assert result["video_count"] == 12
+    assert [item["youtube_video_id"] for item in result["outliers"]] == ["@steady_6"]
+    outlier = result["outliers"][0]
+    assert outlier["direction"] == "above"
+    assert outlier["channel_username"] == "@steady"
+    assert outlier["channel_percentile"] == 100.0
+    assert outlier["channel_median_views"] == 1000.0
+
+    engagement = result["engagement"]["engagement_rate"]
+    assert engagement["p50"] == 5.0
+    assert sum(result["engagement"]["histogram"]["counts"]) == 12
+
+    cadence = result["upload_cadence"]
+    assert cadence["median_gap_days"] == 2.0
+    assert cadence["channels"][0]["uploads"] == 7
+    assert cadence["channels"][0]["last_upload"] == "2025-03-13"
+
+
+def test_compute_analytics_handles_empty_table(app_context):
+    result = compute_analytics()
+
+    assert result["video_count"] == 0
+    assert result["outliers"] == []
+    assert result["engagement"]["engagement_rate"]["p50"] is None
+    assert result["upload_cadence"]["channels"] == []
+
+
+def test_get_analytics_caches_per_channel(app_context, monkeypatch):
+    _save_channel("@cached", [10, 20, 30])
+    channel_id = Channel.query.one().id
+    calls = []
+    compute = analytics.compute_analytics
+
+    def counting_compute(*args, **kwargs):
+        calls.append(args)
+        return compute(*args, **kwargs)
+
+    monkeypatch.setattr(analytics, "compute_analytics", counting_compute)
+
+    first = get_analytics(channel_id)
+    assert get_analytics(channel_id) is first
+    get_analytics()
+    assert len(calls) == 2
+
+    monkeypatch.setattr(analytics, "ANALYTICS_CACHE_SECONDS", 0)
+    clear_analytics_cache()
+    get_analytics(channel_id)
+    get_analytics(channel_id)
+    assert len(calls) == 4
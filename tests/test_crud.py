@@ -1,8 +1,36 @@
+from datetime import timedelta
+
 from flask import Flask
 import pytest
+from sqlalchemy import event
 
-from crud import save_video
-from models import Channel, ChannelHistory, ChannelVideo, Video, db
+import crud
+from crud import (
+    TRANSCRIPT_RETRY_AFTER,
+    get_channel_stats,
+    get_refresh_plan,
+    get_row_counts,
+    get_trending_videos,
+    get_video_stats_series,
+    save_video,
+    save_videos_batch,
+    utc_now,
+)
+from models import (
+    Channel,
+    ChannelHistory,
+    ChannelStats,
+    ChannelVideo,
+    RowCounter,
+    Video,
+    VideoStatsSnapshot,
+    VideoTranscript,
+    VideoTrend,
+    channel_videos_counter,
+    db,
+)
+from search import find_transcript_moments
+from youtube_api import TRANSCRIPT_UNAVAILABLE_MESSAGE
 
 
 @pytest.fixture
@@ -65,3 +93,491 @@ def test_save_video_updates_existing_and_tracks_history(app_and_db):
     history_records = ChannelHistory.query.all()
     assert len(history_records) == 1
     assert history_records[0].previous_subscribers == 100
+
+
+def test_get_refresh_plan_skips_fresh_stats_and_available_transcripts(app_and_db):
+    save_video(
+        {
+            "youtube_video_id": "fresh_video",
+            "channel_username": "@channel_one",
+            "transcript": "hello world",
+            "transcript_segments": [[0.0, 1.0, "hello"], [1.0, 1.0, "world"]],
+        }
+    )
+    # Stored before segment timings were kept.
+    save_video(
+        {
+            "youtube_video_id": "untimed_video",
+            "channel_username": "@channel_one",
+            "transcript": "hello again",
+        }
+    )
+    save_video(
+        {
+            "youtube_video_id": "no_transcript_video",
+            "channel_username": "@channel_one",
+            "transcript": TRANSCRIPT_UNAVAILABLE_MESSAGE,
+        }
+    )
+
+    now = utc_now()
+    plan = get_refresh_plan(
+        ["fresh_video", "untimed_video", "no_transcript_video", "unknown_video"],
+        now=now,
+    )
+
+    assert plan["fresh_video"] == {"fetch_stats": False, "fetch_transcript": False}
+    assert plan["no_transcript_video"] == {
+        "fetch_stats": False,
+        "fetch_transcript": False,
+    }
+    assert plan["unknown_video"] == {"fetch_stats": True, "fetch_transcript": True}
+
+    assert plan["untimed_video"]["fetch_transcript"] is False
+
+    later = get_refresh_plan(
+        ["fresh_video", "untimed_video", "no_transcript_video"],
+        now=now + TRANSCRIPT_RETRY_AFTER + timedelta(seconds=1),
+    )
+    assert later["fresh_video"] == {"fetch_stats": True, "fetch_transcript": False}
+    assert later["untimed_video"]["fetch_transcript"] is True
+    assert later["no_transcript_video"] == {
+        "fetch_stats": True,
+        "fetch_transcript": True,
+    }
+
+
+def test_save_video_without_transcript_keeps_stored_transcript(app_and_db):
+    save_video(
+        {
+            "youtube_video_id": "video_1",
+            "channel_username": "@channel_one",
+            "transcript": "original transcript",
+        }
+    )
+
+    save_video(
+        {
+            "youtube_video_id": "video_1",
+            "channel_username": "@channel_one",
+            "views": 10,
+        }
+    )
+
+    video = Video.query.one()
+    assert video.transcript == "original transcript"
+    assert video.transcript_status == "available"
+    assert video.views == 10
+
+
+def test_save_videos_batch_upserts_videos_channels_and_history(app_and_db):
+    save_video(
+        {
+            "youtube_video_id": "video_1",
+            "channel_username": "@channel_one",
+            "subscribers": 100,
+            "views": 10,
+            "transcript": "kept transcript",
+        }
+    )
+
+    results = save_videos_batch(
+        [
+            {
+                "youtube_video_id": "video_1",
+                "channel_username": "@channel_one",
+                "subscribers": 150,
+                "views": 20,
+            },
+            {
+                "youtube_video_id": "video_2",
+                "channel_username": "@channel_two",
+                "subscribers": 5,
+                "views": "7",
+                "transcript": "fresh transcript",
+            },
+        ]
+    )
+
+    assert [(r["youtube_video_id"], r["created"]) for r in results] == [
+        ("video_1", False),
+        ("video_2", True),
+    ]
+    assert Video.query.count() == 2
+    assert Channel.query.count() == 2
+    assert ChannelVideo.query.count() == 2
+
+    video_1 = Video.query.filter_by(youtube_video_id="video_1").one()
+    assert video_1.views == 20
+    assert video_1.transcript == "kept transcript"
+    video_2 = db.session.get(Video, results[1]["video_id"])
+    assert video_2.views == 7
+    assert video_2.channel.channel_username == "@channel_two"
+
+    channel_one = Channel.query.filter_by(channel_username="@channel_one").one()
+    assert channel_one.subscribers == 150
+    assert [h.previous_subscribers for h in ChannelHistory.query.all()] == [100]
+
+
+def test_save_videos_batch_rejects_invalid_records_without_writing(app_and_db):
+    with pytest.raises(ValueError):
+        save_videos_batch(
+            [
+                {"youtube_video_id": "video_1", "channel_username": "@channel_one"},
+                {"youtube_video_id": "video_2"},
+            ]
+        )
+
+    assert Video.query.count() == 0
+
+
+def test_save_videos_batch_skips_identical_rows_and_writes_only_changes(app_and_db):
+    record = {
+        "youtube_video_id": "video_1",
+        "channel_username": "@channel_one",
+        "views": 10,
+        "description": "long description",
+        "transcript": "long transcript",
+    }
+    save_videos_batch([record])
+
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, "before_cursor_execute", capture)
+    try:
+        unchanged = save_videos_batch([record])
+        updated = save_videos_batch([{**record, "views": 11}])
+    finally:
+        event.remove(db.engine, "before_cursor_execute", capture)
+
+    assert unchanged[0]["status"] == "unchanged"
+    assert updated[0]["status"] == "updated"
+    video_updates = [s for s in statements if s.startswith("UPDATE videos")]
+    assert video_updates
+    assert all("transcript =" not in s for s in video_updates)
+    assert all("description =" not in s for s in video_updates)
+    assert Video.query.one().views == 11
+
+
+def test_engagement_rates_are_stored_on_batch_and_orm_writes(app_and_db):
+    save_video(
+        {
+            "youtube_video_id": "video_1",
+            "channel_username": "@channel_one",
+            "views": 200,
+            "likes": 10,
+            "comments": 3,
+        }
+    )
+    video = Video.query.filter_by(youtube_video_id="video_1").one()
+    assert (video.like_rate, video.comment_rate, video.engagement_rate) == (
+        5.0,
+        1.5,
+        6.5,
+    )
+
+    video.views = 0
+    db.session.commit()
+    assert (video.like_rate, video.comment_rate, video.engagement_rate) == (
+        0.0,
+        0.0,
+        0.0,
+    )
+
+
+def test_row_counters_track_batch_and_orm_writes_without_count_queries(app_and_db):
+    save_video({"youtube_video_id": "video_0", "channel_username": "@one"})
+    # Seeds the counters from COUNT(*) once.
+    names = ["videos", "channels", "channel_history", channel_videos_counter(1)]
+    assert get_row_counts(names) == dict(zip(names, [1, 1, 0, 1]))
+
+    statements = []
+    event.listen(
+        db.engine,
+        "before_cursor_execute",
+        lambda *args: statements.append(args[2]),
+    )
+    save_videos_batch(
+        [
+            {"youtube_video_id": "video_0", "channel_username": "@two"},
+            {"youtube_video_id": "video_1", "channel_username": "@one"},
+            {
+                "youtube_video_id": "video_2",
+                "channel_username": "@one",
+                "subscribers": 5,
+            },
+        ]
+    )
+    video = Video.query.filter_by(youtube_video_id="video_1").one()
+    ChannelVideo.query.filter_by(video_id=video.id).delete()
+    db.session.delete(video)
+    db.session.commit()
+
+    assert get_row_counts(names) == dict(zip(names, [2, 2, 1, 1]))
+    assert not [sql for sql in statements if "count(" in sql.lower()]
+    assert get_row_counts(names) == {
+        "videos": Video.query.count(),
+        "channels": Channel.query.count(),
+        "channel_history": ChannelHistory.query.count(),
+        channel_videos_counter(1): Video.query.filter_by(channel_id=1).count(),
+    }
+
+
+def test_row_counter_seed_counts_inside_its_insert(app_and_db):
+    save_video({"youtube_video_id": "video_0", "channel_username": "@one"})
+    db.session.execute(RowCounter.__table__.delete())
+    db.session.commit()
+    statements = []
+    event.listen(
+        db.engine,
+        "before_cursor_execute",
+        lambda *args: statements.append(args[2].lower()),
+    )
+
+    assert get_row_counts(["videos"]) == {"videos": 1}
+    # A batch committing between a separate COUNT and INSERT would be lost.
+    counts = [sql for sql in statements if "count(" in sql]
+    assert len(counts) == 1 and counts[0].startswith("insert into row_counters")
+
+
+def test_row_counters_skip_rows_inserted_by_a_concurrent_writer(
+    app_and_db, monkeypatch
+):
+    save_videos_batch([{"youtube_video_id": "video_0", "channel_username": "@one"}])
+    names = ["videos", "channels", channel_videos_counter(1)]
+    assert get_row_counts(names) == dict(zip(names, [1, 1, 1]))
+    get_channel_stats([1])
+
+    # Another writer inserted both rows after this batch looked them up.
+    monkeypatch.setattr(crud, "_load_existing_videos", lambda records: {})
+    monkeypatch.setattr(crud, "_load_existing_channels", lambda usernames: {})
+    results = save_videos_batch(
+        [{"youtube_video_id": "video_0", "channel_username": "@one", "views": 7}]
+    )
+
+    assert results[0]["status"] == "updated"
+    assert results[0]["created"] is False
+    assert Video.query.one().views == 7
+    assert get_row_counts(names) == dict(zip(names, [1, 1, 1]))
+    assert get_channel_stats([1])[1]["total_views"] == 7
+
+
+def _video(youtube_video_id, channel, views, posted):
+    return {
+        "youtube_video_id": youtube_video_id,
+        "channel_username": channel,
+        "views": views,
+        "likes": views // 10,
+        "posted": posted,
+    }
+
+
+def test_channel_stats_rollup_is_maintained_incrementally(app_and_db):
+    save_videos_batch(
+        [
+            _video("a1", "@a", 100, "2025-01-01"),
+            _video("a2", "@a", 300, "2025-03-01"),
+            _video("a3", "@a", 200, "2025-02-01"),
+            _video("b1", "@b", 50, "2025-01-15"),
+        ]
+    )
+    channel_a, channel_b = (
+        Channel.query.filter_by(channel_username=name).one().id for name in ("@a", "@b")
+    )
+    # Computed from the videos on first read.
+    stats = get_channel_stats([channel_a, channel_b])
+    assert stats[channel_a] == {
+        "channel_id": channel_a,
+        "video_count": 3,
+        "total_views": 600,
+        "total_likes": 60,
+        "total_comments": 0,
+        "avg_views": 200.0,
+        "median_views": 200.0,
+        "avg_engagement_rate": 10.0,
+        "latest_upload": "2025-03-01",
+    }
+
+    statements = []
+    event.listen(
+        db.engine,
+        "before_cursor_execute",
+        lambda *args: statements.append(args[2]),
+    )
+    save_videos_batch(
+        [
+            _video("a1", "@a", 1000, "2025-01-01"),
+            _video("a3", "@b", 200, "2025-02-01"),
+            _video("a4", "@a", 400, "2025-04-01"),
+        ]
+    )
+    # Deltas only: no rollup is recomputed from the videos.
+    assert not [sql for sql in statements if "sum(" in sql.lower()]
+
+    stats = get_channel_stats([channel_a, channel_b])
+    assert stats[channel_a]["video_count"] == 3
+    assert stats[channel_a]["total_views"] == 1700
+    assert stats[channel_a]["median_views"] == 400.0
+    assert stats[channel_a]["latest_upload"] == "2025-04-01"
+    assert stats[channel_b]["video_count"] == 2
+    assert stats[channel_b]["median_views"] == 125.0
+    incremental = stats
+
+    db.session.execute(ChannelStats.__table__.delete())
+    db.session.commit()
+    assert get_channel_stats([channel_a, channel_b]) == incremental
+
+    # ORM writes drop the affected rollups so they are recomputed.
+    video = Video.query.filter_by(youtube_video_id="a4").one()
+    ChannelVideo.query.filter_by(video_id=video.id).delete()
+    db.session.delete(video)
+    db.session.commit()
+    assert db.session.get(ChannelStats, channel_a) is None
+    assert get_channel_stats([channel_a])[channel_a]["latest_upload"] == "2025-03-01"
+
+
+def test_transcripts_are_stored_compressed_and_loaded_lazily(app_and_db):
+    transcript = "spoken words " * 500
+    save_video(
+        {
+            "youtube_video_id": "video_1",
+            "channel_username": "@channel_one",
+            "description": "long description",
+            "transcript": transcript,
+        }
+    )
+
+    stored = VideoTranscript.query.one()
+    assert len(stored.content) < len(transcript) / 10
+    db.session.expunge_all()
+
+    statements = []
+    event.listen(
+        db.engine,
+        "before_cursor_execute",
+        lambda *args: statements.append(args[2]),
+    )
+    video = Video.query.one()
+    assert len(statements) == 1
+    assert "description" not in statements[0].replace("description_hash", "")
+    assert "video_transcripts" not in statements[0]
+
+    assert video.transcript == transcript
+    assert video.description == "long description"
+
+
+def test_untimed_transcript_returns_every_match(app_and_db):
+    (saved,) = save_videos_batch(
+        [
+            {
+                "youtube_video_id": "video_1",
+                "channel_username": "@channel_one",
+                "transcript": "hello world. " + "filler " * 40 + "hello world "
+                "and once more hello world",
+            }
+        ]
+    )
+
+    moments = find_transcript_moments(saved["video_id"], "hello world")["moments"]
+
+    assert len(moments) == 3
+    assert {moment["start"] for moment in moments} == {None}
+
+
+def test_unchanged_transcript_gains_segment_index_when_refetched(app_and_db):
+    record = {
+        "youtube_video_id": "video_1",
+        "channel_username": "@channel_one",
+        "transcript": "hello world",
+    }
+    save_videos_batch([record])
+    assert VideoTranscript.query.one().segment_index is None
+
+    segments = [[0.0, 1.0, "hello"], [1.0, 1.5, "world"]]
+    save_videos_batch([{**record, "transcript_segments": segments}])
+
+    db.session.expire_all()
+    assert VideoTranscript.query.one().segment_index is not None
+    moments = find_transcript_moments(Video.query.one().id, "world")
+    assert [moment["start"] for moment in moments["moments"]] == [1.0]
+
+
+def test_stats_snapshots_are_deduplicated_and_served_with_velocity(
+    app_and_db, monkeypatch
+):
+    start = utc_now().replace(microsecond=0)
+    refreshes = [
+        (start, 100, 10),
+        (start + timedelta(hours=1), 100, 10),
+        (start + timedelta(hours=2), 700, 40),
+        (start + timedelta(hours=4), 1100, 50),
+    ]
+    for captured_at, views, likes in refreshes:
+        monkeypatch.setattr(crud, "utc_now", lambda at=captured_at: at)
+        video_id = save_video(
+            {
+                "youtube_video_id": "video_1",
+                "channel_username": "@channel_one",
+                "views": views,
+                "likes": likes,
+            }
+        )["video_id"]
+
+    # The unchanged second refresh adds no row.
+    assert VideoStatsSnapshot.query.count() == 3
+
+    series = get_video_stats_series(video_id)
+    assert [point["views"] for point in series["points"]] == [100, 700, 1100]
+    assert [point["views_per_hour"] for point in series["points"]] == [
+        None,
+        300.0,
+        200.0,
+    ]
+    assert series["points"][2]["likes_per_hour"] == 5.0
+
+    latest = get_video_stats_series(video_id, limit=1)["points"]
+    assert [point["views_per_hour"] for point in latest] == [200.0]
+    ranged = get_video_stats_series(video_id, until=start + timedelta(hours=3))
+    assert [point["views"] for point in ranged["points"]] == [100, 700]
+    assert get_video_stats_series(999) is None
+
+
+def test_video_trends_track_velocity_and_acceleration(app_and_db, monkeypatch):
+    start = utc_now().replace(microsecond=0)
+    refreshes = [
+        (start, {"fast": 100, "slow": 100}),
+        (start + timedelta(hours=1), {"fast": 400, "slow": 200}),
+        # Too soon after the previous refresh: the trend sample is kept.
+        (start + timedelta(hours=1, minutes=5), {"fast": 450, "slow": 205}),
+        (start + timedelta(hours=2), {"fast": 1000, "slow": 260}),
+    ]
+    for captured_at, views in refreshes:
+        monkeypatch.setattr(crud, "utc_now", lambda at=captured_at: at)
+        save_videos_batch(
+            [
+                {
+                    "youtube_video_id": key,
+                    "channel_username": "@trend_channel",
+                    "title": f"{key} video",
+                    "views": count,
+                }
+                for key, count in views.items()
+            ]
+        )
+
+    trends = {trend.video.youtube_video_id: trend for trend in VideoTrend.query.all()}
+    assert trends["fast"].views == 1000
+    assert trends["fast"].views_per_hour == 600.0
+    assert trends["fast"].acceleration == 300.0
+    assert trends["slow"].views_per_hour == 60.0
+    assert trends["slow"].acceleration == -40.0
+
+    fastest = get_trending_videos(limit=1)
+    assert [item["youtube_video_id"] for item in fastest] == ["fast"]
+    assert fastest[0]["channel_username"] == "@trend_channel"
+    accelerating = get_trending_videos(sort="acceleration")
+    assert [item["youtube_video_id"] for item in accelerating] == ["fast", "slow"]
+    assert get_trending_videos(since=start + timedelta(hours=3)) == []
@@ -0,0 +1,201 @@
+import threading
+import time
+from unittest.mock import MagicMock
+
+from flask import Flask
+from openpyxl import load_workbook
+from sqlalchemy import MetaData, text
+
+import database
+from app import create_app
+from crud import get_row_counts, save_video
+from export import build_xlsx_export_file
+from models import REPLICA_BIND, Channel, RowCounter, Video, db, read_replica
+
+
+def test_create_app_applies_sqlite_profile(monkeypatch, tmp_path):
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'profile.db'}")
+    app = create_app()
+
+    def pragma(name):
+        return db.session.execute(text(f"PRAGMA {name}")).scalar()
+
+    with app.app_context():
+        assert pragma("journal_mode") == "wal"
+        assert pragma("busy_timeout") == database.SQLITE_BUSY_TIMEOUT_MS
+        assert pragma("synchronous") == 1  # NORMAL
+        assert pragma("cache_size") == -database.SQLITE_CACHE_SIZE_KIB
+        db.session.remove()
+        db.engine.dispose()
+
+
+def test_statement_timeout_applies_to_web_requests_only():
+    app = Flask(__name__)
+    connection = MagicMock()
+    connection.dialect.name = "postgresql"
+
+    # Migrations and CLI commands run in an app context without a request.
+    with app.app_context():
+        database._apply_statement_timeout(None, None, connection)
+    connection.execute.assert_not_called()
+
+    with app.test_request_context():
+        database._apply_statement_timeout(None, None, connection)
+    statement, params = connection.execute.call_args.args
+    assert "statement_timeout" in str(statement)
+    assert params == {"timeout": str(database.DB_STATEMENT_TIMEOUT_MS)}
+    assert "connect_args" not in database.engine_options("postgresql://db/app")
+
+
+def test_single_writer_serializes_writers(monkeypatch, tmp_path):
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'writer.db'}")
+    monkeypatch.setattr(database, "SQLITE_SINGLE_WRITER", True)
+    app = create_app()
+    spans = []
+
+    def write():
+        with app.app_context():
+            with database.single_writer():
+                started = time.monotonic()
+                time.sleep(0.05)
+                spans.append((started, time.monotonic()))
+
+    threads = [threading.Thread(target=write) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    spans.sort()
+    assert all(previous[1] <= current[0] for previous, current in zip(spans, spans[1:]))
+    assert (tmp_path / "writer.db.writer.lock").exists()
+    with app.app_context():
+        db.engine.dispose()
+
+
+def test_reads_route_to_replica_and_writes_to_primary(monkeypatch, tmp_path):
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'primary.db'}")
+    monkeypatch.setattr(
+        database, "DATABASE_REPLICA_URL", f"sqlite:///{tmp_path / 'replica.db'}"
+    )
+    # init_app registers a metadata per bind on the shared ``db``; drop it
+    # afterwards so later apps without a replica do not look for one.
+    monkeypatch.setitem(db.metadatas, REPLICA_BIND, MetaData())
+    app = create_app()
+    client = app.test_client()
+
+    with app.app_context():
+        db.create_all()
+        db.metadata.create_all(db.engines[REPLICA_BIND])
+        save_video({"youtube_video_id": "primary_only", "channel_username": "@c"})
+        with db.engines[REPLICA_BIND].begin() as connection:
+            connection.execute(
+                Channel.__table__.insert().values(
+                    id=1, channel_username="@c", subscribers=0
+                )
+            )
+            connection.execute(
+                Video.__table__.insert().values(
+                    youtube_video_id="replica_only", channel_id=1
+                )
+            )
+
+        payload = client.get("/api/data?dataset=videos&totals=none").get_json()
+        assert [row["youtube_video_id"] for row in payload["videos"]["items"]] == [
+            "replica_only"
+        ]
+        assert Video.query.one().youtube_video_id == "primary_only"
+        with read_replica():
+            assert Video.query.one().youtube_video_id == "replica_only"
+            # Writes inside a replica block still go to the primary.
+            save_video({"youtube_video_id": "second", "channel_username": "@c"})
+        assert Video.query.count() == 2
+
+        db.session.remove()
+        for engine in db.engines.values():
+            engine.dispose()
+
+
+def test_counters_are_seeded_from_the_primary_inside_replica_reads(
+    monkeypatch, tmp_path
+):
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'primary.db'}")
+    monkeypatch.setattr(
+        database, "DATABASE_REPLICA_URL", f"sqlite:///{tmp_path / 'replica.db'}"
+    )
+    monkeypatch.setitem(db.metadatas, REPLICA_BIND, MetaData())
+    app = create_app()
+
+    with app.app_context():
+        db.create_all()
+        db.metadata.create_all(db.engines[REPLICA_BIND])
+        save_video({"youtube_video_id": "primary_only", "channel_username": "@c"})
+        db.session.execute(RowCounter.__table__.delete())
+        db.session.commit()
+
+        with read_replica():
+            assert get_row_counts(["videos"]) == {"videos": 1}
+        assert db.session.get(RowCounter, "videos").value == 1
+
+        db.session.remove()
+        for engine in db.engines.values():
+            engine.dispose()
+
+
+def test_channel_stats_computed_on_first_read_with_a_replica(monkeypatch, tmp_path):
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'primary.db'}")
+    monkeypatch.setattr(
+        database, "DATABASE_REPLICA_URL", f"sqlite:///{tmp_path / 'replica.db'}"
+    )
+    monkeypatch.setitem(db.metadatas, REPLICA_BIND, MetaData())
+    app = create_app()
+    client = app.test_client()
+
+    with app.app_context():
+        db.create_all()
+        db.metadata.create_all(db.engines[REPLICA_BIND])
+        save_video({"youtube_video_id": "v1", "channel_username": "@c", "views": 40})
+        # The replica has the channel but not the rollup written on first read.
+        with db.engines[REPLICA_BIND].begin() as connection:
+            connection.execute(
+                Channel.__table__.insert().values(
+                    id=1, channel_username="@c", subscribers=0
+                )
+            )
+
+        response = client.get("/api/channels/1/stats")
+        assert response.status_code == 200
+        assert response.get_json()["video_count"] == 1
+        assert response.get_json()["total_views"] == 40
+
+        db.session.remove()
+        for engine in db.engines.values():
+            engine.dispose()
+
+
+def test_xlsx_export_is_built_from_the_primary(monkeypatch, tmp_path):
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'primary.db'}")
+    monkeypatch.setattr(
+        database, "DATABASE_REPLICA_URL", f"sqlite:///{tmp_path / 'replica.db'}"
+    )
+    monkeypatch.setitem(db.metadatas, REPLICA_BIND, MetaData())
+    app = create_app()
+
+    with app.app_context():
+        db.create_all()
+        db.metadata.create_all(db.engines[REPLICA_BIND])
+        save_video({"youtube_video_id": "primary_only", "channel_username": "@c"})
+
+        # The artifact is named after the primary's data_version.
+        with read_replica():
+            path = build_xlsx_export_file(str(tmp_path / "export.xlsx"))
+        workbook = load_workbook(path, read_only=True)
+        try:
+            rows = list(workbook["videos"].values)
+        finally:
+            workbook.close()
+        assert [row[1] for row in rows[1:]] == ["primary_only"]
+
+        db.session.remove()
+        for engine in db.engines.values():
+            engine.dispose()
@@ -0,0 +1,155 @@
+import re
+
+import pytest
+from sqlalchemy import event
+
+from app import create_app
+from models import Channel, ChannelHistory, Video, db
+from pagination import encode_cursor
+
+FULL_SCAN = re.compile(r"\bSCAN (videos|channels|channel_history|channel_videos)\b")
+INDEXED_SCAN = re.compile(r"USING (COVERING )?INDEX")
+HOT_SORT_COLUMNS = (
+    "saved_at",
+    "views",
+    "likes",
+    "comments",
+    "posted",
+    "duration_seconds",
+    "like_rate",
+    "comment_rate",
+    "engagement_rate",
+)
+
+
+@pytest.fixture
+def app(monkeypatch):
+    monkeypatch.setenv("DATABASE_URL", "sqlite:///:memory:")
+    app = create_app()
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        channel = Channel(channel_username="@plan_channel", subscribers=10)
+        db.session.add(channel)
+        db.session.flush()
+        db.session.add_all(
+            [
+                Video(youtube_video_id="plan_video", channel_id=channel.id, views=5),
+                ChannelHistory(channel_id=channel.id, previous_subscribers=5),
+            ]
+        )
+        db.session.commit()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+def _capture_selects(app, paths):
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append((statement, parameters))
+
+    event.listen(db.engine, "before_cursor_execute", capture)
+    try:
+        client = app.test_client()
+        for path in paths:
+            assert client.get(path).status_code == 200
+    finally:
+        event.remove(db.engine, "before_cursor_execute", capture)
+    return statements
+
+
+def _plan_problems(statements):
+    problems = []
+    connection = db.session.connection()
+    for statement, parameters in statements:
+        plan = connection.exec_driver_sql(
+            f"EXPLAIN QUERY PLAN {statement}", parameters
+        ).fetchall()
+        for row in plan:
+            detail = row[-1]
+            if FULL_SCAN.search(detail) and not INDEXED_SCAN.search(detail):
+                problems.append((" ".join(statement.split())[:120], detail))
+            if "TEMP B-TREE FOR ORDER BY" in detail:
+                problems.append((" ".join(statement.split())[:120], detail))
+    return problems
+
+
+@pytest.mark.parametrize("sort_column", HOT_SORT_COLUMNS)
+def test_api_data_hot_sorts_use_indexes(app, sort_column):
+    with app.app_context():
+        statements = _capture_selects(
+            app, [f"/api/data?sort_column={sort_column}&sort_direction=desc"]
+        )
+        assert statements
+        assert _plan_problems(statements) == []
+
+
+@pytest.mark.parametrize("sort_column", HOT_SORT_COLUMNS)
+@pytest.mark.parametrize("sort_direction", ["asc", "desc"])
+def test_api_data_cursor_pages_use_index_range_scans(app, sort_column, sort_direction):
+    with app.app_context():
+        video = Video.query.one()
+        query = f"sort_column={sort_column}&sort_direction={sort_direction}"
+        cursor = encode_cursor(
+            ("videos", sort_column, sort_direction),
+            getattr(video, sort_column),
+            video.id,
+        )
+        statements = _capture_selects(app, [f"/api/data?cursor={cursor}&{query}"])
+        assert statements
+        assert _plan_problems(statements) == []
+
+
+def test_api_data_range_filters_use_indexes(app):
+    with app.app_context():
+        statements = _capture_selects(
+            app,
+            [
+                "/api/data?dataset=videos&sort_column=posted"
+                "&posted_from=2025-01-01&posted_to=2025-06-30",
+                "/api/data?dataset=videos&sort_column=duration_seconds"
+                "&min_duration=60&max_duration=600",
+                "/api/data?dataset=history&recorded_from=2025-01-01T00:00:00",
+                "/api/data?dataset=videos&channel=@plan_channel&min_views=1",
+                "/api/data?dataset=videos&sort_column=title&title_prefix=How to",
+                "/api/data?dataset=history&channel_id=1",
+                "/api/data?dataset=videos&has_transcript=true&totals=all",
+            ],
+        )
+        assert statements
+        assert _plan_problems(statements) == []
+
+
+def test_trending_reads_the_velocity_index(app):
+    with app.app_context():
+        statements = _capture_selects(
+            app, ["/api/trending", "/api/trending?sort=acceleration&hours=6"]
+        )
+        assert statements
+        assert _plan_problems(statements) == []
+
+
+def test_filtered_exports_use_indexes(app):
+    with app.app_context():
+        statements = _capture_selects(
+            app,
+            [
+                "/export?format=ndjson&channel_id=1&columns=id,channel_id",
+                "/export?format=csv&table=videos,channel_history"
+                "&since=2025-01-01&until=2025-06-30",
+            ],
+        )
+        assert statements
+        assert _plan_problems(statements) == []
+
+
+def test_channel_detail_queries_use_indexes(app):
+    with app.app_context():
+        channel_id = Channel.query.one().id
+        statements = _capture_selects(app, [f"/channel/{channel_id}"])
+        assert statements
+        assert _plan_problems(statements) == []
@@ -0,0 +1,88 @@
+from datetime import datetime, timedelta
+
+import pytest
+from flask import Flask
+
+from crud import get_row_counts
+from models import COUNTER_CHANNEL_HISTORY, Channel, ChannelHistory, db
+from retention import compact_history, get_channel_history_series
+
+NOW = datetime(2026, 6, 30, 12, 0, 0)
+
+
+@pytest.fixture
+def app_context():
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite:///:memory:"
+    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    db.init_app(app)
+
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+def _add_history(channel_id, recorded_at, subscribers):
+    db.session.add(
+        ChannelHistory(
+            channel_id=channel_id,
+            previous_subscribers=subscribers,
+            recorded_at=recorded_at,
+        )
+    )
+
+
+def test_compact_history_downsamples_old_rows_per_tier(app_context):
+    channel = Channel(channel_username="@history_channel", subscribers=0)
+    db.session.add(channel)
+    db.session.flush()
+    # Recent rows stay raw, rows older than a day collapse per hour and rows
+    # older than a week collapse per day.
+    recent = [NOW - timedelta(minutes=minutes) for minutes in (10, 20)]
+    two_days = [NOW - timedelta(days=2, minutes=minutes) for minutes in (5, 10, 70)]
+    ten_days = [NOW - timedelta(days=10, hours=hours) for hours in (1, 2, 3)]
+    for offset, recorded_at in enumerate(recent + two_days + ten_days):
+        _add_history(channel.id, recorded_at, 100 + offset)
+    db.session.commit()
+    assert get_row_counts([COUNTER_CHANNEL_HISTORY])[COUNTER_CHANNEL_HISTORY] == 8
+
+    deleted = compact_history(now=NOW, policy="hour@1d,day@7d")
+
+    assert deleted["channel_history"] == 3
+    remaining = [
+        row.previous_subscribers
+        for row in ChannelHistory.query.order_by(ChannelHistory.id)
+    ]
+    # The latest row (highest id) of each bucket survives.
+    assert remaining == [100, 101, 103, 104, 107]
+    assert get_row_counts([COUNTER_CHANNEL_HISTORY])[COUNTER_CHANNEL_HISTORY] == 5
+    assert compact_history(now=NOW, policy="hour@1d,day@7d")["channel_history"] == 0
+
+
+def test_channel_history_series_buckets_by_granularity(app_context):
+    channel = Channel(channel_username="@series_channel", subscribers=0)
+    db.session.add(channel)
+    db.session.flush()
+    for day, subscribers in ((1, 10), (1, 30), (1, 20), (2, 40), (9, 50)):
+        _add_history(
+            channel.id, datetime(2026, 6, day, 8 + subscribers // 10), subscribers
+        )
+    db.session.commit()
+
+    daily = get_channel_history_series(channel.id, "day")
+    assert daily == [
+        {"period": "2026-06-01", "subscribers": 20, "min": 10, "max": 30},
+        {"period": "2026-06-02", "subscribers": 40, "min": 40, "max": 40},
+        {"period": "2026-06-09", "subscribers": 50, "min": 50, "max": 50},
+    ]
+
+    weekly = get_channel_history_series(channel.id, "week")
+    assert [point["period"] for point in weekly] == ["2026-06-01", "2026-06-08"]
+    assert weekly[0]["subscribers"] == 40
+
+    latest = get_channel_history_series(
+        channel.id, "day", since=datetime(2026, 6, 2), limit=1
+    )
+    assert [point["period"] for point in latest] == ["2026-06-09"]
@@ -1,16 +1,27 @@
+import html
 import io
+import json
+import os
+import re
+from datetime import date, datetime, timedelta
 
 import pytest
 from openpyxl import load_workbook
+from sqlalchemy import event
 
+import crud
+import export
 import routes
 from app import create_app
+from crud import save_videos_batch
 from models import Channel, ChannelHistory, Video, db
+from youtube_api import TRANSCRIPT_UNAVAILABLE_MESSAGE
 
 
 @pytest.fixture
-def client(monkeypatch):
+def client(monkeypatch, tmp_path):
     monkeypatch.setenv("DATABASE_URL", "sqlite:///:memory:")
+    monkeypatch.setattr(export, "EXPORT_ARTIFACT_DIR", str(tmp_path / "exports"))
 
     app = create_app()
     app.config["TESTING"] = True
@@ -63,6 +74,30 @@ def test_api_data_invalid_parameters_fallback(client):
     assert payload["query"]["limit"] == 25
 
 
+def test_api_data_dataset_queries_only_requested_table(client):
+    with client.application.app_context():
+        db.session.add_all(
+            Channel(channel_username=f"@dataset_{idx}", subscribers=idx)
+            for idx in range(3)
+        )
+        db.session.commit()
+
+    response = client.get(
+        "/api/data?dataset=channels&pagination=cursor&sort_column=subscribers"
+    )
+
+    payload = response.get_json()
+    assert "videos" not in payload and "history" not in payload
+    assert [item["subscribers"] for item in payload["channels"]["items"]] == [2, 1, 0]
+    assert payload["counts"] == {"total_channels": 3}
+
+    no_totals = client.get("/api/data?dataset=channels&pagination=cursor&totals=none")
+    assert no_totals.get_json()["counts"] == {}
+    assert no_totals.get_json()["channels"]["pagination"]["total_items"] is None
+
+    assert client.get("/api/data?dataset=unknown").status_code == 400
+
+
 def test_api_data_includes_and_sorts_by_engagement_rate(client):
     with client.application.app_context():
         channel = Channel(channel_username="@engagement_sort_channel", subscribers=2000)
@@ -160,6 +195,156 @@ def test_api_data_sorts_by_like_and_comment_rate(client):
     assert comment_rate_items[0]["comment_rate"] == 30.0
 
 
+def _walk_cursor_pages(client, query, key="next_cursor"):
+    pages = []
+    path = f"/api/data?pagination=cursor&{query}"
+    while path:
+        payload = client.get(path).get_json()
+        pages.append(payload["videos"])
+        cursor = payload["videos"]["pagination"][key]
+        path = f"/api/data?cursor={cursor}&{query}" if cursor else None
+    return pages
+
+
+@pytest.mark.parametrize("sort_direction", ["asc", "desc"])
+def test_api_data_cursor_pagination_walks_every_row_once(client, sort_direction):
+    with client.application.app_context():
+        channel = Channel(channel_username="@cursor_channel", subscribers=10)
+        db.session.add(channel)
+        db.session.flush()
+        # Duplicate and NULL sort values must neither repeat nor drop rows.
+        db.session.add_all(
+            Video(
+                youtube_video_id=f"cursor_{idx}",
+                views=None if idx % 4 == 0 else idx // 3,
+                channel_id=channel.id,
+            )
+            for idx in range(11)
+        )
+        db.session.commit()
+
+    query = f"limit=3&sort_column=views&sort_direction={sort_direction}"
+    pages = _walk_cursor_pages(client, query)
+    forward = [item["youtube_video_id"] for page in pages for item in page["items"]]
+
+    assert sorted(forward) == sorted(f"cursor_{idx}" for idx in range(11))
+    assert [len(page["items"]) for page in pages] == [3, 3, 3, 2]
+    assert pages[0]["pagination"]["prev_cursor"] is None
+    assert pages[0]["pagination"]["total_items"] == 11
+    views = [item["views"] for page in pages for item in page["items"]]
+    non_null = [value for value in views if value is not None]
+    assert non_null == sorted(non_null, reverse=sort_direction == "desc")
+
+    last_cursor = pages[-1]["pagination"]["prev_cursor"]
+    backward = []
+    while last_cursor:
+        payload = client.get(f"/api/data?cursor={last_cursor}&{query}").get_json()
+        backward = payload["videos"]["items"] + backward
+        last_cursor = payload["videos"]["pagination"]["prev_cursor"]
+    assert [item["youtube_video_id"] for item in backward] == forward[:-2]
+
+
+def test_api_data_rejects_malformed_cursor(client):
+    response = client.get("/api/data?cursor=not-a-cursor")
+
+    assert response.status_code == 400
+    assert response.get_json() == {"error": "Invalid cursor"}
+
+
+def test_api_data_filters_by_posted_range_and_duration(client):
+    with client.application.app_context():
+        save_videos_batch(
+            [
+                {
+                    "youtube_video_id": f"dated_{idx}",
+                    "channel_username": "@dated_channel",
+                    "posted": f"2025-0{idx + 1}-15T10:00:00Z",
+                    "video_length": length,
+                }
+                for idx, length in enumerate(("0:09:00", "1:00:00", "0:59:59"))
+            ]
+        )
+
+    payload = client.get(
+        "/api/data?dataset=videos&posted_from=2025-02-01&posted_to=2025-03-15"
+        "&sort_column=video_length&sort_direction=asc"
+    ).get_json()
+
+    items = payload["videos"]["items"]
+    assert [item["youtube_video_id"] for item in items] == ["dated_2", "dated_1"]
+    assert items[0]["posted"] == "2025-03-15"
+    assert items[0]["duration_seconds"] == 3599
+    assert items[1]["video_length"] == "1:00:00"
+    assert payload["videos"]["pagination"]["total_items"] == 2
+    assert payload["counts"]["total_videos"] == 3
+    assert payload["query"]["filters"] == {
+        "posted_from": "2025-02-01",
+        "posted_to": "2025-03-15",
+    }
+
+    short = client.get("/api/data?dataset=videos&max_duration=600").get_json()
+    assert [item["youtube_video_id"] for item in short["videos"]["items"]] == [
+        "dated_0"
+    ]
+
+    response = client.get("/api/data?posted_from=last-week")
+    assert response.status_code == 400
+    assert response.get_json() == {"error": "Invalid filter: posted_from"}
+    assert client.get("/api/data?min_duration=-1").status_code == 400
+
+
+def test_api_data_filters_by_channel_views_transcript_and_title_prefix(client):
+    with client.application.app_context():
+        save_videos_batch(
+            [
+                {
+                    "youtube_video_id": "alpha_low",
+                    "channel_username": "@alpha",
+                    "title": "Python tips",
+                    "views": 50,
+                    "transcript": "spoken words",
+                },
+                {
+                    "youtube_video_id": "alpha_high",
+                    "channel_username": "@alpha",
+                    "title": "Python 100%_done",
+                    "views": 5000,
+                },
+                {
+                    "youtube_video_id": "beta_high",
+                    "channel_username": "@beta",
+                    "title": "python tips",
+                    "views": 9000,
+                    "transcript": "more words",
+                },
+            ]
+        )
+
+    def ids(query):
+        response = client.get(f"/api/data?dataset=videos&sort_column=views&{query}")
+        assert response.status_code == 200
+        return [
+            item["youtube_video_id"] for item in response.get_json()["videos"]["items"]
+        ]
+
+    assert ids("channel=@alpha") == ["alpha_high", "alpha_low"]
+    assert ids("channel=@alpha&min_views=100") == ["alpha_high"]
+    assert ids("max_views=9000&min_views=5000") == ["beta_high", "alpha_high"]
+    assert ids("has_transcript=true") == ["beta_high", "alpha_low"]
+    assert ids("has_transcript=false") == ["alpha_high"]
+    # Case-sensitive prefix; LIKE wildcards are matched literally.
+    assert ids("title_prefix=Python") == ["alpha_high", "alpha_low"]
+    assert ids("title_prefix=Python 100%25_") == ["alpha_high"]
+    assert ids("title_prefix=Python 1%25") == []
+
+    channels = client.get("/api/data?dataset=channels&channel=@beta").get_json()
+    assert [item["channel_username"] for item in channels["channels"]["items"]] == [
+        "@beta"
+    ]
+    response = client.get("/api/data?dataset=videos&has_transcript=maybe")
+    assert response.get_json() == {"error": "Invalid filter: has_transcript"}
+
+
 def test_single_video_scraper_displays_engagement_rates(client, monkeypatch):
     monkeypatch.setattr(routes, "YOUTUBE_API_KEY", "test-api-key")
     monkeypatch.setattr(
@@ -195,6 +380,341 @@ def test_single_video_scraper_displays_engagement_rates(client, monkeypatch):
     assert "7.00%" in body
 
 
+def test_saving_a_scraped_video_keeps_transcript_timings(client, monkeypatch):
+    segments = [[0.0, 2.0, "intro with a "], [2.0, 3.5, "sourdough starter"]]
+    monkeypatch.setattr(routes, "YOUTUBE_API_KEY", "test-api-key")
+    monkeypatch.setattr(routes, "VIDEO_SCRAPE_MODE", "sync")
+    monkeypatch.setattr(
+        routes,
+        "get_video_data",
+        lambda _video_id: {
+            "youtube_video_id": "dQw4w9WgXcQ",
+            "channel_username": "@timed_channel",
+            "subscribers": "10",
+            "title": "Timed",
+            "views": "100",
+            "likes": "5",
+            "comments": "1",
+            "posted": "2025-01-01",
+            "video_length": "0:00:05",
+            "description": "",
+            "transcript": "intro with a  sourdough starter",
+            "transcript_segments": segments,
+        },
+    )
+
+    page = client.post(
+        "/", data={"video_url": "https://www.youtube.com/watch?v=dQw4w9WgXcQ"}
+    ).get_data(as_text=True)
+    form = page[page.index('<form action="/save"') :]
+    form = form[: form.index("</form>")]
+    fields = {
+        name: html.unescape(double or single)
+        for name, double, single in re.findall(
+            r"""<input type="hidden" name="(\w+)" value=(?:"([^"]*)"|'([^']*)')""",
+            form,
+        )
+    }
+    assert "transcript_segments" in fields
+
+    assert client.post("/save", data=fields).status_code == 302
+    invalid = {**fields, "transcript_segments": "not json"}
+    assert client.post("/save", data=invalid).status_code == 400
+    with client.application.app_context():
+        video_id = Video.query.filter_by(youtube_video_id="dQw4w9WgXcQ").one().id
+    moments = client.get(f"/api/videos/{video_id}/moments?q=sourdough").get_json()
+    assert [moment["start"] for moment in moments["moments"]] == [2.0]
+
+
+def test_single_video_job_mode_redirects_to_awaiting_page(client, monkeypatch):
+    monkeypatch.setattr(routes, "YOUTUBE_API_KEY", "test-api-key")
+    monkeypatch.setattr(routes, "VIDEO_SCRAPE_MODE", "job")
+    monkeypatch.setattr(
+        routes, "enqueue_video_job", lambda video_id: f"video-{video_id}"
+    )
+    monkeypatch.setattr(
+        routes,
+        "get_video_job",
+        lambda job_id: {
+            "id": job_id,
+            "video_id": "dQw4w9WgXcQ",
+            "status": "running",
+            "data": None,
+            "error": None,
+        },
+    )
+
+    response = client.post(
+        "/",
+        data={"video_url": "https://www.youtube.com/watch?v=dQw4w9WgXcQ"},
+    )
+
+    assert response.status_code == 302
+    assert "video_job=video-dQw4w9WgXcQ" in response.headers["Location"]
+
+    pending = client.get(response.headers["Location"])
+    assert pending.status_code == 200
+    assert 'data-job-id="video-dQw4w9WgXcQ"' in pending.get_data(as_text=True)
+
+
+def test_search_api_ranks_matches_and_returns_snippets(client):
+    with client.application.app_context():
+        save_videos_batch(
+            [
+                {
+                    "youtube_video_id": "title_hit",
+                    "channel_username": "@search_channel",
+                    "title": "Sourdough baking basics",
+                    "transcript": "today we talk about flour",
+                },
+                {
+                    "youtube_video_id": "transcript_hit",
+                    "channel_username": "@search_channel",
+                    "title": "Kitchen vlog",
+                    "transcript": "later I try <b>sourdough</b> baking at home",
+                },
+                {
+                    "youtube_video_id": "no_hit",
+                    "channel_username": "@search_channel",
+                    "title": "Gardening",
+                },
+                {
+                    "youtube_video_id": "unavailable",
+                    "channel_username": "@search_channel",
+                    "title": "Silent film",
+                    "transcript": TRANSCRIPT_UNAVAILABLE_MESSAGE,
+                },
+                {
+                    "youtube_video_id": "withdrawn",
+                    "channel_username": "@search_channel",
+                    "title": "Q&A",
+                    "transcript": "thanks to the uploader community",
+                },
+            ]
+        )
+        # Changed text is re-indexed, stale text stops matching.
+        save_videos_batch(
+            [
+                {
+                    "youtube_video_id": "no_hit",
+                    "channel_username": "@search_channel",
+                    "title": "Gardening",
+                    "transcript": "no bread here",
+                },
+                {
+                    "youtube_video_id": "withdrawn",
+                    "channel_username": "@search_channel",
+                    "title": "Q&A",
+                    "transcript": TRANSCRIPT_UNAVAILABLE_MESSAGE,
+                },
+            ]
+        )
+
+    payload = client.get("/api/search?q=sourdough baking").get_json()
+
+    assert [item["youtube_video_id"] for item in payload["items"]] == [
+        "title_hit",
+        "transcript_hit",
+    ]
+    assert payload["items"][0]["channel_username"] == "@search_channel"
+    assert "<mark>sourdough</mark>" in payload["items"][1]["snippet"]
+    assert "&lt;b&gt;" in payload["items"][1]["snippet"]
+    bread = client.get("/api/search?q=bread").get_json()["items"]
+    assert [item["youtube_video_id"] for item in bread] == ["no_hit"]
+    # The "no transcript" placeholder is not indexed as transcript text.
+    assert client.get("/api/search?q=uploader").get_json()["items"] == []
+
+    paged = client.get("/api/search?q=sourdough&limit=1").get_json()
+    assert len(paged["items"]) == 1
+    assert paged["pagination"]["has_next"] is True
+    assert client.get("/api/search?q=%22").get_json()["items"] == []
+    assert client.get("/api/search").status_code == 400
+
+
+def test_video_moments_api_returns_timestamped_deep_links(client):
+    segments = [
+        [0.0, 2.5, "welcome back"],
+        [2.5, 3.0, "today we bake"],
+        [65.4, 2.0, "sourdough bread at"],
+        [67.4, 1.5, "home with sourdough"],
+    ]
+    with client.application.app_context():
+        video_id = save_videos_batch(
+            [
+                {
+                    "youtube_video_id": "moments_vid",
+                    "channel_username": "@moments_channel",
+                    "transcript": " ".join(text for _s, _d, text in segments),
+                    "transcript_segments": segments,
+                },
+                {
+                    "youtube_video_id": "no_moments_vid",
+                    "channel_username": "@moments_channel",
+                    "transcript": TRANSCRIPT_UNAVAILABLE_MESSAGE,
+                },
+            ]
+        )[0]["video_id"]
+        unavailable_id = (
+            Video.query.filter_by(youtube_video_id="no_moments_vid").one().id
+        )
+
+    payload = client.get(f"/api/videos/{video_id}/moments?q=Sourdough").get_json()
+
+    assert [moment["start"] for moment in payload["moments"]] == [65.4, 67.4]
+    assert payload["moments"][0]["text"] == "sourdough bread at"
+    assert payload["moments"][0]["url"] == (
+        "https://www.youtube.com/watch?v=moments_vid&t=65s"
+    )
+    # Phrases can span segment boundaries; the moment is where they begin.
+    spanning = client.get(f"/api/videos/{video_id}/moments?q=bake sourdough")
+    assert [moment["start"] for moment in spanning.get_json()["moments"]] == [2.5]
+    assert client.get(f"/api/videos/{video_id}/moments").status_code == 400
+    unavailable = client.get(f"/api/videos/{unavailable_id}/moments?q=disabled")
+    assert unavailable.get_json()["moments"] == []
+    assert client.get("/api/videos/999/moments?q=bread").status_code == 404
+
+
+def test_video_stats_api_returns_snapshot_series(client):
+    with client.application.app_context():
+        video_id = save_videos_batch(
+            [
+                {
+                    "youtube_video_id": "stats_vid",
+                    "channel_username": "@stats_channel",
+                    "views": 42,
+                }
+            ]
+        )[0]["video_id"]
+
+    payload = client.get(
+        f"/api/videos/{video_id}/stats?since=2000-01-01T00:00:00Z"
+    ).get_json()
+
+    assert payload["youtube_video_id"] == "stats_vid"
+    assert [point["views"] for point in payload["points"]] == [42]
+    assert client.get(f"/api/videos/{video_id}/stats?since=soon").status_code == 400
+    assert client.get("/api/videos/999/stats").status_code == 404
+
+
+def test_channel_history_api_validates_granularity(client):
+    with client.application.app_context():
+        channel = Channel(channel_username="@history_api", subscribers=5)
+        db.session.add(channel)
+        db.session.commit()
+        channel_id = channel.id
+
+    payload = client.get(f"/api/channels/{channel_id}/history?granularity=week")
+
+    assert payload.get_json() == {"granularity": "week", "points": []}
+    assert (
+        client.get(f"/api/channels/{channel_id}/history?granularity=year").status_code
+        == 400
+    )
+    assert client.get("/api/channels/999/history").status_code == 404
+
+
+def test_channel_stats_api_returns_rollup(client):
+    with client.application.app_context():
+        save_videos_batch(
+            [
+                {
+                    "youtube_video_id": f"rollup_{views}",
+                    "channel_username": "@rollup",
+                    "views": views,
+                    "likes": views // 20,
+                    "posted": "2025-05-0{}".format(views // 100),
+                }
+                for views in (100, 200, 600)
+            ]
+        )
+        channel_id = Channel.query.one().id
+
+    payload = client.get(f"/api/channels/{channel_id}/stats").get_json()
+
+    assert payload["video_count"] == 3
+    assert payload["avg_views"] == 300.0
+    assert payload["median_views"] == 200.0
+    assert payload["avg_engagement_rate"] == 5.0
+    assert payload["latest_upload"] == "2025-05-06"
+    assert "Median Views" in client.get(f"/channel/{channel_id}").get_data(as_text=True)
+    assert client.get("/api/channels/999/stats").status_code == 404
+
+
+def test_analytics_api_validates_channel(client):
+    with client.application.app_context():
+        save_videos_batch(
+            [{"youtube_video_id": "analytics_1", "channel_username": "@analytics"}]
+        )
+        channel_id = Channel.query.one().id
+
+    payload = client.get(f"/api/analytics?channel_id={channel_id}").get_json()
+
+    assert payload["channel_id"] == channel_id
+    assert payload["video_count"] == 1
+    assert client.get("/api/analytics?channel_id=abc").status_code == 400
+    assert client.get("/api/analytics?channel_id=999").status_code == 404
+
+
+def test_trending_api_lists_fastest_videos(client, monkeypatch):
+    start = datetime(2026, 6, 1, 12, 0, 0)
+    with client.application.app_context():
+        for hours, views in ((0, 100), (2, 500)):
+            monkeypatch.setattr(
+                crud, "utc_now", lambda at=start + timedelta(hours=hours): at
+            )
+            save_videos_batch(
+                [
+                    {
+                        "youtube_video_id": "trending_1",
+                        "channel_username": "@trending",
+                        "views": views,
+                    }
+                ]
+            )
+    monkeypatch.setattr(routes, "utc_now", lambda: start + timedelta(hours=3))
+
+    payload = client.get("/api/trending?limit=5").get_json()
+
+    assert payload["query"] == {"sort": "views_per_hour", "hours": 48, "limit": 5}
+    assert [item["views_per_hour"] for item in payload["items"]] == [200.0]
+    assert client.get("/api/trending?sort=likes").status_code == 400
+
+
+def test_channel_detail_pages_videos_and_loads_list_columns_only(client):
+    with client.application.app_context():
+        save_videos_batch(
+            [
+                {
+                    "youtube_video_id": f"paged_{idx}",
+                    "channel_username": "@paged_channel",
+                    "title": f"Paged video {idx}",
+                    "description": "not needed on the channel page",
+                }
+                for idx in range(routes.CHANNEL_DETAIL_PAGE_SIZE + 5)
+            ]
+        )
+        channel_id = Channel.query.one().id
+        statements = []
+        event.listen(
+            db.engine,
+            "before_cursor_execute",
+            lambda *args: statements.append(args[2]),
+        )
+
+    body = client.get(f"/channel/{channel_id}").get_data(as_text=True)
+
+    assert body.count("window.location.href='/video/") == (
+        routes.CHANNEL_DETAIL_PAGE_SIZE
+    )
+    assert "55</p>" in body
+    assert not any("videos.description" in statement for statement in statements)
+    next_url = re.search(r'href="([^"]*videos_cursor=[^"]*)"', body).group(1)
+    older = client.get(html.unescape(next_url)).get_data(as_text=True)
+    assert older.count("window.location.href='/video/") == 5
+    assert "Newer" in older
+    assert client.get(f"/channel/{channel_id}?videos_cursor=junk").status_code == 200
+
+
 def test_export_csv_success(client):
     response = client.get("/export?format=csv")
 
@@ -207,7 +727,56 @@ def test_export_csv_success(client):
     assert "=== CHANNEL_HISTORY ===" in body
 
 
-def test_export_xlsx_success(client):
+def test_export_csv_includes_decompressed_transcripts(client):
+    with client.application.app_context():
+        channel = Channel(channel_username="@export_channel", subscribers=1)
+        db.session.add(channel)
+        db.session.flush()
+        db.session.add(
+            Video(
+                youtube_video_id="export_video",
+                transcript="exported transcript text",
+                channel_id=channel.id,
+            )
+        )
+        db.session.commit()
+
+    body = client.get("/export?format=csv").get_data(as_text=True)
+    videos_section = body.split("=== CHANNELS ===")[0]
+
+    assert videos_section.splitlines()[1].endswith(",transcript")
+    assert "exported transcript text" in videos_section
+    assert "content" not in videos_section.splitlines()[1]
+
+
+def _queue_export_jobs_inline(monkeypatch):
+    """Run export jobs as soon as they are queued, like a worker would."""
+    queued = []
+
+    def enqueue(export_format, data_version):
+        queued.append(data_version)
+        export.build_export_artifact(export_format)
+        return f"job-{len(queued)}"
+
+    monkeypatch.setattr(routes, "enqueue_export_job", enqueue)
+    monkeypatch.setattr(
+        routes,
+        "get_export_job",
+        lambda job_id: {"id": job_id, "status": "queued", "artifact": None},
+    )
+    return queued
+
+
+def test_export_xlsx_success(client, monkeypatch):
+    queued = _queue_export_jobs_inline(monkeypatch)
+
+    # Nothing is built in the request: the workbook comes from a job.
+    pending = client.get("/export?format=xlsx")
+    assert pending.status_code == 202
+    assert pending.get_json()["id"] == "job-1"
+    assert pending.headers["Location"] == "/api/export-jobs/job-1"
+    assert len(queued) == 1
+
     response = client.get("/export?format=xlsx")
 
     assert response.status_code == 200
@@ -228,6 +797,205 @@ def test_export_xlsx_success(client):
         workbook.close()
 
 
+def test_export_xlsx_reuses_artifact_until_data_changes(client, monkeypatch):
+    queued = _queue_export_jobs_inline(monkeypatch)
+    assert client.get("/export?format=xlsx").status_code == 202
+    first = client.get("/export?format=xlsx")
+    artifacts = os.listdir(export.EXPORT_ARTIFACT_DIR)
+    second = client.get("/export?format=xlsx")
+
+    assert first.status_code == second.status_code == 200
+    assert first.data == second.data
+    assert os.listdir(export.EXPORT_ARTIFACT_DIR) == artifacts
+    assert len(queued) == 1
+
+    with client.application.app_context():
+        save_videos_batch(
+            [{"youtube_video_id": "xlsx_video", "channel_username": "@xlsx"}]
+        )
+
+    def unavailable_queue(export_format, data_version):
+        queued.append(data_version)
+        raise routes.RedisError("down")
+
+    monkeypatch.setattr(routes, "enqueue_export_job", unavailable_queue)
+    # No artifact exists for the new data, so a job is needed.
+    assert client.post("/api/export-jobs?format=xlsx").status_code == 503
+    assert len(queued) == 2
+
+    _queue_export_jobs_inline(monkeypatch)
+    assert client.post("/api/export-jobs?format=xlsx").status_code == 202
+    (artifact,) = os.listdir(export.EXPORT_ARTIFACT_DIR)
+    assert artifact != artifacts[0]
+
+    payload = client.post("/api/export-jobs?format=xlsx").get_json()
+    assert payload["status"] == "completed"
+    assert payload["download_url"] == f"/exports/{artifact}"
+    download = client.get(payload["download_url"])
+    assert download.status_code == 200
+    assert "exported_data.xlsx" in download.headers["Content-Disposition"]
+    assert client.get("/exports/exported_data-1.csv").status_code == 404
+    assert client.post("/api/export-jobs?format=pdf").status_code == 400
+
+
+def test_export_xlsx_builds_inline_without_queue(client, monkeypatch):
+    queued = []
+
+    def unavailable_queue(export_format, data_version):
+        queued.append(data_version)
+        raise routes.RedisError("down")
+
+    monkeypatch.setattr(routes, "enqueue_export_job", unavailable_queue)
+
+    response = client.get("/export?format=xlsx")
+    assert response.status_code == 200
+    assert "exported_data.xlsx" in response.headers["Content-Disposition"]
+    assert len(queued) == 1
+
+    # The inline build is the artifact both endpoints reuse.
+    assert client.get("/export?format=xlsx").data == response.data
+    payload = client.post("/api/export-jobs?format=xlsx").get_json()
+    assert payload["status"] == "completed"
+    assert len(queued) == 1
+
+
+def _save_export_fixture():
+    save_videos_batch(
+        [
+            {
+                "youtube_video_id": f"{username}_{posted}",
+                "channel_username": username,
+                "title": f"{username} {posted}",
+                "views": views,
+                "posted": posted,
+                "transcript": "a very long transcript",
+            }
+            for username, posted, views in (
+                ("@keep", "2025-01-10", 10),
+                ("@keep", "2025-03-10", 30),
+                ("@other", "2025-01-15", 50),
+            )
+        ]
+    )
+
+
+def test_export_ndjson_projects_and_filters_rows(client):
+    with client.application.app_context():
+        _save_export_fixture()
+        statements = []
+        event.listen(
+            db.engine,
+            "before_cursor_execute",
+            lambda *args: statements.append(args[2]),
+        )
+
+        response = client.get(
+            "/export?format=ndjson&table=videos&columns=youtube_video_id,views,posted"
+            "&channel=@keep&since=2025-01-01&until=2025-01-31"
+        )
+        lines = response.get_data(as_text=True).splitlines()
+
+    assert response.status_code == 200
+    assert response.mimetype == "application/x-ndjson"
+    assert [json.loads(line) for line in lines] == [
+        {
+            "table": "videos",
+            "youtube_video_id": "@keep_2025-01-10",
+            "views": 10,
+            "posted": "2025-01-10",
+        }
+    ]
+    # Transcripts are neither joined nor decompressed unless requested.
+    assert not [sql for sql in statements if "video_transcripts" in sql]
+
+
+def test_export_csv_selects_tables_and_columns(client):
+    with client.application.app_context():
+        _save_export_fixture()
+
+    body = client.get(
+        "/export?format=csv&table=channels,channel_history&columns=id,channel_id"
+    ).get_data(as_text=True)
+
+    assert "=== VIDEOS ===" not in body
+    sections = body.split("=== CHANNEL_HISTORY ===")
+    assert sections[0].splitlines()[1] == "id"
+    assert sections[1].splitlines()[1] == "id,channel_id"
+
+    transcripts = client.get(
+        "/export?format=csv&table=videos&columns=title,transcript&until=2025-01-10"
+    ).get_data(as_text=True)
+    assert transcripts.splitlines()[1:] == [
+        "title,transcript",
+        "@keep 2025-01-10,a very long transcript",
+        "",
+    ]
+
+
+def test_export_rejects_invalid_selection(client):
+    for query in (
+        "format=csv&table=row_counters",
+        "format=csv&table=channels&columns=views",
+        "format=csv&columns=no_such_column",
+        "format=ndjson&channel_id=abc",
+        "format=ndjson&channel=@missing",
+        "format=ndjson&since=yesterday",
+        "format=xlsx&table=videos",
+        "format=pdf",
+    ):
+        assert client.get(f"/export?{query}").status_code == 400, query
+
+
+def test_export_parquet_streams_typed_row_groups(client, monkeypatch):
+    parquet = pytest.importorskip("pyarrow.parquet")
+    monkeypatch.setattr(export, "DB_FETCH_CHUNK_SIZE", 2)
+    monkeypatch.setattr(export, "PARQUET_ROW_GROUP_SIZE", 2)
+    with client.application.app_context():
+        save_videos_batch(
+            [
+                {
+                    "youtube_video_id": f"parquet_{idx}",
+                    "channel_username": "@parquet",
+                    "views": idx,
+                    "posted": "2025-02-03",
+                    "transcript": f"parquet transcript {idx}",
+                }
+                for idx in range(5)
+            ]
+        )
+
+    response = client.get("/export?format=parquet&table=videos")
+
+    assert response.status_code == 200
+    parquet_file = parquet.ParquetFile(io.BytesIO(response.data))
+    assert parquet_file.metadata.num_row_groups == 3
+    table = parquet_file.read()
+    assert table.column("views").to_pylist() == [0, 1, 2, 3, 4]
+    assert table.column("posted").to_pylist()[0] == date(2025, 2, 3)
+    assert str(table.schema.field("saved_at").type) == "timestamp[us]"
+    assert table.column("transcript").to_pylist()[4] == "parquet transcript 4"
+
+    projected = parquet.read_table(
+        io.BytesIO(
+            client.get(
+                "/export?format=parquet&table=videos&columns=id,views&since=2025-02-01"
+            ).data
+        )
+    )
+    assert projected.column_names == ["id", "views"]
+    assert projected.num_rows == 5
+
+
+def test_export_parquet_requires_table_and_pyarrow(client, monkeypatch):
+    assert client.get("/export?format=parquet").status_code == 400
+    assert client.get("/export?format=parquet&table=row_counters").status_code == 400
+
+    monkeypatch.setattr(export, "pyarrow", None)
+    response = client.get("/export?format=parquet&table=videos")
+    assert response.status_code == 501
+    assert b"pyarrow" in response.data
+
+
 def test_video_detail_route_success(client):
     with client.application.app_context():
         channel = Channel(channel_username="@video_detail_channel", subscribers=1200)
@@ -240,7 +1008,7 @@ def test_video_detail_route_success(client):
             views=100,
             likes=10,
             comments=1,
-            posted="2025-01-01",
+            posted=date(2025, 1, 1),
             video_length="5:00",
             channel_id=channel.id,
         )
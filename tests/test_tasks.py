@@ -0,0 +1,231 @@
+import threading
+import time
+
+import pytest
+from flask import Flask
+
+import export
+import tasks
+from models import Video, db
+
+
+class FakeRedis:
+    """Thread-safe subset of the redis-py API used by the video result cache."""
+
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            return self._data.get(key)
+
+    def set(self, key, value, nx=False, ex=None):
+        with self._lock:
+            if nx and key in self._data:
+                return None
+            self._data[key] = value.encode() if isinstance(value, str) else value
+            return True
+
+    def delete(self, key):
+        with self._lock:
+            return int(self._data.pop(key, None) is not None)
+
+    def exists(self, key):
+        with self._lock:
+            return int(key in self._data)
+
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    connection = FakeRedis()
+    monkeypatch.setattr(tasks, "redis_connection", connection)
+    monkeypatch.setattr(tasks, "VIDEO_FETCH_POLL_SECONDS", 0.01)
+    return connection
+
+
+def test_get_video_data_cached_serves_repeat_lookups_from_cache(fake_redis):
+    calls = []
+
+    def fetcher(video_id):
+        calls.append(video_id)
+        return {"youtube_video_id": video_id, "views": "10"}
+
+    first = tasks.get_video_data_cached("dQw4w9WgXcQ", fetcher=fetcher)
+    second = tasks.get_video_data_cached("dQw4w9WgXcQ", fetcher=fetcher)
+
+    assert first == second == {"youtube_video_id": "dQw4w9WgXcQ", "views": "10"}
+    assert calls == ["dQw4w9WgXcQ"]
+    assert not fake_redis.exists(tasks._video_lock_key("dQw4w9WgXcQ"))
+
+
+def test_get_video_data_cached_coalesces_concurrent_requests(fake_redis):
+    calls = []
+
+    def slow_fetcher(video_id):
+        calls.append(video_id)
+        time.sleep(0.1)
+        return {"youtube_video_id": video_id}
+
+    results = []
+    threads = [
+        threading.Thread(
+            target=lambda: results.append(
+                tasks.get_video_data_cached("dQw4w9WgXcQ", fetcher=slow_fetcher)
+            )
+        )
+        for _ in range(5)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert results == [{"youtube_video_id": "dQw4w9WgXcQ"}] * 5
+
+
+def test_get_video_data_cached_caches_misses(fake_redis):
+    calls = []
+
+    def missing_fetcher(video_id):
+        calls.append(video_id)
+        return None
+
+    assert tasks.get_video_data_cached("missing_vid", fetcher=missing_fetcher) is None
+    assert tasks.get_video_data_cached("missing_vid", fetcher=missing_fetcher) is None
+    assert calls == ["missing_vid"]
+
+
+def test_get_video_data_cached_without_redis_fetches_directly(monkeypatch):
+    monkeypatch.setattr(tasks, "redis_connection", None)
+
+    result = tasks.get_video_data_cached(
+        "dQw4w9WgXcQ", fetcher=lambda video_id: {"youtube_video_id": video_id}
+    )
+
+    assert result == {"youtube_video_id": "dQw4w9WgXcQ"}
+
+
+@pytest.fixture
+def app_context():
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite:///:memory:"
+    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    db.init_app(app)
+
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+class PingingRedis(FakeRedis):
+    def ping(self):
+        return True
+
+
+def test_video_job_lookup_ignores_other_job_ids(monkeypatch):
+    fetched = []
+
+    class RecordingJob:
+        @staticmethod
+        def fetch(job_id, connection):
+            fetched.append(job_id)
+            raise tasks.NoSuchJobError(job_id)
+
+    monkeypatch.setattr(tasks, "Job", RecordingJob)
+    monkeypatch.setattr(tasks, "RQ_AVAILABLE", True)
+    monkeypatch.setattr(tasks, "redis_connection", PingingRedis())
+
+    # A channel job id must not be rendered as video data.
+    assert tasks.get_video_job("0b6c2f6e-channel-job") is None
+    assert tasks.get_video_job("video-abc") is None
+    assert fetched == ["video-abc"]
+
+
+def test_export_job_lookup_ignores_other_job_ids(monkeypatch):
+    fetched = []
+
+    class RecordingJob:
+        @staticmethod
+        def fetch(job_id, connection):
+            fetched.append(job_id)
+            raise tasks.NoSuchJobError(job_id)
+
+    monkeypatch.setattr(tasks, "Job", RecordingJob)
+    monkeypatch.setattr(tasks, "RQ_AVAILABLE", True)
+    monkeypatch.setattr(tasks, "redis_connection", PingingRedis())
+
+    # A finished channel job has no artifact to link to.
+    assert tasks.get_export_job("0b6c2f6e-channel-job") is None
+    assert tasks.get_export_job("video-abc") is None
+    assert tasks.get_export_job("export-xlsx-1") is None
+    assert fetched == ["export-xlsx-1"]
+
+
+def test_channel_job_saves_in_batches_and_skips_fresh_videos(app_context, monkeypatch):
+    video_ids = [f"video_{idx}" for idx in range(5)]
+    fetched = []
+
+    def fake_get_video_data(video_id, include_transcript=True):
+        fetched.append(video_id)
+        return {
+            "youtube_video_id": video_id,
+            "channel_username": "@batch_channel",
+            "views": 10,
+            "transcript": "text",
+        }
+
+    monkeypatch.setattr(tasks, "SAVE_BATCH_SIZE", 2)
+    monkeypatch.setattr(tasks, "get_channel_videos", lambda *_args: video_ids)
+    monkeypatch.setattr(tasks, "get_video_data", fake_get_video_data)
+
+    first = tasks._process_channel_background_impl("UC123", 5)
+    second = tasks._process_channel_background_impl("UC123", 5)
+
+    assert first["inserted"] == 5
+    assert first["failed"] == 0
+    assert second["fresh"] == 5
+    assert fetched == video_ids
+    assert Video.query.count() == 5
+
+
+class FakeJob:
+    id = "export-job"
+
+    def __init__(self):
+        self.meta = {}
+        self.saved = []
+
+    def save_meta(self):
+        self.saved.append(dict(self.meta))
+
+
+def test_export_job_reports_progress_and_reuses_artifact(
+    app_context, monkeypatch, tmp_path
+):
+    job = FakeJob()
+    monkeypatch.setattr(export, "EXPORT_ARTIFACT_DIR", str(tmp_path))
+    monkeypatch.setattr(export, "DB_FETCH_CHUNK_SIZE", 2)
+    monkeypatch.setattr(tasks, "get_current_job", lambda: job)
+    monkeypatch.setattr(tasks.external_sio, "emit", lambda *args, **kwargs: None)
+    tasks.save_videos_batch(
+        [
+            {"youtube_video_id": f"export_{idx}", "channel_username": "@export"}
+            for idx in range(4)
+        ]
+    )
+
+    first = tasks.build_export_background("xlsx")
+
+    assert (tmp_path / first["artifact"]).exists()
+    assert job.meta["total_rows"] == 9
+    assert job.meta["progress_pct"] == 100
+    progress = [meta["progress_pct"] for meta in job.saved]
+    assert progress == sorted(progress) and 0 < progress[-2] < 100
+
+    modified = (tmp_path / first["artifact"]).stat().st_mtime_ns
+    assert tasks.build_export_background("xlsx") == first
+    assert (tmp_path / first["artifact"]).stat().st_mtime_ns == modified
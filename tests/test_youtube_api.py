@@ -79,7 +79,7 @@ def test_get_video_data_parses_expected_dictionary():
                 FakeResponse(fake_channel_payload),
             ],
         ) as mocked_get,
-        patch("youtube_api.get_transcript", return_value="Mock transcript"),
+        patch("youtube_api.get_transcript", return_value=("Mock transcript", [])),
     ):
         result = get_video_data("dQw4w9WgXcQ")
 
@@ -138,7 +138,7 @@ def test_get_video_data_success(mock_youtube_api_get, mock_get_transcript):
         return {}
 
     mock_youtube_api_get.side_effect = mock_api_side_effect
-    mock_get_transcript.return_value = "Mocked transcript text"
+    mock_get_transcript.return_value = ("Mocked transcript text", [])
 
     # Keep an explicit MagicMock use so the imported symbol is intentional.
     result_sink = MagicMock()
@@ -182,7 +182,8 @@ def test_get_video_data_missing_fields(mock_youtube_api_get, mock_get_transcript
 
     mock_youtube_api_get.side_effect = mock_api_side_effect
     mock_get_transcript.return_value = (
-        "Transcript unavailable or disabled by the uploader."
+        "Transcript unavailable or disabled by the uploader.",
+        [],
     )
 
     result = get_video_data("dQw4w9WgXcQ")
@@ -200,8 +201,42 @@ def test_get_video_data_missing_fields(mock_youtube_api_get, mock_get_transcript
 @patch("youtube_api.youtube_api_get")
 def test_get_video_data_invalid_id(mock_youtube_api_get, mock_get_transcript):
     mock_youtube_api_get.return_value = {"items": []}
-    mock_get_transcript.return_value = "unused"
+    mock_get_transcript.return_value = ("unused", [])
 
     result = get_video_data("invalid_id")
 
     assert result is None
+
+
+@patch("youtube_api.get_transcript")
+@patch("youtube_api.youtube_api_get")
+def test_get_video_data_can_skip_transcript(mock_youtube_api_get, mock_get_transcript):
+    mock_youtube_api_get.side_effect = lambda endpoint, params: (
+        {"items": [{"snippet": {"title": "Stats only"}, "statistics": {}}]}
+        if endpoint == "videos"
+        else {}
+    )
+
+    result = get_video_data("dQw4w9WgXcQ", include_transcript=False)
+
+    assert result["title"] == "Stats only"
+    assert "transcript" not in result
+    mock_get_transcript.assert_not_called()
+
+
+def test_get_transcript_keeps_segment_timings(monkeypatch):
+    snippets = [
+        MagicMock(text="hello there", start=0.0, duration=1.5),
+        MagicMock(text="general kenobi", start=1.5, duration=2.0),
+    ]
+    api = MagicMock()
+    api.fetch.return_value = snippets
+    monkeypatch.setattr(youtube_api, "YouTubeTranscriptApi", lambda: api)
+
+    text, segments = youtube_api.get_transcript("dQw4w9WgXcQ")
+
+    assert text == "hello there general kenobi"
+    assert segments == [
+        [0.0, 1.5, "hello there"],
+        [1.5, 2.0, "general kenobi"],
+    ]
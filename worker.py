@@ -5,7 +5,24 @@ from redis import Redis
 from rq import Connection, Worker
 from sentry_sdk.integrations.flask import FlaskIntegration
 
-LISTEN_QUEUES = [os.environ.get("RQ_QUEUE_NAME", "channel-scrape")]
+# Quick single-video jobs are listed first so RQ always drains them before
+# exports and channels. Priority only picks the next job, so Compose also runs
+# a worker limited to the video queue (``RQ_LISTEN_QUEUES``) that never waits
+# behind a channel job.
+LISTEN_QUEUES = [
+    queue.strip()
+    for queue in os.environ.get(
+        "RQ_LISTEN_QUEUES",
+        ",".join(
+            [
+                os.environ.get("RQ_VIDEO_QUEUE_NAME", "video-scrape"),
+                os.environ.get("RQ_EXPORT_QUEUE_NAME", "export"),
+                os.environ.get("RQ_QUEUE_NAME", "channel-scrape"),
+            ]
+        ),
+    ).split(",")
+    if queue.strip()
+]
 REDIS_URL = os.environ.get("REDIS_URL", "redis://localhost:6379/0")
 
 if "SENTRY_DSN" in os.environ:
@@ -364,23 +364,31 @@ def _should_retry_transcript_exception(exc: Exception) -> bool:
     return any(marker in message for marker in retryable_markers)
 
 
-def get_transcript(video_id: str) -> str:
-    """Fetch transcript with retry for transient errors."""
+def get_transcript(video_id: str) -> Tuple[str, List[List[Any]]]:
+    """Fetch transcript with retry for transient errors.
+
+    Returns ``(text, segments)`` where ``segments`` is a list of
+    ``[start_seconds, duration_seconds, text]`` whose texts joined by single
+    spaces equal ``text``. Unavailable transcripts have no segments.
+    """
     api = YouTubeTranscriptApi()
 
     for attempt in range(API_MAX_RETRIES):
         try:
-            transcript = api.fetch(video_id)
-            return " ".join([line.text for line in transcript])
+            segments = [
+                [line.start, line.duration, line.text] for line in api.fetch(video_id)
+            ]
+            text = " ".join(text for _start, _duration, text in segments)
+            return text, segments
         except (TranscriptsDisabled, NoTranscriptFound):
-            return TRANSCRIPT_UNAVAILABLE_MESSAGE
+            return TRANSCRIPT_UNAVAILABLE_MESSAGE, []
         except Exception as e:
             if (
                 attempt >= API_MAX_RETRIES - 1
                 or not _should_retry_transcript_exception(e)
             ):
                 logger.exception("An error occurred: %s", str(e))
-                return TRANSCRIPT_UNAVAILABLE_MESSAGE
+                return TRANSCRIPT_UNAVAILABLE_MESSAGE, []
             logger.warning(
                 "Retrying transcript fetch for video %s after transient error (%s/%s): %s",
                 video_id,
@@ -390,11 +398,17 @@ def get_transcript(video_id: str) -> str:
             )
             _sleep_with_backoff(attempt)
 
-    return TRANSCRIPT_UNAVAILABLE_MESSAGE
+    return TRANSCRIPT_UNAVAILABLE_MESSAGE, []
+
 
+def get_video_data(
+    video_id: str, include_transcript: bool = True
+) -> Optional[Dict[str, Any]]:
+    """Fetch video details including channel @username and subscribers.
 
-def get_video_data(video_id: str) -> Optional[Dict[str, Any]]:
-    """Fetch video details including channel @username and subscribers."""
+    With ``include_transcript=False`` the transcript request is skipped and the
+    ``transcript`` key is omitted, leaving any stored transcript untouched.
+    """
     response = youtube_api_get(
         "videos",
         {"part": "snippet,statistics,contentDetails", "id": video_id},
@@ -428,7 +442,7 @@ def get_video_data(video_id: str) -> Optional[Dict[str, Any]]:
     published = snippet.get("publishedAt", "")
     posted = published.split("T")[0] if published else ""
 
-    return {
+    video_data = {
         "youtube_video_id": video_id,
         "title": snippet.get("title", ""),
         "description": snippet.get("description", ""),
@@ -439,5 +453,10 @@ def get_video_data(video_id: str) -> Optional[Dict[str, Any]]:
         "channel_username": channel_username,
         "subscribers": subscribers,
         "video_length": parse_duration(content_details.get("duration", "")),
-        "transcript": get_transcript(video_id),
     }
+    if include_transcript:
+        transcript, segments = get_transcript(video_id)
+        video_data["transcript"] = transcript
+        if segments:
+            video_data["transcript_segments"] = segments
+    return video_data